@@ -0,0 +1,106 @@
+"""Dense fluid step cost with float32 double buffers against the old float64 path.
+
+Both paths run the same kernels in the same order as FluidScene's dense
+step: advection, diffusion, then a multigrid pressure projection. The
+float32 path keeps its fields in a FluidFields, writes every kernel's
+result into a back buffer and swaps, and reuses one BandPool's scratch.
+The float64 path is how the scene stepped before the buffers went in:
+every kernel returns a fresh float64 array and takes fresh scratch.
+Each row also reports how far apart the two paths' densities end up, the
+most memory tracemalloc saw a float32 step hold at once, temporaries
+included, and the V-cycles the last float64 and float32 pressure solves
+took.
+
+Run from the repository root: python -m benchmarks.fluid_buffers
+"""
+import time
+import tracemalloc
+import numpy as np
+from engine.BandPool import BandPool
+from engine.FluidFields import FluidFields
+from engine.FluidKernels import advect, cell_grid, diffuse, divergence, subtract_gradient
+from engine.PoissonSolver import MultigridSolver
+
+DT = 0.016
+DIFFUSION_RATE = 0.0003  # Same as FluidScene
+DIFFUSION_ITERATIONS = 20
+STEPS = 5
+SIZES = ((320, 240), (640, 480), (1280, 960))
+
+
+def start_state(shape):
+    """A swirl like FluidScene's with a square of dye in the middle."""
+    velocity = np.array(np.meshgrid(
+        np.linspace(-0.5, 0.5, shape[1]),
+        np.linspace(-0.5, 0.5, shape[0])
+    )).transpose(1, 2, 0)
+    density = np.zeros(shape)
+    density[shape[0] * 2 // 5:shape[0] * 3 // 5, shape[1] * 2 // 5:shape[1] * 3 // 5] = 1
+    return density, velocity
+
+
+def step_buffers(f, a, solver, pool):
+    velocity = f.velocity
+    advect(f.density, velocity, DT, f.cells, f.density_back, pool)
+    advect(f.velocity, velocity, DT, f.cells, f.velocity_back, pool)
+    f.swap_density()
+    f.swap_velocity()
+    diffuse(f.density, a, DIFFUSION_ITERATIONS, f.density_back, pool)
+    f.swap_density()
+    divergence(f.velocity, f.divergence, pool)
+    f.divergence -= f.divergence.mean()
+    solver.solve(f.pressure, f.divergence, pool)
+    subtract_gradient(f.velocity, f.pressure, pool)
+
+
+def step_allocating(state, a, solver):
+    density, velocity, pressure, cells = state
+    density = advect(density, velocity, DT, cells)
+    velocity = advect(velocity, velocity, DT, cells)
+    density = diffuse(density, a, DIFFUSION_ITERATIONS)
+    div = divergence(velocity)
+    div -= div.mean()
+    solver.solve(pressure, div)
+    subtract_gradient(velocity, pressure)
+    return density, velocity, pressure, cells
+
+
+def main():
+    print(f"{'grid':>10} {'float64 ms':>10} {'float32 ms':>10} {'speedup':>7} {'max diff':>9} {'peak KB':>7} {'V-cycles':>8}")
+    for shape in SIZES:
+        a = DIFFUSION_RATE * DT * shape[0] * shape[1]
+        density, velocity = start_state(shape)
+
+        state = (density.copy(), velocity.copy(), np.zeros(shape), cell_grid(shape, np.float64))
+        old_solver = MultigridSolver()
+        state = step_allocating(state, a, old_solver)
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            state = step_allocating(state, a, old_solver)
+        old = (time.perf_counter() - start) / STEPS
+
+        f = FluidFields(shape)
+        f.density[:] = density
+        f.velocity[:] = velocity
+        pool = BandPool(dtype=f.dtype)
+        solver = MultigridSolver()
+        step_buffers(f, a, solver, pool)
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            step_buffers(f, a, solver, pool)
+        new = (time.perf_counter() - start) / STEPS
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        step_buffers(f, a, solver, pool)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        # Compare the same number of steps
+        state = step_allocating(state, a, old_solver)
+        diff = np.abs(f.density - state[0]).max()
+        grid = f"{shape[0]}x{shape[1]}"
+        print(f"{grid:>10} {old * 1e3:>10.1f} {new * 1e3:>10.1f} {old / new:>7.2f} {diff:>9.1e} {peak / 1024:>7.1f} {old_solver.last_iterations:>3} {solver.last_iterations:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Dense FluidScene step cost for different numbers of BandPool workers.
+
+Every grid size the scene offers is stepped from the same start with 1, 2
+and 4 workers and with one per core. The bands only change which thread
+computes a cell, never how, so the fields must come out bit-identical for
+every worker count; the benchmark stops with an error if they do not.
+
+Each row gives the time per step, the speedup over one worker, and how
+many bands the grid's rows actually split into. A band is at least
+BandPool.min_rows rows, so small grids get fewer bands than workers and
+the spare threads sit idle.
+
+Run from the repository root: python -m benchmarks.fluid_workers
+"""
+import os
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+import pygame
+from scenes.FluidScene import FluidScene
+
+FRAME = 0.016
+WARMUP = 2
+STEPS = 10
+
+
+def run(size, workers):
+    """Time STEPS dense updates at one grid size and worker count.
+
+    Returns ms per step, the number of row bands and the final fields.
+    """
+    scene = FluidScene()
+    scene.set_grid_size(size)
+    scene.set_workers(workers)
+    scene.tiles.dense_fraction = -1  # Step the whole grid, however quiet
+    nx, ny = size
+    scene.density[nx * 2 // 5:nx * 3 // 5, ny * 2 // 5:ny * 3 // 5] = 1
+    for _ in range(WARMUP):
+        scene.update(FRAME)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        scene.update(FRAME)
+    elapsed = (time.perf_counter() - start) / STEPS
+    bands = len(scene.pool.bands(nx))
+    scene.pool.shutdown()
+    return elapsed * 1e3, bands, (scene.density.copy(), scene.velocity.copy(), scene.pressure.copy())
+
+
+def main():
+    pygame.init()
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cores})
+    print(f"{cores} core(s); each cell is ms per step, speedup over 1 thread and bands the grid's rows split into")
+    print(f"{'grid':>9} " + " ".join(f"{f'{w} thread(s)':>20}" for w in counts))
+    for size in FluidScene().grid_sizes:
+        cells, reference = [], None
+        for workers in counts:
+            ms, bands, fields = run(size, workers)
+            if reference is None:
+                reference, single = fields, ms
+            for name, a, b in zip(("density", "velocity", "pressure"), reference, fields):
+                assert np.array_equal(a, b), f"{name} differs with {workers} workers at {size[0]}x{size[1]}"
+            cells.append(f"{ms:>7.2f} {single / ms:>5.2f}x {bands:>3}b")
+        grid = f"{size[0]}x{size[1]}"
+        print(f"{grid:>9} " + " ".join(f"{cell:>20}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
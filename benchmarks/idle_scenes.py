@@ -0,0 +1,101 @@
+"""Frame cost of soft-body scenes that have come to rest, with and without sleeping.
+
+Each body is dropped under each solver and run until all of its islands
+are asleep. Then update and render are timed separately over the same
+number of frames, with sleeping on and with it turned off. Bodies that do
+not settle within the frame limit are reported as such.
+
+The "two lattices" body is two unconnected pieces. After it settles one
+piece is woken before every timed frame, so the rows for it show what a
+partly asleep body costs: with sleeping on, the sleeping piece is left out
+of the step, the shape pull and the collision tests.
+
+Run from the repository root: python -m benchmarks.idle_scenes
+"""
+import math
+import os
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from engine.Mesh import Mesh
+from engine.SoftBody import SoftBody
+
+FRAME = 1 / 60
+SETTLE_FRAMES = 6000
+TIMED_FRAMES = 300
+
+
+def star(spacing):
+    outline = []
+    for k in range(10):
+        angle = math.pi * k / 5 - math.pi / 2
+        radius = 100 if k % 2 == 0 else 45
+        outline.append((radius * math.cos(angle), radius * math.sin(angle)))
+    return Mesh.from_polygon(outline, spacing)
+
+
+def two_lattices(size):
+    """Two size x size grids side by side with a gap, so two islands."""
+    left = Mesh.grid(0, 0, 100, 100, size, size)
+    right = Mesh.grid(150, 0, 100, 100, size, size)
+    count = len(left.vertices)
+    return Mesh(left.vertices + right.vertices, left.triangles + [tuple(i + count for i in t) for t in right.triangles])
+
+
+SCENES = (
+    ("lattice 20", 20, None),
+    ("lattice 50", 50, None),
+    ("star, 20 px", 5, star(20)),
+    ("star, 5 px", 5, star(5)),
+    ("two lattices", 5, two_lattices(50)),
+)
+SOLVERS = ("explicit", "xpbd", "implicit")
+
+
+def settle(body):
+    """Frames until every island sleeps, or None if that never happened."""
+    for frame in range(SETTLE_FRAMES):
+        body.update(FRAME)
+        if body.islands.all_asleep:
+            return frame + 1
+    return None
+
+
+def frame_cost(body, screen, keep_awake=None):
+    """Mean milliseconds of update and of render, waking island ``keep_awake`` before every frame if given."""
+    updating = rendering = 0.0
+    for _ in range(TIMED_FRAMES):
+        if keep_awake is not None:
+            body.islands.wake_island(keep_awake)
+        start = time.perf_counter()
+        body.update(FRAME)
+        updated = time.perf_counter()
+        screen.fill((255, 255, 255))
+        body.render(screen)
+        updating += updated - start
+        rendering += time.perf_counter() - updated
+    return updating / TIMED_FRAMES * 1000, rendering / TIMED_FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    print(f"{'scene':>12} {'solver':>8} {'particles':>9} {'asleep after':>12} {'sleeping':>8} {'update ms':>9} {'render ms':>9}")
+    for name, lattice, mesh in SCENES:
+        for solver in SOLVERS:
+            body = SoftBody(300, 150, 200, 200, 1.0, 0.05, lattice, [], 800, 600, mesh)
+            body.solver = solver
+            frames = settle(body)
+            if frames is None:
+                print(f"{name:>12} {solver:>8} {body.system.count:>9} {'never':>12}")
+                continue
+            # A body in pieces keeps its last one moving, so the rest is partly asleep
+            keep_awake = len(body.islands.asleep) - 1 if len(body.islands.asleep) > 1 else None
+            for sleeping in (True, False):
+                body.allow_sleep = sleeping
+                update, render = frame_cost(body, screen, keep_awake)
+                print(f"{name:>12} {solver:>8} {body.system.count:>9} {frames:>12} {'on' if sleeping else 'off':>8} {update:>9.3f} {render:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Frame cost and worst stretch of Rope as it grows to 10,000 links.
+
+Every rope hangs from one anchor with 1 pixel links, stiff enough that the
+top link of the longest rope stretches by a twentieth under the rope's
+weight. The end is first dragged once round a slow circle, a tenth of the
+rope's length across at most, and then let go to swing free. The table gives the mean time per
+frame and the mean substeps and tridiagonal solves each frame took. Worst
+stretch is the longest link over its rest length seen in any frame.
+
+The substeps grow with the tension at the top of the rope, since that sets
+how fast a sideways kink runs along it: about 12 for 1,000 links and 36
+for 10,000. No rope should stretch past what its own weight gives it, a
+twentieth for 10,000 links and much less for the rest. 1,000 links fit in
+a frame at 60 fps; 10,000 take 70 to 170 ms.
+
+Run from the repository root: python -m benchmarks.long_rope
+"""
+import math
+import time
+from engine.Rope import Rope
+
+LINKS = (10, 100, 1_000, 10_000)
+LENGTH = 1.0
+K = 1e5
+GRAVITY = 0.5
+FRAMES = 240
+RADIUS = 60  # Pixels, for ropes long enough
+
+
+def run(rope, drive):
+    """Mean milliseconds, substeps and solves per frame, and the worst stretch, over FRAMES frames."""
+    elapsed = substeps = solves = 0
+    worst = 1.0
+    for frame in range(FRAMES):
+        drive(frame)
+        start = time.perf_counter()
+        rope.step()
+        elapsed += time.perf_counter() - start
+        substeps += rope.last_substeps
+        solves += rope.last_iterations
+        worst = max(worst, rope.stretch())
+    return elapsed / FRAMES * 1000, substeps / FRAMES, solves / FRAMES, worst
+
+
+def main():
+    print(f"{'links':>6} {'motion':>6} {'ms':>8} {'substeps':>8} {'solves':>7} {'worst stretch':>13}")
+    for links in LINKS:
+        rope = Rope((400, 50), (1e9, 1e9), gravity=GRAVITY)
+        rope.add_links(links, LENGTH, K)
+        radius = min(RADIUS, links * LENGTH / 20)
+        end_x, end_y = rope.x[-1], rope.y[-1] - radius
+
+        def drag(frame):
+            angle = 2 * math.pi * frame / FRAMES
+            rope.hold(links, end_x + radius * math.sin(angle), end_y + radius * math.cos(angle))
+
+        def swing(frame):
+            rope.hold(None, 0, 0)
+
+        for name, drive in (("drag", drag), ("swing", swing)):
+            ms, substeps, solves, worst = run(rope, drive)
+            print(f"{links:>6} {name:>6} {ms:>8.3f} {substeps:>8.1f} {solves:>7.1f} {worst:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
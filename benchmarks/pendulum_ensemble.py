@@ -0,0 +1,43 @@
+"""Step cost per member of PendulumEnsemble as the ensemble grows.
+
+Every member is a copy of PendulumScene's three-link chain. The cost of one
+RK4 step is timed over a few frames, along with the point splat that draws
+the ensemble.
+
+Run from the repository root: python -m benchmarks.pendulum_ensemble
+"""
+import os
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+from engine.PendulumChain import PendulumChain
+from engine.PendulumEnsemble import PendulumEnsemble
+
+FRAME = 1 / 60
+STEPS = 20
+MEMBERS = (1, 10, 100, 1_000, 10_000, 100_000)
+COLORS = [(150, 180, 255), (75, 90, 255), (0, 0, 255)]
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+    chain = PendulumChain((400, 50))
+    for length, angle in ((200, 2.5), (160, 2.0), (120, 1.5)):
+        chain.add_link(length, 20, angle)
+    print(f"{'members':>8} {'step ms':>8} {'us per member':>13} {'draw ms':>8}")
+    for members in MEMBERS:
+        ensemble = PendulumEnsemble(chain, members, seed=0)
+        ensemble.step(FRAME)
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            ensemble.step(FRAME)
+        step = (time.perf_counter() - start) / STEPS
+        start = time.perf_counter()
+        ensemble.draw(screen, COLORS)
+        draw = time.perf_counter() - start
+        print(f"{members:>8} {step * 1e3:>8.3f} {step * 1e6 / members:>13.3f} {draw * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
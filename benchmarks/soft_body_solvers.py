@@ -0,0 +1,74 @@
+"""Cost per stable simulated second of the soft-body solvers.
+
+A lattice is given random velocities and run for a few seconds at 60
+frames per second. The explicit and implicit solvers are substepped
+(several updates per frame) and XPBD is given more substeps of its own until
+the run stays stable, meaning
+every position is finite and nothing ends up moving much faster than it
+started. The cost is the wall time of the cheapest stable setting divided
+by the simulated time.
+
+Run from the repository root: python -m benchmarks.soft_body_solvers
+"""
+import os
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import numpy as np
+from engine.SoftBody import SoftBody
+
+FRAME = 1 / 60
+SECONDS = 3.0
+SUBSTEPS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def make_body(lattice, stiffness, seed=0):
+    body = SoftBody(300, 150, 200, 200, 1.0, 0.05, lattice, [])
+    system = body.system
+    system.k *= stiffness
+    rng = np.random.default_rng(seed)
+    system.vx[:] = rng.normal(0, 50, system.count)
+    system.vy[:] = rng.normal(0, 50, system.count)
+    return body
+
+
+def run(body, solver, substeps):
+    """Wall seconds for SECONDS of simulation, or None if the run blew up."""
+    body.solver = solver
+    system = body.system
+    start_speed = np.hypot(system.vx, system.vy).max()
+    updates = 1 if solver == "xpbd" else substeps
+    body.xpbd.substeps = substeps
+    start = time.perf_counter()
+    with np.errstate(all="ignore"):
+        for _ in range(round(SECONDS / FRAME)):
+            for _ in range(updates):
+                body.update(FRAME / updates)
+    elapsed = time.perf_counter() - start
+    with np.errstate(all="ignore"):
+        speed = np.hypot(system.vx, system.vy).max()
+    stable = np.isfinite(system.x).all() and np.isfinite(system.y).all() and speed < 10 * start_speed
+    return elapsed if stable else None
+
+
+def cheapest(lattice, stiffness, solver):
+    for substeps in SUBSTEPS:
+        elapsed = run(make_body(lattice, stiffness), solver, substeps)
+        if elapsed is not None:
+            return substeps, elapsed / SECONDS
+    return None, None
+
+
+def main():
+    print(f"{'lattice':>7} {'stiffness':>9} {'solver':>8} {'substeps':>8} {'ms per second':>13}")
+    for lattice in (20, 50):
+        for stiffness in (1, 10, 100, 1000, 10000, 100000):
+            for solver in ("explicit", "xpbd", "implicit"):
+                substeps, cost = cheapest(lattice, stiffness, solver)
+                if cost is None:
+                    print(f"{lattice:>7} {stiffness:>9} {solver:>8} {'unstable':>8}")
+                else:
+                    print(f"{lattice:>7} {stiffness:>9} {solver:>8} {substeps:>8} {cost * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
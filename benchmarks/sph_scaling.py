@@ -0,0 +1,55 @@
+"""SPHFluid step and neighbour search cost as the particle count grows.
+
+Every fluid starts as the SPH scene's dam break: a block packed against
+the left wall at the scene's spacing. The box is made tall enough for the
+block to fit, so every count starts at the same depth per column. The
+block is left to fall for a few frames first, then a whole step and the
+neighbour search on its own are timed over the same frames.
+
+Run from the repository root: python -m benchmarks.sph_scaling
+"""
+import math
+import time
+import numpy as np
+from engine.SPHFluid import SPHFluid
+
+FRAME = 1 / 60
+SETTLE = 20
+STEPS = 10
+COUNTS = (1_000, 10_000, 50_000)
+WIDTH = 800
+SPACING = 3.3  # Same as SPHScene
+COLUMNS = int(WIDTH * 0.6 / SPACING)
+
+
+def dam_break(count):
+    rows = math.ceil(count / COLUMNS)
+    height = max(600, 2 * rows * SPACING)
+    row, column = np.divmod(np.arange(count), COLUMNS)
+    rng = np.random.default_rng(0)
+    vx, vy = rng.uniform(-5, 5, (2, count))
+    return SPHFluid.from_arrays(2 + column * SPACING, height - 1 - row * SPACING, (WIDTH, height), vx, vy)
+
+
+def main():
+    print(f"{'particles':>9} {'step ms':>8} {'us each':>8} {'search ms':>9} {'search share':>12} {'pairs each':>10}")
+    for count in COUNTS:
+        fluid = dam_break(count)
+        for _ in range(SETTLE):
+            fluid.step(FRAME)
+        step = search = 0.0
+        for _ in range(STEPS):
+            start = time.perf_counter()
+            fluid.step(FRAME)
+            step += time.perf_counter() - start
+            start = time.perf_counter()
+            fluid.find_neighbours()
+            search += time.perf_counter() - start
+        step /= STEPS
+        search /= STEPS
+        pairs = len(fluid.pairs[0]) / count
+        print(f"{count:>9} {step * 1e3:>8.2f} {step * 1e6 / count:>8.2f} {search * 1e3:>9.2f} {search / step:>12.0%} {pairs:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
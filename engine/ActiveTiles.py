@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class ActiveTiles:
+    """Tracks which fixed-size tiles of a fluid grid hold anything worth simulating.
+
+    A tile is active when its dye or velocity goes above a threshold. Active
+    tiles are grown by a halo, diagonals included, so fluid can flow into its
+    neighbours. What is left is cut into disjoint rectangular ``windows`` for
+    the solver: runs of active tiles along each row of tiles, with runs that
+    cover the same columns in consecutive rows merged into one. ``windows`` is
+    empty for a quiet grid and is the whole grid once the active share passes
+    ``dense_fraction``.
+    """
+
+    def __init__(self, shape, tile=8, halo=1, density_threshold=1 / 255, velocity_threshold=1e-3, dense_fraction=0.5):
+        self.shape = shape
+        self.tile = tile
+        self.halo = halo
+        self.density_threshold = density_threshold
+        self.velocity_threshold = velocity_threshold
+        self.dense_fraction = dense_fraction
+        self.starts = (np.arange(0, shape[0], tile), np.arange(0, shape[1], tile))
+        tiles = (len(self.starts[0]), len(self.starts[1]))
+        self.mask = np.ones(tiles, dtype=bool)
+        # Scratch, so tracking does not allocate every frame
+        self.scratch = np.empty(shape, np.float32)
+        self.rows = np.empty((tiles[0], shape[1]), np.float32)
+        self.tile_values = np.empty(tiles, np.float32)
+        self.hot = np.empty(tiles, dtype=bool)
+        self.grown = np.empty(tiles, dtype=bool)
+        self.full_window = (slice(0, shape[0]), slice(0, shape[1]))
+        self.windows = [self.full_window]
+        self.dense = True
+
+    def tile_max(self, field):
+        """Largest absolute value in every tile; the last row and column of tiles may be partial."""
+        np.abs(field, out=self.scratch)
+        np.maximum.reduceat(self.scratch, self.starts[0], axis=0, out=self.rows)
+        return np.maximum.reduceat(self.rows, self.starts[1], axis=1, out=self.tile_values)
+
+    def update(self, density, velocity):
+        mask, hot = self.mask, self.hot
+        np.greater(self.tile_max(density), self.density_threshold, out=mask)
+        for component in (0, 1):
+            np.greater(self.tile_max(velocity[..., component]), self.velocity_threshold, out=hot)
+            mask |= hot
+        grown = self.grown
+        for _ in range(self.halo):
+            # Grow along x, then along y from that, so the halo is square
+            np.copyto(grown, mask)
+            grown[1:] |= mask[:-1]
+            grown[:-1] |= mask[1:]
+            np.copyto(mask, grown)
+            # Column shifts go through contiguous scratch; |= on the strided
+            # views would have NumPy allocate buffers for them
+            hot[:, 1:] = grown[:, :-1]
+            hot[:, 0] = False
+            mask |= hot
+            hot[:, :-1] = grown[:, 1:]
+            hot[:, -1] = False
+            mask |= hot
+
+        self.dense = np.count_nonzero(mask) > self.dense_fraction * mask.size
+        if self.dense:
+            self.windows = [self.full_window]
+        else:
+            self.windows = [self.cells(*rect) for rect in self.rects(mask)]
+        return self.windows
+
+    def rects(self, mask):
+        """Disjoint rectangles of active tiles, as (first row, stop row, first column, stop column)."""
+        rects = []
+        open_runs = {}  # (first column, stop column) -> row the run started on
+        for row in range(mask.shape[0] + 1):
+            runs = set()
+            if row < mask.shape[0]:
+                # Run edges are where the row changes value, padded with quiet tiles
+                edges = np.flatnonzero(np.diff(mask[row], prepend=False, append=False)).tolist()
+                runs = set(zip(edges[::2], edges[1::2]))
+            for run in [run for run in open_runs if run not in runs]:
+                rects.append((open_runs.pop(run), row) + run)
+            for run in runs:
+                open_runs.setdefault(run, row)
+        return rects
+
+    def cells(self, row0, row1, col0, col1):
+        """The window of grid cells covered by a rectangle of tiles."""
+        return (
+            slice(row0 * self.tile, min(row1 * self.tile, self.shape[0])),
+            slice(col0 * self.tile, min(col1 * self.tile, self.shape[1])),
+        )
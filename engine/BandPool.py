@@ -0,0 +1,64 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class Workspace:
+    """Named scratch buffers, allocated on first use and handed out as views after that."""
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=None):
+        dtype = dtype or self.dtype
+        size = math.prod(shape)
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.size < size or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(size, dtype)
+        return buffer[:size].reshape(shape)
+
+    def reserve(self, name, shape, dtype=None):
+        """Make room for ``shape`` up front, so smaller requests for ``name`` never reallocate."""
+        self.get(name, shape, dtype)
+
+
+class BandPool:
+    """Runs grid kernels over bands of rows on a thread pool.
+
+    NumPy drops the GIL inside large ufuncs, so bands of a big grid really do
+    run side by side. A kernel passed to run() is called as
+    ``fn(ws, lo, hi, *args)`` for every band and must only write rows lo..hi-1;
+    it may read the rows around its band, which is how halo rows get shared
+    between passes. run() returns once every band is done, so each call is a
+    barrier. Every band gets its own Workspace; ``shared`` holds whole-grid
+    buffers that the bands fill in row by row.
+    """
+
+    def __init__(self, workers=1, min_rows=32, dtype=np.float32):
+        self.workers = max(1, workers)
+        self.min_rows = min_rows  # Smaller bands cost more in overhead than they save
+        self.dtype = dtype
+        self.executor = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+        self.workspaces = [Workspace(dtype) for _ in range(self.workers)]
+        self.shared = Workspace(dtype)
+        self._bands = {}
+
+    def bands(self, rows):
+        bands = self._bands.get(rows)
+        if bands is None:
+            count = max(1, min(self.workers, rows // self.min_rows))
+            edges = [rows * k // count for k in range(count + 1)]
+            bands = self._bands[rows] = list(zip(edges[:-1], edges[1:]))
+        return bands
+
+    def run(self, fn, rows, *args):
+        bands = self.bands(rows)
+        if self.executor is None or len(bands) == 1:
+            return [fn(self.workspaces[k], lo, hi, *args) for k, (lo, hi) in enumerate(bands)]
+        futures = [self.executor.submit(fn, self.workspaces[k], lo, hi, *args) for k, (lo, hi) in enumerate(bands)]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,91 @@
+from bisect import bisect_right
+from .ParticleSystem import np
+
+
+class SweepAndPrune:
+    """Pairs soft-body springs with the polygons whose bounding boxes they overlap.
+
+    Spring boxes are sorted by their left edge, so each polygon only has to
+    look at the prefix of springs that start left of its right edge. The sort
+    order is kept between frames and mostly still holds, which makes the
+    re-sort cheap. ``candidate_pairs`` and ``possible_pairs`` describe the last
+    query, for checking how much the exact segment tests are being culled.
+
+    Polygon boxes are grown by ``margin`` pixels. Collision responses nudge
+    particles while the pairs are being worked through, and the margin keeps
+    a spring that was nudged up to a polygon among its candidates.
+    """
+
+    def __init__(self, margin=2.0):
+        self.margin = margin
+        self.order = None
+        self.candidate_pairs = 0
+        self.possible_pairs = 0
+
+    def pairs(self, system, polygons, springs=None):
+        """(spring index, polygon) for every overlapping box, in spring order then polygon order.
+
+        ``springs`` limits the search to those spring indices, in increasing order.
+        """
+        self.possible_pairs = system.spring_count * len(polygons)
+        if not polygons or not system.spring_count:
+            self.candidate_pairs = 0
+            return []
+        if system.vectorized:
+            found = self.vectorized_pairs(system, polygons, springs)
+        else:
+            found = self.scalar_pairs(system, polygons, springs)
+        self.candidate_pairs = len(found)
+        return found
+
+    def padded_box(self, polygon):
+        left, top, right, bottom = polygon.bounding_box()
+        m = self.margin
+        return left - m, top - m, right + m, bottom + m
+
+    def vectorized_pairs(self, system, polygons, springs=None):
+        a, b = system.spring_a, system.spring_b
+        if springs is not None:
+            a, b = a[springs], b[springs]
+        xa, xb = system.x[a], system.x[b]
+        ya, yb = system.y[a], system.y[b]
+        left, right = np.minimum(xa, xb), np.maximum(xa, xb)
+        top, bottom = np.minimum(ya, yb), np.maximum(ya, yb)
+        if self.order is None or len(self.order) != len(left):
+            self.order = np.argsort(left, kind="stable")
+        else:
+            self.order = self.order[np.argsort(left[self.order], kind="stable")]
+        order = self.order
+        starts = left[order]
+
+        found, owners = [], []
+        for p, polygon in enumerate(polygons):
+            box_left, box_top, box_right, box_bottom = self.padded_box(polygon)
+            near = order[:np.searchsorted(starts, box_right, "right")]
+            near = near[(right[near] >= box_left) & (top[near] <= box_bottom) & (bottom[near] >= box_top)]
+            found.append(near)
+            owners.append(np.full(len(near), p))
+        found = np.concatenate(found)
+        owners = np.concatenate(owners)
+        if springs is not None:
+            found = springs[found]
+        ranked = np.lexsort((owners, found))
+        return [(s, polygons[p]) for s, p in zip(found[ranked].tolist(), owners[ranked].tolist())]
+
+    def scalar_pairs(self, system, polygons, springs=None):
+        x, y = system.x, system.y
+        boxes = []
+        for s in range(system.spring_count) if springs is None else springs:
+            a, b = system.spring_a[s], system.spring_b[s]
+            boxes.append((min(x[a], x[b]), max(x[a], x[b]), min(y[a], y[b]), max(y[a], y[b]), s))
+        boxes.sort()
+        starts = [box[0] for box in boxes]
+
+        found = []
+        for p, polygon in enumerate(polygons):
+            box_left, box_top, box_right, box_bottom = self.padded_box(polygon)
+            for _, right, top, bottom, s in boxes[:bisect_right(starts, box_right)]:
+                if right >= box_left and top <= box_bottom and bottom >= box_top:
+                    found.append((s, p))
+        found.sort()
+        return [(s, polygons[p]) for s, p in found]
@@ -0,0 +1,185 @@
+import math
+from array import array
+
+# Pure-Python fluid for builds without NumPy, such as the browser one. It runs
+# the same scheme as the NumPy kernels (semi-Lagrangian advection, Jacobi
+# diffusion, pressure projection with zero-flux walls) on a small grid.
+# Fields are flat array('f') buffers indexed i * ny + j, so cell [i, j] lines
+# up with the NumPy fields. Neighbour indices are worked out once, and the
+# loops only touch floats and ints, so a step allocates no per-cell objects.
+
+
+class CompactFluid:
+    def __init__(self, shape, diffusion_rate=0.0003, diffusion_iterations=2, pressure_iterations=10, velocity_decay=1.0):
+        self.shape = nx, ny = tuple(shape)
+        self.size = n = nx * ny
+        self.diffusion_rate = diffusion_rate  # Domain widths squared per second
+        self.diffusion_iterations = diffusion_iterations
+        self.pressure_iterations = pressure_iterations  # SOR sweeps, warm started from last frame
+        self.relaxation = 2 / (1 + math.sin(math.pi / max(nx, ny)))
+        self.velocity_decay = velocity_decay
+
+        zeros = array("f", bytes(4 * n))
+        self.density = array("f", zeros)
+        self.density_back = array("f", zeros)
+        self.density_scratch = array("f", zeros)
+        self.u = array("f", zeros)  # x component of the velocity
+        self.v = array("f", zeros)  # y component
+        self.u_back = array("f", zeros)
+        self.v_back = array("f", zeros)
+        self.pressure = array("f", zeros)
+        self.divergence = array("f", zeros)
+
+        # Neighbour tables; a neighbour off the grid is the cell itself, which makes the walls zero-flux
+        self.left = array("i", (k - ny if k >= ny else k for k in range(n)))
+        self.right = array("i", (k + ny if k < n - ny else k for k in range(n)))
+        self.down = array("i", (k - 1 if k % ny else k for k in range(n)))
+        self.up = array("i", (k + 1 if k % ny != ny - 1 else k for k in range(n)))
+        self.x_walls = array("i", list(range(ny)) + list(range(n - ny, n)))
+        self.y_walls = array("i", [k for k in range(n) if k % ny in (0, ny - 1)])
+        # Byte offset of every cell in an RGB image that is nx pixels wide
+        self.pixel_offsets = array("i", ((j * nx + i) * 3 for i in range(nx) for j in range(ny)))
+
+        # Start off swirling like the NumPy scene, with a velocity ramp across the grid
+        for i in range(nx):
+            for j in range(ny):
+                self.u[i * ny + j] = -0.5 + j / max(ny - 1, 1)
+                self.v[i * ny + j] = -0.5 + i / max(nx - 1, 1)
+
+    def add_impulse(self, i, j, density, push):
+        k = i * self.shape[1] + j
+        self.density[k] += density
+        self.v[k] += push
+
+    def step(self, dt):
+        self.advect(dt)
+        self.diffuse(dt)
+        self.set_boundaries()
+        self.project()
+        self.set_boundaries()
+        self.decay()
+
+    def advect(self, dt):
+        """Backtrace every cell and sample density and velocity there, all three fields in one pass."""
+        nx, ny = self.shape
+        d, u, v = self.density, self.u, self.v
+        d_out, u_out, v_out = self.density_back, self.u_back, self.v_back
+        sx, sy = dt * nx, dt * ny
+        x_max, y_max = nx - 1, ny - 1
+        i_max, j_max = max(nx - 2, 0), max(ny - 2, 0)
+        k = 0
+        for i in range(nx):
+            for j in range(ny):
+                x = i - u[k] * sx
+                y = j - v[k] * sy
+                if x < 0:
+                    x = 0.0
+                elif x > x_max:
+                    x = x_max
+                if y < 0:
+                    y = 0.0
+                elif y > y_max:
+                    y = y_max
+                i0 = int(x)
+                j0 = int(y)
+                if i0 > i_max:
+                    i0 = i_max
+                if j0 > j_max:
+                    j0 = j_max
+                fx = x - i0
+                fy = y - j0
+                a = i0 * ny + j0
+                c = a + ny
+                top = d[a] + (d[a + 1] - d[a]) * fy
+                bottom = d[c] + (d[c + 1] - d[c]) * fy
+                d_out[k] = top + (bottom - top) * fx
+                top = u[a] + (u[a + 1] - u[a]) * fy
+                bottom = u[c] + (u[c + 1] - u[c]) * fy
+                u_out[k] = top + (bottom - top) * fx
+                top = v[a] + (v[a + 1] - v[a]) * fy
+                bottom = v[c] + (v[c + 1] - v[c]) * fy
+                v_out[k] = top + (bottom - top) * fx
+                k += 1
+        self.density, self.density_back = d_out, d
+        self.u, self.u_back = u_out, u
+        self.v, self.v_back = v_out, v
+
+    def diffuse(self, dt):
+        """Implicit diffusion of the dye with Jacobi sweeps."""
+        nx, ny = self.shape
+        a = self.diffusion_rate * dt * nx * ny
+        scale = 1 / (1 + 4 * a)
+        source = self.density
+        x, out, spare = source, self.density_back, self.density_scratch
+        left, right, down, up = self.left, self.right, self.down, self.up
+        cells = range(self.size)
+        for _ in range(self.diffusion_iterations):
+            for k in cells:
+                out[k] = (source[k] + a * (x[left[k]] + x[right[k]] + x[down[k]] + x[up[k]])) * scale
+            # Every sweep reads the source, so the iterates ping-pong between the other two buffers
+            if x is source:
+                x, out = out, spare
+            else:
+                x, out = out, x
+        if x is not source:
+            self.density, self.density_back, self.density_scratch = x, source, out
+
+    def project(self):
+        """Remove the divergent part of the velocity with a few SOR pressure sweeps."""
+        nx, ny = self.shape
+        u, v, p, div = self.u, self.v, self.pressure, self.divergence
+        left, right, down, up = self.left, self.right, self.down, self.up
+        cells = range(self.size)
+        hx, hy = nx / 2, ny / 2
+        total = 0.0
+        for k in cells:
+            value = (u[right[k]] - u[left[k]]) * hx + (v[up[k]] - v[down[k]]) * hy
+            div[k] = value
+            total += value
+        # The walls make the pressure equation singular, only a zero-mean source is solvable
+        mean = total / self.size
+        for k in cells:
+            div[k] -= mean
+        w = self.relaxation
+        for _ in range(self.pressure_iterations):
+            for k in cells:
+                value = p[k]
+                p[k] = value + w * ((p[left[k]] + p[right[k]] + p[down[k]] + p[up[k]] - div[k]) * 0.25 - value)
+        gx, gy = 1 / (2 * nx), 1 / (2 * ny)
+        for k in cells:
+            u[k] -= (p[right[k]] - p[left[k]]) * gx
+            v[k] -= (p[up[k]] - p[down[k]]) * gy
+
+    def set_boundaries(self):
+        u, v = self.u, self.v
+        for k in self.x_walls:
+            u[k] = 0.0
+        for k in self.y_walls:
+            v[k] = 0.0
+
+    def decay(self):
+        d, u, v = self.density, self.u, self.v
+        decay = self.velocity_decay
+        for k in range(self.size):
+            d[k] *= 0.99
+            u[k] *= decay
+            v[k] *= decay
+
+    def paint(self, pixels, max_speed=1.0):
+        """Write speed colours plus dye into an RGB bytearray, one pixel per cell."""
+        d, u, v = self.density, self.u, self.v
+        offsets = self.pixel_offsets
+        scale = 255 / max_speed
+        for k in range(self.size):
+            speed = (u[k] * u[k] + v[k] * v[k]) ** 0.5 * scale
+            if speed > 255:
+                speed = 255
+            dye = d[k] * 255
+            if dye < 0:
+                dye = 0
+            red = speed + dye
+            blue = 255 - speed + dye
+            o = offsets[k]
+            pixels[o] = 255 if red > 255 else int(red)
+            pixels[o + 2] = 255 if blue > 255 else int(blue)
+        return pixels
@@ -0,0 +1,104 @@
+import math
+
+# The Dormand-Prince 5(4) embedded Runge-Kutta pair (Dormand and Prince
+# 1980), for states kept as flat lists of floats. Every step makes a fifth
+# order solution and a fourth order one from the same seven derivative
+# evaluations, the last of which is reused as the first of the next step.
+# Their difference estimates the error, which sets the size of the next
+# step and rejects steps that missed the tolerance. Between steps, the
+# state at any time comes from the pair's fourth order dense output
+# (Hairer, Norsett and Wanner, Solving Ordinary Differential Equations I,
+# section II.6), so a caller can step well past the times it needs and
+# still read the state at each of them.
+
+A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Fifth order weights minus fourth order weights
+E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+# Weights of the dense output's last term
+D = (-12715105075 / 11282082432, 0.0, 87487479700 / 32700410799, -10690763975 / 1880347072,
+     701980252875 / 199316789632, -1453857185 / 822651844, 69997945 / 29380423)
+
+
+def combine(base, h, weights, vectors):
+    """base + h * sum(weights[i] * vectors[i]), element by element."""
+    total = base
+    for weight, vector in zip(weights, vectors):
+        if weight:
+            scale = h * weight
+            total = [t + scale * v for t, v in zip(total, vector)]
+    return total
+
+
+class DormandPrince:
+    def __init__(self, derivative, t, state, rtol=1e-6, atol=1e-9):
+        self.derivative = derivative  # State to its time derivative, both lists
+        self.rtol = rtol
+        self.atol = atol
+        self.t = t  # End of the last accepted step
+        self.state = list(state)
+        self.slope = derivative(self.state)
+        self.evaluations = 1
+        self.accepted = 0
+        self.rejected = 0
+        self.dense = None  # (start, length, coefficients) of the last accepted step
+        self.last_norm = 1e-4  # Error norm of the last accepted step, for the step size controller
+        # First step: about a hundredth of the time the state takes to change by its own size
+        scale = [atol + rtol * abs(y) for y in self.state]
+        size = self.norm(self.state, scale)
+        speed = self.norm(self.slope, scale)
+        self.h = 0.01 * size / speed if size > 1e-5 and speed > 1e-5 else 1e-6
+
+    @staticmethod
+    def norm(values, scale):
+        return math.sqrt(sum((v / s) ** 2 for v, s in zip(values, scale)) / max(len(values), 1))
+
+    def step(self):
+        """Take one accepted step, shrinking the step size and trying again as often as the error needs."""
+        y0, k1, h = self.state, self.slope, self.h
+        while True:
+            stages = [k1]
+            for i in range(1, 7):
+                stage = combine(y0, h, A[i], stages)
+                stages.append(self.derivative(stage))
+            self.evaluations += 6
+            # The seventh stage point is the fifth order solution
+            y1 = stage
+            error = combine([0.0] * len(y0), h, E, stages)
+            scale = [self.atol + self.rtol * max(abs(a), abs(b)) for a, b in zip(y0, y1)]
+            norm = max(self.norm(error, scale), 1e-10)
+            if norm <= 1.0:
+                # Proportional-integral control: leaning on the last error as well keeps the size from overshooting
+                factor = min(10.0, max(0.2, 0.9 * norm ** -0.17 * self.last_norm ** 0.04))
+                self.last_norm = max(norm, 1e-4)
+                break
+            self.rejected += 1
+            h *= max(0.2, 0.9 * norm ** -0.2)
+
+        k7 = stages[6]
+        change = [b - a for a, b in zip(y0, y1)]
+        bend = [h * k - c for k, c in zip(k1, change)]
+        twist = [c - h * k - b for c, k, b in zip(change, k7, bend)]
+        last = combine([0.0] * len(y0), h, D, stages)
+        self.dense = (self.t, h, (y0, change, bend, twist, last))
+        self.t += h
+        self.state = y1
+        self.slope = k7
+        self.accepted += 1
+        self.h = h * factor
+
+    def state_at(self, t):
+        """The state at time ``t``, stepping on as far as needed. ``t`` must not be before the last step's start."""
+        while self.dense is None or t > self.t:
+            self.step()
+        start, h, (y0, change, bend, twist, last) = self.dense
+        theta = (t - start) / h
+        rest = 1 - theta
+        return [a + theta * (b + rest * (c + theta * (d + rest * e))) for a, b, c, d, e in zip(y0, change, bend, twist, last)]
@@ -0,0 +1,35 @@
+import numpy as np
+from .FluidKernels import cell_grid
+
+
+class FluidFields:
+    """Preallocated float32 storage for the fluid grid.
+
+    Density and velocity each have a front buffer holding the current state and
+    a back buffer the solver writes the next state into. Swapping exchanges the
+    two by reference, so a full-grid step never copies a field. Scratch space
+    for the kernels lives in the BandPool that runs them.
+    """
+    dtype = np.float32
+
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self.density = np.zeros(self.shape, self.dtype)
+        self.density_back = np.zeros_like(self.density)
+        self.velocity = np.zeros(self.shape + (2,), self.dtype)
+        self.velocity_back = np.zeros_like(self.velocity)
+        self.pressure = np.zeros(self.shape, self.dtype)
+        self.divergence = np.zeros(self.shape, self.dtype)
+        self.cells = cell_grid(self.shape, self.dtype)
+
+    def swap_density(self):
+        self.density, self.density_back = self.density_back, self.density
+
+    def swap_velocity(self):
+        self.velocity, self.velocity_back = self.velocity_back, self.velocity
+
+    def nbytes(self):
+        """Memory held by the fields."""
+        arrays = [self.density, self.density_back, self.velocity, self.velocity_back, self.pressure, self.divergence]
+        arrays += self.cells
+        return sum(a.nbytes for a in arrays)
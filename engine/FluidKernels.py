@@ -0,0 +1,271 @@
+import numpy as np
+from .BandPool import BandPool, Workspace
+
+# Array kernels for the grid fluid. Fields are indexed [i, j] with i along x
+# and j along y, vector fields carry (x, y) components in the last axis.
+#
+# Kernels write into ``out`` and take their temporaries from a Workspace, so a
+# solver that keeps both around does not allocate once it is running. Both
+# are optional for one-off calls. The whole-grid kernels split their rows
+# over a BandPool; every cell is computed the same way whatever band it lands
+# in, so the result does not depend on the number of workers.
+
+
+def cell_grid(shape, dtype=np.float32):
+    """Integer cell coordinates for a grid of the given (nx, ny) shape."""
+    return np.meshgrid(np.arange(shape[0], dtype=dtype), np.arange(shape[1], dtype=dtype), indexing="ij")
+
+
+def sample_bilinear(field, x, y, out=None, ws=None):
+    """Sample a scalar or vector field at fractional cell coordinates.
+
+    ``x`` and ``y`` are clipped to the grid in place.
+    """
+    ws = ws or Workspace(field.dtype)
+    nx, ny = field.shape[:2]
+    shape = x.shape
+    vector_shape = shape + field.shape[2:]
+    if out is None:
+        out = np.empty(vector_shape, field.dtype)
+
+    np.clip(x, 0, nx - 1, out=x)
+    np.clip(y, 0, ny - 1, out=y)
+    # Corner cell, kept one short of the far edge so the +1 neighbour exists
+    i0 = ws.get("i0", shape)
+    j0 = ws.get("j0", shape)
+    np.floor(x, out=i0)
+    np.floor(y, out=j0)
+    np.minimum(i0, max(nx - 2, 0), out=i0)
+    np.minimum(j0, max(ny - 2, 0), out=j0)
+    sx = ws.get("sx", shape)
+    sy = ws.get("sy", shape)
+    np.subtract(x, i0, out=sx)
+    np.subtract(y, j0, out=sy)
+    # The corners go into integer scratch by plain copies; a ufunc that casts
+    # as it writes would have NumPy buffer the cast
+    index = ws.get("index", shape, np.intp)
+    column = ws.get("column", shape, np.intp)
+    np.copyto(index, i0, casting="unsafe")
+    np.copyto(column, j0, casting="unsafe")
+    index *= ny
+    index += column
+    if field.ndim == 3:
+        # Weights repeated for every component, which is cheaper than broadcasting them
+        sx = spread(sx, ws.get("sx_vector", vector_shape))
+        sy = spread(sy, ws.get("sy_vector", vector_shape))
+
+    flat = field.reshape((nx * ny,) + field.shape[2:])
+    top = ws.get("top", vector_shape)
+    bottom = ws.get("bottom", vector_shape)
+    corner = ws.get("corner", vector_shape)
+    np.take(flat, index, axis=0, out=top, mode="clip")
+    index += 1
+    np.take(flat, index, axis=0, out=corner, mode="clip")
+    corner -= top
+    corner *= sy
+    top += corner
+    index += ny
+    np.take(flat, index, axis=0, out=corner, mode="clip")
+    index -= 1
+    np.take(flat, index, axis=0, out=bottom, mode="clip")
+    corner -= bottom
+    corner *= sy
+    bottom += corner
+    bottom -= top
+    bottom *= sx
+    return np.add(top, bottom, out=out)
+
+
+def spread(weights, out):
+    """Copy a scalar field into every component of ``out``."""
+    for k in range(out.shape[-1]):
+        out[..., k] = weights
+    return out
+
+
+def advect(field, velocity, dt, cells, out=None, pool=None):
+    """Semi-Lagrangian advection: backtrace cells and resample the field there.
+
+    ``velocity`` and ``cells`` cover the cells being updated, which can be a
+    window of the grid; ``field`` is always the whole grid. Velocities are in
+    domain widths per second, so a unit velocity crosses the grid in one second
+    whatever the resolution.
+    """
+    pool = pool or BandPool(dtype=field.dtype)
+    if out is None:
+        out = np.empty(cells[0].shape + field.shape[2:], field.dtype)
+    nx, ny = field.shape[:2]
+
+    def band(ws, lo, hi):
+        shape = cells[0][lo:hi].shape
+        # Windows are strided views of the grid; arithmetic on them would make
+        # NumPy buffer every operand, so they are copied into scratch first
+        x = ws.get("x", shape)
+        y = ws.get("y", shape)
+        start = ws.get("start", shape)
+        for backtrace, component, cell, scale in ((x, 0, cells[0], -dt * nx), (y, 1, cells[1], -dt * ny)):
+            np.copyto(backtrace, velocity[lo:hi, :, component])
+            backtrace *= scale
+            np.copyto(start, cell[lo:hi])
+            backtrace += start
+        if out[lo:hi].flags.c_contiguous:
+            sample_bilinear(field, x, y, out[lo:hi], ws)
+        else:
+            np.copyto(out[lo:hi], sample_bilinear(field, x, y, ws.get("sample", shape + field.shape[2:]), ws))
+
+    pool.run(band, out.shape[0])
+    return out
+
+
+def neighbour_sum(x, out, lo=0, hi=None, ws=None):
+    """Sum of the four neighbours of every cell in rows lo..hi-1, written into ``out``.
+
+    Walls are zero-flux: a neighbour that falls off the grid is replaced by the
+    cell itself, which keeps the boundary handling to a few edge slices. The
+    rows either side of the band are read, not written. The neighbours along a
+    row are shifted into contiguous scratch before they are added, since
+    adding the shifted views directly makes NumPy buffer them.
+    """
+    ws = ws or Workspace(x.dtype)
+    nx = x.shape[0]
+    hi = nx if hi is None else hi
+    o = out[lo:hi]
+    band = x[lo:hi]
+    if lo == 0:
+        o[1:] = x[:hi - 1]
+        o[0] = x[0]
+    else:
+        o[:] = x[lo - 1:hi - 1]
+    if hi == nx:
+        o[:-1] += x[lo + 1:]
+        o[-1] += x[-1]
+    else:
+        o += x[lo + 1:hi + 1]
+    shifted = ws.get("neighbours", band.shape)
+    shifted[:, 1:] = band[:, :-1]
+    shifted[:, 0] = band[:, 0]
+    o += shifted
+    shifted[:, :-1] = band[:, 1:]
+    shifted[:, -1] = band[:, -1]
+    o += shifted
+    return out
+
+
+def diffuse(field, a, iterations, out=None, pool=None, fixed=(False, False, False, False)):
+    """Implicit diffusion step, solving (1 - a * laplacian) x = field with Jacobi sweeps.
+
+    ``a`` is the diffusion rate times dt in cell units. The backward step is
+    stable for any ``a``, a larger rate only needs more sweeps to converge.
+    ``fixed`` flags the first row, last row, first column and last column of
+    ``field`` that are held at their input values instead of diffusing. That
+    is how a window of a bigger grid sees its real neighbours: pass the window
+    grown by one cell and hold every grown edge. Edges that are not held are
+    zero-flux walls.
+    """
+    pool = pool or BandPool(dtype=field.dtype)
+    if out is None:
+        out = np.empty_like(field)
+    first_row, last_row, first_col, last_col = fixed
+    nx = field.shape[0]
+
+    def sweep(ws, lo, hi, x, s):
+        neighbour_sum(x, s, lo, hi, ws)
+        s = s[lo:hi]
+        s *= a
+        s += field[lo:hi]
+        s /= 1 + 4 * a
+        if first_col:
+            s[:, 0] = field[lo:hi, 0]
+        if last_col:
+            s[:, -1] = field[lo:hi, -1]
+        if first_row and lo == 0:
+            s[0] = field[0]
+        if last_row and hi == nx:
+            s[-1] = field[-1]
+
+    x = out
+    s = pool.shared.get("diffuse", field.shape)
+    np.copyto(x, field)
+    for _ in range(iterations):
+        pool.run(sweep, nx, x, s)
+        x, s = s, x
+    if x is not out:
+        np.copyto(out, x)
+    return out
+
+
+def central_difference(a, out):
+    """a[:, j + 1] - a[:, j - 1] into out[:, j] for the inner columns; the first and last are left to the caller.
+
+    Both arrays must be C-contiguous. The difference is taken over their flat
+    views, which NumPy runs in one pass where the column slices would make it
+    buffer. Cells that straddle two rows come out wrong, but those are
+    exactly the first and last columns.
+    """
+    flat = a.reshape(-1)
+    np.subtract(flat[2:], flat[:-2], out=out.reshape(-1)[1:-1])
+    return out
+
+
+def divergence(velocity, out=None, pool=None):
+    """Central-difference divergence of the velocity field, in cells per second."""
+    pool = pool or BandPool(dtype=velocity.dtype)
+    nx, ny = velocity.shape[:2]
+    if out is None:
+        out = np.empty((nx, ny), velocity.dtype)
+    u = velocity[..., 0]
+    v = velocity[..., 1]
+
+    def band(ws, lo, hi):
+        first, last = max(lo, 1), min(hi, nx - 1)
+        np.subtract(u[first + 1:last + 1], u[first - 1:last - 1], out=out[first:last])
+        if lo == 0:
+            np.subtract(u[1], u[0], out=out[0])
+        if hi == nx:
+            np.subtract(u[-1], u[-2], out=out[-1])
+        out[lo:hi] *= nx / 2
+        s = ws.get("divergence", (hi - lo, ny))
+        band = ws.get("v", (hi - lo, ny))
+        np.copyto(band, v[lo:hi])
+        central_difference(band, s)
+        np.subtract(band[:, 1], band[:, 0], out=s[:, 0])
+        np.subtract(band[:, -1], band[:, -2], out=s[:, -1])
+        s *= ny / 2
+        out[lo:hi] += s
+
+    pool.run(band, nx)
+    return out
+
+
+def subtract_gradient(velocity, p, pool=None):
+    """Remove the pressure gradient from the velocity field in place."""
+    pool = pool or BandPool(dtype=velocity.dtype)
+    nx, ny = velocity.shape[:2]
+
+    def band(ws, lo, hi):
+        s = ws.get("gradient", (hi - lo, ny))
+        first, last = max(lo, 1), min(hi, nx - 1)
+        np.subtract(p[first + 1:last + 1], p[first - 1:last - 1], out=s[first - lo:last - lo])
+        if lo == 0:
+            np.subtract(p[1], p[0], out=s[0])
+        if hi == nx:
+            np.subtract(p[-1], p[-2], out=s[-1])
+        s *= 1 / (2 * nx)
+        velocity[lo:hi, :, 0] -= s
+        central_difference(p[lo:hi], s)
+        np.subtract(p[lo:hi, 1], p[lo:hi, 0], out=s[:, 0])
+        np.subtract(p[lo:hi, -1], p[lo:hi, -2], out=s[:, -1])
+        s *= 1 / (2 * ny)
+        velocity[lo:hi, :, 1] -= s
+
+    pool.run(band, nx)
+    return velocity
+
+
+def resample(field, shape):
+    """Bilinearly resample a field onto a grid of another shape covering the same domain."""
+    nx, ny = field.shape[:2]
+    x, y = cell_grid(shape, field.dtype)
+    x = (x + 0.5) * (nx / shape[0]) - 0.5
+    y = (y + 0.5) * (ny / shape[1]) - 0.5
+    return sample_bilinear(field, x, y)
@@ -0,0 +1,41 @@
+class FrameBudgetGovernor:
+    """Steps through a ladder of quality levels to hold a target frame time.
+
+    Feed it the measured cost of each frame with record(). It keeps a moving
+    average and returns a new level index when the average leaves the budget,
+    or None when the current level should stay.
+    """
+
+    def __init__(self, target_frame_time, costs, level, smoothing=0.1, cooldown=30, headroom=0.8):
+        self.target_frame_time = target_frame_time
+        self.costs = costs  # Relative cost of each level, cheapest first
+        self.level = level
+        self.smoothing = smoothing
+        self.cooldown = cooldown  # Frames to wait after a change before judging again
+        self.headroom = headroom  # Only step up if the next level would fit in this share of the budget
+        self.average = None
+        self.frames_since_change = 0
+
+    def record(self, frame_time):
+        if self.average is None:
+            self.average = frame_time
+        else:
+            self.average += self.smoothing * (frame_time - self.average)
+        self.frames_since_change += 1
+        if self.frames_since_change < self.cooldown:
+            return None
+
+        level = self.level
+        if self.average > self.target_frame_time and level > 0:
+            level -= 1
+        elif level < len(self.costs) - 1:
+            predicted = self.average * self.costs[level + 1] / self.costs[level]
+            if predicted < self.target_frame_time * self.headroom:
+                level += 1
+        if level == self.level:
+            return None
+
+        self.level = level
+        self.average = None
+        self.frames_since_change = 0
+        return level
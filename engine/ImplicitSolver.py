@@ -0,0 +1,156 @@
+import numpy as np
+
+# Backward Euler for a ParticleSystem's springs (Baraff and Witkin 1998).
+# One step solves
+#
+#     (M - h dF/dv - h^2 dF/dx) dv = h (F + h dF/dx v)
+#
+# for the velocity change dv, with F the spring, damping and external
+# forces. The system matrix is never built: every spring adds a symmetric
+# 2x2 block to the particles at its ends,
+#
+#     along n n^T + across (I - n n^T)
+#
+# along its unit direction n, with along = h c + h^2 k and
+# across = h^2 k max(1 - rest / length, 0) for stiffness k and damping c.
+# Dropping the sideways term of compressed springs keeps the matrix positive
+# definite (Choi and Ko 2002). A product with the matrix is a gather, a few
+# array operations per spring and a bincount scatter, and the solve is
+# conjugate gradient with the matrix diagonal as a Jacobi preconditioner.
+# The step is stable however stiff the springs are, so it runs at the frame
+# step with no substeps. Velocities still lose the same drag as under the
+# other solvers: springs damp only motion along themselves, and without the
+# drag a body keeps swaying on its shape pull and never comes to rest.
+
+
+class ImplicitSolver:
+    def __init__(self, system, stiffness_scale=1.0, damping=0.5, iterations=40, tolerance=1e-4):
+        self.system = system
+        # Spring k times this is the stiffness each spring stands for, in force per pixel
+        self.stiffness_scale = stiffness_scale
+        self.damping = damping  # Force per unit of closing speed along each spring
+        self.iterations = iterations  # Most conjugate gradient iterations per step
+        self.tolerance = tolerance  # Stop once the residual is this fraction of the right-hand side
+        self.last_iterations = 0
+        self.last_residual = 0.0
+        self.guess = None  # Last step's velocity change per particle, where the next solve starts
+
+    def step(self, dt, gravity=9.8, drag=0.01, particles=None, springs=None):
+        """Advance one frame; ``particles`` and ``springs`` limit it to those indices, which no other spring may touch."""
+        system = self.system
+        columns = system.columns(particles)
+        x, y, vx, vy, fx, fy, mass = columns
+        n = len(x)
+        a, b, k, rest = system.spring_a, system.spring_b, system.k, system.rest
+        if springs is not None:
+            # Only the stepped springs, with their ends numbered by row of the particles taken
+            number = np.empty(system.count, dtype=np.intp)
+            number[particles] = np.arange(n)
+            a, b, k, rest = number[a[springs]], number[b[springs]], k[springs], rest[springs]
+        k = k * self.stiffness_scale
+        self.ends = a, b
+        h = dt
+        c = self.damping
+
+        nx = x[b] - x[a]
+        ny = y[b] - y[a]
+        length = np.sqrt(nx * nx + ny * ny)
+        inverse = np.divide(1.0, length, out=np.zeros_like(length), where=length > 0)
+        nx *= inverse
+        ny *= inverse
+        self.directions = nx, ny
+
+        # Forces now: springs, damping along them, then whatever was gathered since the last step
+        closing = (vx[b] - vx[a]) * nx + (vy[b] - vy[a]) * ny
+        pull = k * (length - rest) + c * closing
+        force_x = fx + np.bincount(a, pull * nx, n) - np.bincount(b, pull * nx, n)
+        force_y = fy + gravity * mass + np.bincount(a, pull * ny, n) - np.bincount(b, pull * ny, n)
+
+        stiff = h * h * k
+        across = stiff * np.maximum(1 - rest * inverse, 0)
+        across[length == 0] = 0
+        # h^2 dF/dx v is minus the stiffness-only blocks applied to the velocities
+        stiff_x, stiff_y = self.block_product(self.blocks(stiff, across), vx, vy)
+        rhs_x = h * force_x - stiff_x
+        rhs_y = h * force_y - stiff_y
+
+        blocks = self.blocks(h * c + stiff, across)
+        # Jacobi preconditioner: the mass plus both ends' share of every block's diagonal
+        xx, _, yy = blocks
+        diagonal_x = mass + np.bincount(a, xx, n) + np.bincount(b, xx, n)
+        diagonal_y = mass + np.bincount(a, yy, n) + np.bincount(b, yy, n)
+
+        def product(px, py):
+            sx, sy = self.block_product(blocks, px, py)
+            return mass * px + sx, mass * py + sy
+
+        if self.guess is None or len(self.guess[0]) != system.count:
+            self.guess = np.zeros(system.count), np.zeros(system.count)
+        guess = self.guess if particles is None else (self.guess[0][particles], self.guess[1][particles])
+        dvx, dvy = self.conjugate_gradient(product, rhs_x, rhs_y, 1 / diagonal_x, 1 / diagonal_y, *guess)
+        if particles is None:
+            self.guess = dvx, dvy
+        else:
+            self.guess[0][particles] = dvx
+            self.guess[1][particles] = dvy
+        vx += dvx
+        vy += dvy
+        x += vx * h
+        y += vy * h
+        fx[:] = 0
+        fy[:] = 0
+        keep = (1 - drag) * system.damping
+        vx *= keep
+        vy *= keep
+
+        # Walls stop particles dead; backward Euler has no bounce to give back
+        r = system.radius
+        width, height = system.bounds
+        for p, v, high in ((x, vx, width - r), (y, vy, height - r)):
+            v[(p < r) | (p > high)] = 0
+            np.clip(p, r, high, out=p)
+        system.put_columns(particles, columns)
+
+    def blocks(self, along, across):
+        """The xx, xy and yy entries of every spring's block for the two weights."""
+        nx, ny = self.directions
+        difference = along - across
+        return across + difference * nx * nx, difference * nx * ny, across + difference * ny * ny
+
+    def block_product(self, blocks, px, py):
+        """Every spring's block times p_a - p_b, added to a and taken from b."""
+        a, b = self.ends
+        n = len(px)
+        xx, xy, yy = blocks
+        dx = px[a] - px[b]
+        dy = py[a] - py[b]
+        sx = xx * dx + xy * dy
+        sy = xy * dx + yy * dy
+        return np.bincount(a, sx, n) - np.bincount(b, sx, n), np.bincount(a, sy, n) - np.bincount(b, sy, n)
+
+    def conjugate_gradient(self, product, bx, by, scale_x, scale_y, dx, dy):
+        """Preconditioned conjugate gradient for A d = b from the guess (dx, dy), with A given as a product function."""
+        ax, ay = product(dx, dy)
+        rx, ry = bx - ax, by - ay
+        zx, zy = rx * scale_x, ry * scale_y
+        px, py = zx.copy(), zy.copy()
+        rz = np.dot(rx, zx) + np.dot(ry, zy)
+        residual = np.sqrt(np.dot(rx, rx) + np.dot(ry, ry))
+        goal = self.tolerance * np.sqrt(np.dot(bx, bx) + np.dot(by, by))
+        iteration = 0
+        while iteration < self.iterations and residual > goal:
+            ax, ay = product(px, py)
+            step = rz / (np.dot(px, ax) + np.dot(py, ay))
+            dx += step * px
+            dy += step * py
+            rx -= step * ax
+            ry -= step * ay
+            zx, zy = rx * scale_x, ry * scale_y
+            rz, previous = np.dot(rx, zx) + np.dot(ry, zy), rz
+            px = zx + rz / previous * px
+            py = zy + rz / previous * py
+            residual = np.sqrt(np.dot(rx, rx) + np.dot(ry, ry))
+            iteration += 1
+        self.last_iterations = iteration
+        self.last_residual = residual
+        return dx, dy
@@ -0,0 +1,215 @@
+from .ParticleSystem import np
+
+# Sleeping for the connected pieces of a ParticleSystem's spring graph. Each
+# piece is an island. One whose mean kinetic energy per particle stays under
+# a threshold for a number of frames in a row goes to sleep: its velocities
+# are zeroed and its box is remembered. Islands whose boxes come within
+# ``margin`` of each other form a cluster, a pile of bodies resting on each
+# other, and a cluster only counts as still while every island in it is, so
+# the pile goes to sleep together. A sleeping island wakes when told to, or
+# when the box of an island that moved this frame, or a box handed to
+# ``settle`` (a polygon that moved, say), comes within ``margin`` of its
+# own. The owner steps only the particles and springs of awake islands,
+# and when every island sleeps it can skip its step altogether.
+
+
+def island_labels(a, b, count):
+    """Number every particle's connected piece of the spring graph, from 0 in order of first particle."""
+    parent = list(range(count))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(list(a), list(b)):
+        i, j = root(i), root(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+    numbers = {}
+    return [numbers.setdefault(root(i), len(numbers)) for i in range(count)]
+
+
+def overlaps(box, other, margin):
+    return (box[0] - margin <= other[2] and other[0] <= box[2] + margin
+            and box[1] - margin <= other[3] and other[1] <= box[3] + margin)
+
+
+def clusters(boxes, margin):
+    """Group the indices of boxes that touch, directly or through others, within ``margin``."""
+    parent = list(range(len(boxes)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Every pair; a body rarely has more than a handful of pieces
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if overlaps(boxes[i], boxes[j], margin):
+                parent[root(j)] = root(i)
+    groups = {}
+    for i in range(len(boxes)):
+        groups.setdefault(root(i), []).append(i)
+    return list(groups.values())
+
+
+class Islands:
+    def __init__(self, system, energy=1.0, frames=60, margin=5.0):
+        self.system = system
+        self.energy = energy  # Mean kinetic energy per particle under which an island counts as still
+        self.frames = frames  # Still frames in a row before an island sleeps
+        self.margin = margin  # Pixels between boxes that count as touching
+        self.count = -1
+        self.spring_count = -1
+        self.labels = []
+        self.still = []  # Still frames in a row, per island
+        self.asleep = []
+        self.boxes = []  # (left, top, right, bottom) of each sleeping island, None while awake
+        self.order = None  # Particle indices sorted by island, and where each island starts in them
+        self.starts = None
+        self.awake_rows = (None, None)  # The asleep flags awake() last answered for, and its answer
+
+    def refresh(self):
+        """Find the islands again if particles or springs were added; every island starts awake."""
+        system = self.system
+        if self.count == system.count and self.spring_count == system.spring_count:
+            return
+        self.count = system.count
+        self.spring_count = system.spring_count
+        self.labels = island_labels(system.spring_a, system.spring_b, system.count)
+        islands = max(self.labels) + 1 if len(self.labels) else 0
+        if system.vectorized:
+            self.labels = np.array(self.labels, dtype=np.intp)
+            sizes = np.bincount(self.labels, minlength=islands)
+            self.order = np.argsort(self.labels, kind="stable")
+            self.starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        self.awake_rows = (None, None)
+        self.still = [0] * islands
+        self.asleep = [False] * islands
+        self.boxes = [None] * islands
+
+    @property
+    def all_asleep(self):
+        self.refresh()
+        return bool(self.asleep) and all(self.asleep)
+
+    def asleep_count(self):
+        return sum(self.asleep)
+
+    def wake(self):
+        self.refresh()
+        for island in range(len(self.asleep)):
+            self.wake_island(island)
+
+    def wake_island(self, island):
+        self.asleep[island] = False
+        self.still[island] = 0
+        self.boxes[island] = None
+
+    def sleeping(self):
+        """Which particles belong to sleeping islands, or None when no island sleeps."""
+        self.refresh()
+        if not any(self.asleep):
+            return None
+        if self.system.vectorized:
+            return np.array(self.asleep)[self.labels]
+        return [self.asleep[label] for label in self.labels]
+
+    def awake(self):
+        """Indices of the particles and springs of awake islands, for a step to work on; None when none sleeps.
+
+        With NumPy the particles come as a slice when they are one run of
+        rows, as the islands of a body added piece by piece are, so the step
+        can work on views of the columns instead of copies.
+        """
+        self.refresh()
+        flags, rows = self.awake_rows
+        if flags == self.asleep:
+            return rows
+        sleeping = self.sleeping()
+        system = self.system
+        if sleeping is None:
+            rows = None
+        elif system.vectorized:
+            # An island is a connected piece, so a spring is awake when its first end is
+            particles = np.flatnonzero(~sleeping)
+            springs = np.flatnonzero(~sleeping[system.spring_a])
+            if len(particles) and particles[-1] - particles[0] == len(particles) - 1:
+                particles = slice(int(particles[0]), int(particles[-1]) + 1)
+            rows = particles, springs
+        else:
+            particles = [i for i, asleep in enumerate(sleeping) if not asleep]
+            rows = particles, [s for s, a in enumerate(system.spring_a) if not sleeping[a]]
+        self.awake_rows = (list(self.asleep), rows)
+        return rows
+
+    def island_boxes(self):
+        """(left, top, right, bottom) of every island's particles."""
+        system = self.system
+        islands = len(self.asleep)
+        if system.vectorized:
+            starts = self.starts
+            x, y = system.x[self.order], system.y[self.order]
+            columns = (np.minimum.reduceat(x, starts), np.minimum.reduceat(y, starts),
+                       np.maximum.reduceat(x, starts), np.maximum.reduceat(y, starts))
+            return list(zip(*(column.tolist() for column in columns)))
+        boxes = [None] * islands
+        for label, x, y in zip(self.labels, system.x, system.y):
+            box = boxes[label]
+            boxes[label] = (x, y, x, y) if box is None else (min(box[0], x), min(box[1], y), max(box[2], x), max(box[3], y))
+        return boxes
+
+    def energies(self):
+        """Mean kinetic energy per particle of every island."""
+        system = self.system
+        islands = len(self.asleep)
+        if system.vectorized:
+            energy = 0.5 * system.mass * (system.vx * system.vx + system.vy * system.vy)
+            return (np.bincount(self.labels, energy, islands) / np.bincount(self.labels, minlength=islands)).tolist()
+        totals = [0.0] * islands
+        sizes = [0] * islands
+        for label, m, vx, vy in zip(self.labels, system.mass, system.vx, system.vy):
+            totals[label] += 0.5 * m * (vx * vx + vy * vy)
+            sizes[label] += 1
+        return [total / size for total, size in zip(totals, sizes)]
+
+    def settle(self, boxes=()):
+        """Count still frames after a step, put islands to sleep and wake the ones something came near."""
+        self.refresh()
+        awake = [island for island, asleep in enumerate(self.asleep) if not asleep]
+        if awake:
+            energies = self.energies()
+            current = self.island_boxes()
+            moving = {island for island in awake if energies[island] >= self.energy}
+            # One moving island keeps the rest of its cluster awake
+            for cluster in clusters([current[island] for island in awake], self.margin):
+                if any(awake[k] in moving for k in cluster):
+                    moving.update(awake[k] for k in cluster)
+            for island in awake:
+                self.still[island] = 0 if island in moving else self.still[island] + 1
+            # Islands that moved this frame wake their sleeping neighbours
+            movers = [current[island] for island in awake if self.still[island] == 0]
+            for island in awake:
+                if self.still[island] >= self.frames:
+                    self.asleep[island] = True
+                    self.boxes[island] = current[island]
+                    self.stop(island)
+            boxes = list(boxes) + movers
+        for island, box in enumerate(self.boxes):
+            if box is not None and any(overlaps(box, other, self.margin) for other in boxes):
+                self.wake_island(island)
+
+    def stop(self, island):
+        system = self.system
+        if system.vectorized:
+            members = self.labels == island
+            for column in (system.vx, system.vy, system.fx, system.fy):
+                column[members] = 0
+            return
+        for i, label in enumerate(self.labels):
+            if label == island:
+                system.vx[i] = system.vy[i] = system.fx[i] = system.fy[i] = 0.0
@@ -0,0 +1,213 @@
+import copy
+from array import array
+
+# Triangle meshes for soft bodies. A mesh is a list of (x, y) vertices and a
+# list of (i, j, k) triangles; springs come from it in two sets, built once:
+# structural springs along every triangle edge, and shear springs across
+# every edge two triangles share, joining the corners opposite it. Each set
+# is kept as compressed sparse rows: the partners of vertex i are
+# columns[offsets[i]:offsets[i + 1]], every pair stored once under its lower
+# vertex. Walking the rows in order lists springs sorted by their first end,
+# so evaluating them reads the particle arrays front to back.
+#
+# Mesh files are the vertex and face lines of Wavefront OBJ:
+#
+#     # A comment
+#     v 0 0
+#     v 40 0
+#     v 0 40
+#     f 1 2 3
+#
+# "v x y" adds a vertex (a z coordinate is ignored) and "f a b c" a triangle
+# of 1-based vertex numbers, negative ones counting back from the latest
+# vertex. Faces with more corners are split into a fan of triangles.
+
+
+class Mesh:
+    def __init__(self, vertices, triangles):
+        self.vertices = [(float(x), float(y)) for x, y in vertices]
+        self.triangles = [tuple(triangle) for triangle in triangles]
+        count = len(self.vertices)
+        for triangle in self.triangles:
+            if len(triangle) != 3 or not all(0 <= i < count for i in triangle):
+                raise ValueError(f"triangle {triangle} does not index three of the {count} vertices")
+        self.edge_offsets, self.edge_columns = adjacency(self.edge_pairs(), count)
+        self.shear_offsets, self.shear_columns = adjacency(self.shear_pairs(), count)
+
+    @classmethod
+    def load(cls, path):
+        vertices, triangles = [], []
+        with open(path) as lines:
+            for number, line in enumerate(lines, 1):
+                fields = line.split("#", 1)[0].split()
+                if not fields:
+                    continue
+                try:
+                    if fields[0] == "v":
+                        vertices.append((float(fields[1]), float(fields[2])))
+                    elif fields[0] == "f":
+                        # "f 1/4/2 ..." carries texture and normal numbers after the vertex
+                        corners = [int(field.split("/")[0]) for field in fields[1:]]
+                        corners = [c - 1 if c > 0 else len(vertices) + c for c in corners]
+                        if len(corners) < 3:
+                            raise ValueError("a face needs three corners")
+                        triangles.extend((corners[0], corners[k], corners[k + 1]) for k in range(1, len(corners) - 1))
+                except (IndexError, ValueError) as error:
+                    raise ValueError(f"{path}, line {number}: {error}") from None
+        return cls(vertices, triangles)
+
+    @classmethod
+    def grid(cls, x, y, width, height, columns, rows):
+        """A rectangle of columns x rows vertices, every cell split into two triangles.
+
+        Vertex i * rows + j sits in column i and row j, the order SoftBody's
+        lattice uses, and the diagonals alternate so the mesh has no
+        preferred direction to shear in.
+        """
+        dx = width / (columns - 1)
+        dy = height / (rows - 1)
+        vertices = [(x + i * dx, y + j * dy) for i in range(columns) for j in range(rows)]
+        triangles = []
+        for i in range(columns - 1):
+            for j in range(rows - 1):
+                a, b = i * rows + j, (i + 1) * rows + j
+                c, d = a + 1, b + 1
+                if (i + j) % 2:
+                    triangles += [(a, b, d), (a, d, c)]
+                else:
+                    triangles += [(a, b, c), (b, d, c)]
+        return cls(vertices, triangles)
+
+    @classmethod
+    def from_polygon(cls, outline, spacing):
+        """Triangulate a simple polygon, then split its triangles until no edge is longer than ``spacing``.
+
+        ``outline`` is a list of (x, y) corners in either winding. The
+        corners are cut into triangles by ear clipping, and every round of
+        refinement splits each triangle into four at its edge midpoints.
+        """
+        if not spacing > 0:
+            # Edges never get that short, so refinement would never stop
+            raise ValueError(f"spacing must be positive, not {spacing}")
+        vertices = [(float(x), float(y)) for x, y in outline]
+        triangles = ear_clip(vertices)
+        while max(length(vertices, i, j) for triangle in triangles for i, j in sides(triangle)) > spacing:
+            triangles = subdivide(vertices, triangles)
+        return cls(vertices, triangles)
+
+    def fit(self, x, y, width, height):
+        """A copy scaled, keeping its proportions, and moved to fill the middle of the given box.
+
+        The copy shares this mesh's triangles and adjacency, which moving does not change.
+        """
+        xs = [v[0] for v in self.vertices]
+        ys = [v[1] for v in self.vertices]
+        low_x, low_y = min(xs), min(ys)
+        span_x = max(xs) - low_x or 1.0
+        span_y = max(ys) - low_y or 1.0
+        scale = min(width / span_x, height / span_y)
+        left = x + (width - span_x * scale) / 2
+        top = y + (height - span_y * scale) / 2
+        fitted = copy.copy(self)
+        fitted.vertices = [(left + (vx - low_x) * scale, top + (vy - low_y) * scale) for vx, vy in self.vertices]
+        return fitted
+
+    def edge_pairs(self):
+        return {(min(i, j), max(i, j)) for triangle in self.triangles for i, j in sides(triangle)}
+
+    def shear_pairs(self):
+        """The two corners facing each other across every edge shared by two triangles."""
+        opposite = {}
+        pairs = set()
+        for triangle in self.triangles:
+            for i, j in sides(triangle):
+                edge = (min(i, j), max(i, j))
+                corner = sum(triangle) - i - j
+                other = opposite.setdefault(edge, corner)
+                if other != corner:
+                    pairs.add((min(corner, other), max(corner, other)))
+        return pairs
+
+    def springs(self):
+        """First and second ends of every structural spring, then every shear spring, in row order."""
+        first, second = array("l"), array("l")
+        for offsets, columns in ((self.edge_offsets, self.edge_columns), (self.shear_offsets, self.shear_columns)):
+            for i in range(len(offsets) - 1):
+                row = columns[offsets[i]:offsets[i + 1]]
+                first.extend([i] * len(row))
+                second.extend(row)
+        return first, second
+
+
+def adjacency(pairs, count):
+    """Compressed sparse rows of (i, j) pairs with i < j: offsets into columns, one row per vertex."""
+    rows = [[] for _ in range(count)]
+    for i, j in pairs:
+        rows[i].append(j)
+    offsets = array("l", [0])
+    columns = array("l")
+    for row in rows:
+        columns.extend(sorted(row))
+        offsets.append(len(columns))
+    return offsets, columns
+
+
+def sides(triangle):
+    i, j, k = triangle
+    return (i, j), (j, k), (k, i)
+
+
+def length(vertices, i, j):
+    (x0, y0), (x1, y1) = vertices[i], vertices[j]
+    return ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+
+
+def cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def ear_clip(vertices):
+    """Triangles covering a simple polygon, as index triples into ``vertices``."""
+    remaining = list(range(len(vertices)))
+    if len(remaining) < 3:
+        raise ValueError("a polygon needs three corners")
+    # Work with positive turns: flip a polygon whose shoelace area is negative
+    if sum(cross((0.0, 0.0), vertices[i], vertices[j]) for i, j in zip(remaining, remaining[1:] + remaining[:1])) < 0:
+        remaining.reverse()
+    triangles = []
+    while len(remaining) > 3:
+        for k in range(len(remaining)):
+            i, j, l = remaining[k - 1], remaining[k], remaining[(k + 1) % len(remaining)]
+            a, b, c = vertices[i], vertices[j], vertices[l]
+            if cross(a, b, c) <= 0:
+                continue  # A reflex corner, or a flat one
+            # An ear holds no other corner, not even on its sides
+            if any(cross(a, b, p) >= 0 and cross(b, c, p) >= 0 and cross(c, a, p) >= 0
+                   for p in (vertices[m] for m in remaining if m not in (i, j, l))):
+                continue
+            triangles.append((i, j, l))
+            del remaining[k]
+            break
+        else:
+            raise ValueError("the polygon crosses itself, it has no ear to cut")
+    triangles.append(tuple(remaining))
+    return triangles
+
+
+def subdivide(vertices, triangles):
+    """Split every triangle into four at its edge midpoints, adding the midpoints to ``vertices``."""
+    midpoints = {}
+
+    def midpoint(i, j):
+        edge = (min(i, j), max(i, j))
+        if edge not in midpoints:
+            (x0, y0), (x1, y1) = vertices[i], vertices[j]
+            vertices.append(((x0 + x1) / 2, (y0 + y1) / 2))
+            midpoints[edge] = len(vertices) - 1
+        return midpoints[edge]
+
+    split = []
+    for i, j, k in triangles:
+        a, b, c = midpoint(i, j), midpoint(j, k), midpoint(k, i)
+        split += [(i, a, c), (a, j, b), (c, b, k), (a, b, c)]
+    return split
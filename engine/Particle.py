@@ -1,17 +1,71 @@
 import pygame
 from .config import config
+from .ParticleSystem import ParticleSystem
 
 class Particle:
-    def __init__(self, x, y, mass=1.0, screen_width=config.width, screen_height=config.height):
-        self.position = pygame.Vector2(x, y)
-        self.velocity = pygame.Vector2(0, 0)
-        self.mass = mass
-        self.forces = pygame.Vector2(0, 0)
-        self.radius = 30
-        self.damping = 0.99
+    """One row of a ParticleSystem. Position, velocity, force and mass live in the system's arrays.
+
+    A particle made without a system gets one of its own. Vector properties
+    hand out copies, so change them by assigning or with augmented assignment
+    (``particle.position += offset``), not by setting ``.x`` on the copy.
+    """
+
+    def __init__(self, x, y, mass=1.0, screen_width=config.width, screen_height=config.height, system=None):
+        if system is None:
+            system = ParticleSystem((screen_width, screen_height))
+        self.system = system
+        self.index = system.add_particle(x, y, mass)
         self.SCREEN_WIDTH = screen_width
         self.SCREEN_HEIGHT = screen_height
 
+    @classmethod
+    def of(cls, system, index):
+        """A view of a row already in ``system``, such as one added with ``add_particles``."""
+        particle = cls.__new__(cls)
+        particle.system = system
+        particle.index = index
+        particle.SCREEN_WIDTH, particle.SCREEN_HEIGHT = system.bounds
+        return particle
+
+    @property
+    def position(self):
+        return pygame.Vector2(self.system.x[self.index], self.system.y[self.index])
+
+    @position.setter
+    def position(self, value):
+        self.system.x[self.index], self.system.y[self.index] = value
+
+    @property
+    def velocity(self):
+        return pygame.Vector2(self.system.vx[self.index], self.system.vy[self.index])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.system.vx[self.index], self.system.vy[self.index] = value
+
+    @property
+    def forces(self):
+        return pygame.Vector2(self.system.fx[self.index], self.system.fy[self.index])
+
+    @forces.setter
+    def forces(self, value):
+        self.system.fx[self.index], self.system.fy[self.index] = value
+
+    @property
+    def mass(self):
+        return self.system.mass[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.system.mass[self.index] = value
+
+    @property
+    def radius(self):
+        return self.system.radius
+
+    @property
+    def damping(self):
+        return self.system.damping
 
     def apply_force(self, force):
         self.forces += force
@@ -20,32 +74,36 @@ class Particle:
         self.velocity *= (1 - damping_factor)
 
     def check_wall_collision(self, window_width, window_height):
-        if self.position.x <= 0 or self.position.x >= window_width:
-            self.velocity.x *= -0.9  # Bounce back w/ some slowdown
-        if self.position.y <= 0 or self.position.y >= window_height:
-            self.velocity.y *= -0.9  # Bounce back w/ some slowdown
+        position, velocity = self.position, self.velocity
+        if position.x <= 0 or position.x >= window_width:
+            velocity.x *= -0.9  # Bounce back w/ some slowdown
+        if position.y <= 0 or position.y >= window_height:
+            velocity.y *= -0.9  # Bounce back w/ some slowdown
+        self.velocity = velocity
 
     def integrate(self, dt):
         acceleration = self.forces / self.mass
-        self.velocity += acceleration * dt
-        self.position += self.velocity * dt
-        self.forces = pygame.Vector2(0, 0)
-        self.velocity *= self.damping
+        velocity = self.velocity + acceleration * dt
+        position = self.position + velocity * dt
+        self.forces = (0, 0)
+        velocity *= self.damping
 
         # Keep stuff on screen
-        if self.position.x < self.radius:
-            self.position.x = self.radius
-            self.velocity.x *= -1
-        elif self.position.x > self.SCREEN_WIDTH - self.radius:
-            self.position.x = self.SCREEN_WIDTH - self.radius
-            self.velocity.x *= -1
-
-        if self.position.y < self.radius:
-            self.position.y = self.radius
-            self.velocity.y *= -1
-        elif self.position.y > self.SCREEN_HEIGHT - self.radius:
-            self.position.y = self.SCREEN_HEIGHT - self.radius
-            self.velocity.y *= -1
+        if position.x < self.radius:
+            position.x = self.radius
+            velocity.x *= -1
+        elif position.x > self.SCREEN_WIDTH - self.radius:
+            position.x = self.SCREEN_WIDTH - self.radius
+            velocity.x *= -1
+
+        if position.y < self.radius:
+            position.y = self.radius
+            velocity.y *= -1
+        elif position.y > self.SCREEN_HEIGHT - self.radius:
+            position.y = self.SCREEN_HEIGHT - self.radius
+            velocity.y *= -1
+        self.position = position
+        self.velocity = velocity
 
     def apply_gravity(self):
         GRAVITY = pygame.Vector2(0, 9.8)
@@ -0,0 +1,290 @@
+import math
+from array import array
+import pygame
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+
+# Mass-spring state as a struct of arrays: one flat array per particle
+# component and one per spring property, with springs stored as index pairs.
+# Particle and SoftSpring objects are thin views that read and write a row.
+# With NumPy every step is a handful of array operations over all particles
+# and springs, and spring forces are summed per particle with bincount. Without
+# NumPy the columns are array.array buffers and the views run the old
+# per-object loops over them.
+
+PARTICLE_COLUMNS = (("x", "d"), ("y", "d"), ("vx", "d"), ("vy", "d"), ("fx", "d"), ("fy", "d"), ("mass", "d"))
+SPRING_COLUMNS = (("spring_a", "l"), ("spring_b", "l"), ("rest", "d"), ("k", "d"))
+
+
+class ParticleSystem:
+    def __init__(self, bounds, radius=30, damping=0.99):
+        self.bounds = bounds  # (width, height)
+        self.radius = radius  # Particles keep this far from the walls
+        self.damping = damping  # Velocity kept after every step
+        self.vectorized = HAS_NUMPY
+        self.count = 0
+        self.spring_count = 0
+        self.buffers = {}
+        for name, code in PARTICLE_COLUMNS + SPRING_COLUMNS:
+            if self.vectorized:
+                self.buffers[name] = np.zeros(0, np.intp if code == "l" else float)
+                setattr(self, name, self.buffers[name])
+            else:
+                setattr(self, name, array(code))
+
+    def append(self, columns, row, values):
+        """Write ``values`` as row ``row`` of a table, growing its buffers by doubling.
+
+        The public arrays are views of the first rows of the buffers, so
+        anything holding on to one must fetch it again after an append.
+        """
+        if not self.vectorized:
+            for (name, _), value in zip(columns, values):
+                getattr(self, name).append(value)
+            return row
+        buffers = self.buffers
+        if row == len(buffers[columns[0][0]]):
+            for name, _ in columns:
+                grown = np.zeros(max(2 * row, 16), buffers[name].dtype)
+                grown[:row] = buffers[name][:row]
+                buffers[name] = grown
+        for (name, _), value in zip(columns, values):
+            buffers[name][row] = value
+            setattr(self, name, buffers[name][:row + 1])
+        return row
+
+    def extend(self, columns, start, values):
+        """Write equal-length sequences as rows ``start`` onwards of a table, growing it at most once."""
+        rows = len(values[0])
+        if not self.vectorized:
+            for (name, code), value in zip(columns, values):
+                getattr(self, name).extend(array(code, value))
+            return start
+        buffers = self.buffers
+        end = start + rows
+        if end > len(buffers[columns[0][0]]):
+            for name, _ in columns:
+                grown = np.zeros(max(2 * start, end, 16), buffers[name].dtype)
+                grown[:start] = buffers[name][:start]
+                buffers[name] = grown
+        for (name, _), value in zip(columns, values):
+            buffers[name][start:end] = value
+            setattr(self, name, buffers[name][:end])
+        return start
+
+    def add_particle(self, x, y, mass=1.0):
+        index = self.append(PARTICLE_COLUMNS, self.count, (x, y, 0.0, 0.0, 0.0, 0.0, mass))
+        self.count += 1
+        return index
+
+    def add_particles(self, xs, ys, mass=1.0):
+        """Add a particle at every (xs[i], ys[i]) and return the index of the first."""
+        rows = len(xs)
+        zeros = [0.0] * rows
+        index = self.extend(PARTICLE_COLUMNS, self.count, (xs, ys, zeros, zeros, zeros, zeros, [mass] * rows))
+        self.count += rows
+        return index
+
+    def add_springs(self, a, b, k):
+        """Connect every a[i] to b[i] at their current distance and return the index of the first spring."""
+        rows = len(a)
+        x, y = self.x, self.y
+        if self.vectorized:
+            a = np.asarray(a, np.intp)
+            b = np.asarray(b, np.intp)
+            rest = np.hypot(x[b] - x[a], y[b] - y[a])
+        else:
+            rest = [((x[j] - x[i]) ** 2 + (y[j] - y[i]) ** 2) ** 0.5 for i, j in zip(a, b)]
+        index = self.extend(SPRING_COLUMNS, self.spring_count, (a, b, rest, [k] * rows))
+        self.spring_count += rows
+        return index
+
+    def add_spring(self, a, b, k):
+        """Connect particles ``a`` and ``b`` at their current distance and return the spring's index."""
+        rest = ((self.x[b] - self.x[a]) ** 2 + (self.y[b] - self.y[a]) ** 2) ** 0.5
+        index = self.append(SPRING_COLUMNS, self.spring_count, (a, b, rest, k))
+        self.spring_count += 1
+        return index
+
+    def columns(self, particles=None):
+        """x, y, vx, vy, fx, fy and mass: the columns themselves, or just the ``particles`` rows.
+
+        ``particles`` is an index array, whose rows come as copies that go
+        back into the columns with ``put_columns``, or a slice, whose rows
+        are views.
+        """
+        columns = (self.x, self.y, self.vx, self.vy, self.fx, self.fy, self.mass)
+        if particles is None:
+            return columns
+        return tuple(column[particles] for column in columns)
+
+    def put_columns(self, particles, columns):
+        """Write rows taken with ``columns(particles)`` back; views were changed in place already."""
+        if particles is None or isinstance(particles, slice):
+            return
+        for column, rows in zip((self.x, self.y, self.vx, self.vy, self.fx, self.fy), columns):
+            column[particles] = rows
+
+    def bounce_walls(self, restitution=0.9, particles=None):
+        """Reverse and slow the velocity of particles touching or past a wall, only the ``particles`` rows if given."""
+        width, height = self.bounds
+        columns = self.columns(particles)
+        x, y, vx, vy = columns[:4]
+        for p, v, high in ((x, vx, width), (y, vy, height)):
+            v[(p <= 0) | (p >= high)] *= -restitution
+        self.put_columns(particles, columns)
+
+    def spring_forces(self, stiffness_factor=0.1, damping_factor=0.1, passes=1, springs=None):
+        """Add every spring's force, the same as ``passes`` rounds of SoftSpring.update.
+
+        Positions and velocities do not change between rounds, so one round
+        scaled by ``passes`` gives the same total. ``springs`` limits it to
+        those spring indices.
+        """
+        a, b = self.spring_a, self.spring_b
+        k, rest = self.k, self.rest
+        if springs is not None:
+            a, b, k, rest = a[springs], b[springs], k[springs], rest[springs]
+        n = self.count
+        dx = self.x[b] - self.x[a]
+        dy = self.y[b] - self.y[a]
+        length = np.sqrt(dx * dx + dy * dy)
+        # A spring with both ends on the same spot has no direction and pushes nothing
+        inverse = np.divide(1.0, length, out=np.zeros_like(length), where=length > 0)
+        dx *= inverse
+        dy *= inverse
+        closing = (self.vx[a] - self.vx[b]) * dx + (self.vy[a] - self.vy[b]) * dy
+        # Ends closing in push apart and ends drawing away pull together, so the damping takes energy out
+        magnitude = (k * (rest - length) * stiffness_factor + damping_factor * closing) * passes
+        dx *= magnitude
+        dy *= magnitude
+        self.fx += np.bincount(b, dx, n) - np.bincount(a, dx, n)
+        self.fy += np.bincount(b, dy, n) - np.bincount(a, dy, n)
+
+    def integrate(self, dt, gravity=9.8, drag=0.01, particles=None):
+        """Semi-implicit Euler step for every particle, or the ``particles`` rows if given, then keep them on screen.
+
+        Matches Particle.apply_damping, apply_gravity and integrate in turn.
+        """
+        columns = self.columns(particles)
+        x, y, vx, vy, fx, fy, mass = columns
+        vx *= 1 - drag
+        vy *= 1 - drag
+        fy += gravity * mass
+        vx += fx / mass * dt
+        vy += fy / mass * dt
+        x += vx * dt
+        y += vy * dt
+        fx[:] = 0
+        fy[:] = 0
+        vx *= self.damping
+        vy *= self.damping
+
+        r = self.radius
+        width, height = self.bounds
+        for p, v, high in ((x, vx, width - r), (y, vy, height - r)):
+            outside = (p < r) | (p > high)
+            v[outside] *= -1
+            np.clip(p, r, high, out=p)
+        self.put_columns(particles, columns)
+
+    def translate(self, dx, dy):
+        if self.vectorized:
+            self.x += dx
+            self.y += dy
+            return
+        x, y = self.x, self.y
+        for i in range(self.count):
+            x[i] += dx
+            y[i] += dy
+
+    def pull(self, cx, cy, strength, offset_x=None, offset_y=None, rotation=(1.0, 0.0), particles=None):
+        """Add a force pulling each particle towards (cx, cy) plus its offset, in proportion to the distance.
+
+        The offsets are turned by ``rotation``, a (cos, sin) pair, first.
+        ``particles`` limits the pull to those indices.
+        """
+        cos, sin = rotation
+        if self.vectorized:
+            columns = self.columns(particles)
+            x, y, fx, fy = columns[0], columns[1], columns[4], columns[5]
+            if particles is not None and offset_x is not None:
+                offset_x, offset_y = offset_x[particles], offset_y[particles]
+            targets_x = cx if offset_x is None else cx + cos * offset_x - sin * offset_y
+            targets_y = cy if offset_y is None else cy + sin * offset_x + cos * offset_y
+            fx -= strength * (x - targets_x)
+            fy -= strength * (y - targets_y)
+            self.put_columns(particles, columns)
+            return
+        x, y, fx, fy = self.x, self.y, self.fx, self.fy
+        for i in range(self.count) if particles is None else particles:
+            tx = cx if offset_x is None else cx + cos * offset_x[i] - sin * offset_y[i]
+            ty = cy if offset_y is None else cy + sin * offset_x[i] + cos * offset_y[i]
+            fx[i] -= strength * (x[i] - tx)
+            fy[i] -= strength * (y[i] - ty)
+
+    def positions(self):
+        """Every particle's position, as an (n, 2) array or a list of pairs without NumPy."""
+        if self.vectorized:
+            return np.column_stack((self.x, self.y))
+        return list(zip(self.x, self.y))
+
+    def reverse(self, mask):
+        """Turn around the velocity of every particle where ``mask`` is true."""
+        if self.vectorized:
+            self.vx[mask] *= -1
+            self.vy[mask] *= -1
+            return
+        for i, flip in enumerate(mask):
+            if flip:
+                self.vx[i] = -self.vx[i]
+                self.vy[i] = -self.vy[i]
+
+    def first_within(self, x, y, radius):
+        """Index of the first particle closer than ``radius`` to (x, y), or None."""
+        if self.vectorized:
+            near = np.flatnonzero((self.x - x) ** 2 + (self.y - y) ** 2 < radius * radius)
+            return int(near[0]) if len(near) else None
+        for i in range(self.count):
+            if (self.x[i] - x) ** 2 + (self.y[i] - y) ** 2 < radius * radius:
+                return i
+        return None
+
+    def center_of_mass(self):
+        """The mass-weighted mean particle position."""
+        if self.vectorized:
+            total = self.mass.sum()
+            return pygame.Vector2(float(self.mass @ self.x / total), float(self.mass @ self.y / total))
+        total = sum(self.mass)
+        return pygame.Vector2(
+            sum(m * x for m, x in zip(self.mass, self.x)) / total,
+            sum(m * y for m, y in zip(self.mass, self.y)) / total,
+        )
+
+    def best_rotation(self, cx, cy, offset_x, offset_y):
+        """The (cos, sin) of the rotation that best carries the rest offsets onto the particles around (cx, cy).
+
+        This is the rotation part of the polar decomposition of the 2x2
+        mass-weighted covariance between current and rest offsets (Mueller et
+        al. 2005). In 2D it has a closed form: the angle whose tangent is the
+        summed cross product over the summed dot product.
+        """
+        if self.vectorized:
+            px = self.mass * (self.x - cx)
+            py = self.mass * (self.y - cy)
+            dot = float(px @ offset_x + py @ offset_y)
+            cross = float(py @ offset_x - px @ offset_y)
+        else:
+            dot = cross = 0.0
+            for m, x, y, qx, qy in zip(self.mass, self.x, self.y, offset_x, offset_y):
+                px, py = m * (x - cx), m * (y - cy)
+                dot += px * qx + py * qy
+                cross += py * qx - px * qy
+        norm = math.hypot(dot, cross)
+        if norm == 0:
+            return 1.0, 0.0
+        return dot / norm, cross / norm
@@ -0,0 +1,208 @@
+import math
+from .DormandPrince import DormandPrince
+
+# A planar chain of pendulums. Link i is a massless rod of length l_i from
+# the end of link i - 1 (from the pivot, for the first link) to a bob of
+# mass m_i, at angle theta_i from straight down. Angles are absolute, not
+# relative to the parent link, so bob i sits at
+#
+#     p_i = p_(i-1) + l_i u_i,   u_i = (sin theta_i, cos theta_i)
+#
+# in screen coordinates, y pointing down. Its acceleration is
+#
+#     a_i = a_(i-1) + alpha_i l_i n_i - omega_i^2 l_i u_i,   n_i = (cos theta_i, -sin theta_i)
+#
+# The angular accelerations come from an articulated-body recursion
+# (Featherstone 1983): O(N) work per evaluation instead of building and
+# solving the N x N mass matrix. Everything from bob i down acts on the rod
+# holding it like a 2x2 inertia A_i and a bias force c_i: the rod has to
+# pull with A_i a_i + c_i to give bob i the acceleration a_i. An inward pass
+# builds them from the last bob up,
+#
+#     A_i = m_i I + A'_(i+1),   c_i = -m_i g - F_i + c'_(i+1)
+#
+# with g gravity, F_i any outside force on bob i, and the primes the child
+# as its rod passes it on. A rod only pulls along its length, so the part of
+# the child's motion across it is free:
+#
+#     d = c - omega^2 l A u
+#     A' = A - (A n)(A n)^T / (n^T A n),   c' = d - (A n)(n . d) / (n^T A n)
+#
+# The outward pass then runs down from the fixed pivot, a_0 = 0, with
+#
+#     alpha_i = -(A_i n_i . a_(i-1) + n_i . d_i) / (l_i n_i^T A_i n_i)
+#
+# The angles and angular velocities of every link make up one state vector.
+# ``step`` moves it on with one classic RK4 step, the scheme Pendulum.update
+# used for a single link. ``advance`` hands it to an adaptive Dormand-Prince
+# integrator instead, which takes steps as long as the tolerance allows,
+# often longer than a frame, and reads the state at each frame from its
+# dense output. Either way the chain notices when its state was changed
+# from outside (a drag, a push, a new link) and starts counting steps and
+# energy drift, and the adaptive integrator, again from there.
+
+
+class PendulumChain:
+    def __init__(self, origin, gravity=9.81, time_scale=4.0, rtol=1e-6, atol=1e-9):
+        self.origin = origin  # The fixed pivot
+        self.gravity = gravity
+        self.time_scale = time_scale  # Simulated time per second of frame time
+        self.rtol = rtol  # Tolerances of the adaptive integrator
+        self.atol = atol
+        self.lengths = []
+        self.masses = []
+        self.angles = []
+        self.velocities = []  # Angular velocities
+        self.shown = None  # The state as the last step left it
+        self.integrator = None  # DormandPrince run in use by advance
+        self.time = 0.0  # Simulated time since the state was last changed from outside
+        self.start_energy = 0.0
+        self.steps = 0  # Steps since the state was last changed from outside
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add_link(self, length, mass, angle, angular_velocity=0.0):
+        """Hang a new link from the last bob (or the pivot) and return its index."""
+        self.lengths.append(length)
+        self.masses.append(mass)
+        self.angles.append(angle)
+        self.velocities.append(angular_velocity)
+        return len(self.lengths) - 1
+
+    def remove_link(self):
+        """Take the last link off the chain."""
+        for column in (self.lengths, self.masses, self.angles, self.velocities):
+            column.pop()
+
+    def accelerations(self, angles, velocities, forces=None, gravity=None):
+        """Angular acceleration of every link, with optional extra (fx, fy) forces on the bobs."""
+        g = self.gravity if gravity is None else gravity
+        lengths, masses = self.lengths, self.masses
+        count = len(angles)
+        links = [None] * count
+        # Inward pass: the child's inertia and bias as its rod passes them on
+        pass_xx = pass_xy = pass_yy = pass_x = pass_y = 0.0
+        for i in range(count - 1, -1, -1):
+            m = masses[i]
+            xx, xy, yy = m + pass_xx, pass_xy, m + pass_yy
+            bx, by = pass_x, pass_y - m * g
+            if forces is not None:
+                bx -= forces[i][0]
+                by -= forces[i][1]
+            s, c = math.sin(angles[i]), math.cos(angles[i])
+            spin = velocities[i] * velocities[i] * lengths[i]
+            dx = bx - spin * (xx * s + xy * c)
+            dy = by - spin * (xy * s + yy * c)
+            an_x, an_y = xx * c - xy * s, xy * c - yy * s  # A n
+            nan = c * an_x - s * an_y  # n^T A n
+            nd = c * dx - s * dy
+            links[i] = (an_x, an_y, nan, dx, dy, s, c, spin)
+            pass_xx = xx - an_x * an_x / nan
+            pass_xy = xy - an_x * an_y / nan
+            pass_yy = yy - an_y * an_y / nan
+            pass_x = dx - an_x * nd / nan
+            pass_y = dy - an_y * nd / nan
+
+        # Outward pass from the fixed pivot
+        ax = ay = 0.0
+        alphas = [0.0] * count
+        for i in range(count):
+            an_x, an_y, nan, dx, dy, s, c, spin = links[i]
+            l = lengths[i]
+            alpha = -(an_x * ax + an_y * ay + c * dx - s * dy) / (l * nan)
+            alphas[i] = alpha
+            ax += alpha * l * c - spin * s
+            ay -= alpha * l * s + spin * c
+        return alphas
+
+    def derivative(self, state):
+        count = len(state) // 2
+        return state[count:] + self.accelerations(state[:count], state[count:])
+
+    def restart_if_changed(self):
+        """Start the counts again if the state is not what the last step left, and return the state."""
+        state = self.angles + self.velocities
+        if state != self.shown:
+            self.integrator = None
+            self.time = 0.0
+            self.start_energy = self.energy()
+            self.steps = 0
+        return state
+
+    def energy_drift(self):
+        """Energy gained or lost since the state was last changed from outside, as a fraction of where it started.
+
+        A chain starting with next to no energy is measured against the sum
+        of m g l over its links instead.
+        """
+        scale = max(abs(self.start_energy), sum(m * self.gravity * l for m, l in zip(self.masses, self.lengths)), 1e-12)
+        return (self.energy() - self.start_energy) / scale
+
+    def step(self, dt):
+        """One RK4 step of dt * time_scale for the whole chain."""
+        h = dt * self.time_scale
+        state = self.restart_if_changed()
+        k1 = self.derivative(state)
+        k2 = self.derivative([y + 0.5 * h * k for y, k in zip(state, k1)])
+        k3 = self.derivative([y + 0.5 * h * k for y, k in zip(state, k2)])
+        k4 = self.derivative([y + h * k for y, k in zip(state, k3)])
+        state = [y + h * (a + 2 * b + 2 * c + d) / 6 for y, a, b, c, d in zip(state, k1, k2, k3, k4)]
+        self.set_state(state)
+        self.steps += 1
+
+    def advance(self, dt):
+        """Move on by dt * time_scale with adaptive Dormand-Prince steps, reading the end from the dense output."""
+        state = self.restart_if_changed()
+        if self.integrator is None:
+            self.integrator = DormandPrince(self.derivative, 0.0, state, self.rtol, self.atol)
+        self.time += dt * self.time_scale
+        self.set_state(self.integrator.state_at(self.time))
+        self.steps = self.integrator.accepted
+
+    def set_state(self, state):
+        count = len(state) // 2
+        self.angles = state[:count]
+        self.velocities = state[count:]
+        self.shown = state
+
+    def push(self, index, impulse):
+        """Change the angular velocities as an impulse (px, py) on bob ``index`` would.
+
+        An impulse is a force acting for no time, so the recursion with no
+        gravity and no velocities turns it straight into velocity changes.
+        """
+        forces = [(0.0, 0.0)] * len(self)
+        forces[index] = impulse
+        changes = self.accelerations(self.angles, [0.0] * len(self), forces, gravity=0.0)
+        self.velocities = [v + dv for v, dv in zip(self.velocities, changes)]
+
+    def pivot(self, index):
+        """Where link ``index`` hangs from: the pivot or the bob of the link before."""
+        x, y = self.origin
+        for length, angle in zip(self.lengths[:index], self.angles[:index]):
+            x += length * math.sin(angle)
+            y += length * math.cos(angle)
+        return x, y
+
+    def positions(self):
+        """(x, y) of every bob."""
+        x, y = self.origin
+        positions = []
+        for length, angle in zip(self.lengths, self.angles):
+            x += length * math.sin(angle)
+            y += length * math.cos(angle)
+            positions.append((x, y))
+        return positions
+
+    def energy(self):
+        """Kinetic plus potential energy, with the pivot as the zero of height."""
+        vx = vy = height = 0.0
+        total = 0.0
+        for length, mass, angle, velocity in zip(self.lengths, self.masses, self.angles, self.velocities):
+            s, c = math.sin(angle), math.cos(angle)
+            vx += velocity * length * c
+            vy -= velocity * length * s
+            height -= length * c  # y points down
+            total += 0.5 * mass * (vx * vx + vy * vy) + mass * self.gravity * height
+        return total
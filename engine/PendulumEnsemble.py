@@ -0,0 +1,100 @@
+import numpy as np
+import pygame
+
+# Many copies of one PendulumChain stepped together, for watching nearby
+# starts fan out. Angles and angular velocities are (members, links) arrays.
+# The articulated-body recursion of PendulumChain runs link by link as
+# before, but every quantity in it is an array over the members, so an RK4
+# step of the whole ensemble is the same few hundred array operations
+# however many members there are.
+
+
+class PendulumEnsemble:
+    def __init__(self, chain, members, spread=1e-3, seed=None):
+        """``members`` copies of ``chain``, every angle nudged by a normal random amount of deviation ``spread``."""
+        self.origin = chain.origin
+        self.gravity = chain.gravity
+        self.time_scale = chain.time_scale
+        self.lengths = np.array(chain.lengths, dtype=float)
+        self.masses = np.array(chain.masses, dtype=float)
+        rng = np.random.default_rng(seed)
+        self.angles = np.array(chain.angles) + rng.normal(0, spread, (members, len(chain)))
+        self.velocities = np.tile(np.array(chain.velocities, dtype=float), (members, 1))
+
+    def __len__(self):
+        return len(self.angles)
+
+    def accelerations(self, angles, velocities):
+        """PendulumChain.accelerations for every member at once: a (members, links) array."""
+        g = self.gravity
+        lengths, masses = self.lengths, self.masses
+        # One contiguous row per link
+        angles = np.ascontiguousarray(angles.T)
+        velocities = np.ascontiguousarray(velocities.T)
+        sin = np.sin(angles)
+        cos = np.cos(angles)
+        spins = velocities * velocities * lengths[:, None]
+        links = [None] * len(lengths)
+        pass_xx = pass_xy = pass_yy = pass_x = pass_y = 0.0
+        for i in range(len(lengths) - 1, -1, -1):
+            m = masses[i]
+            xx, xy, yy = m + pass_xx, pass_xy, m + pass_yy
+            s, c, spin = sin[i], cos[i], spins[i]
+            dx = pass_x - spin * (xx * s + xy * c)
+            dy = pass_y - m * g - spin * (xy * s + yy * c)
+            an_x, an_y = xx * c - xy * s, xy * c - yy * s
+            nan = c * an_x - s * an_y
+            nd = c * dx - s * dy
+            links[i] = (an_x, an_y, nan, dx, dy)
+            pass_xx = xx - an_x * an_x / nan
+            pass_xy = xy - an_x * an_y / nan
+            pass_yy = yy - an_y * an_y / nan
+            pass_x = dx - an_x * nd / nan
+            pass_y = dy - an_y * nd / nan
+
+        ax = ay = 0.0
+        alphas = np.empty_like(sin)
+        for i, (an_x, an_y, nan, dx, dy) in enumerate(links):
+            l = lengths[i]
+            s, c, spin = sin[i], cos[i], spins[i]
+            alpha = -(an_x * ax + an_y * ay + c * dx - s * dy) / (l * nan)
+            alphas[i] = alpha
+            ax = ax + alpha * l * c - spin * s
+            ay = ay - alpha * l * s - spin * c
+        return alphas.T
+
+    def step(self, dt):
+        """One RK4 step of dt * time_scale for every member, the scheme PendulumChain.step uses."""
+        h = dt * self.time_scale
+        angles, velocities = self.angles, self.velocities
+        a1, v1 = velocities, self.accelerations(angles, velocities)
+        a2 = velocities + 0.5 * h * v1
+        v2 = self.accelerations(angles + 0.5 * h * a1, a2)
+        a3 = velocities + 0.5 * h * v2
+        v3 = self.accelerations(angles + 0.5 * h * a2, a3)
+        a4 = velocities + h * v3
+        v4 = self.accelerations(angles + h * a3, a4)
+        self.angles = angles + h * (a1 + 2 * a2 + 2 * a3 + a4) / 6
+        self.velocities = velocities + h * (v1 + 2 * v2 + 2 * v3 + v4) / 6
+
+    def positions(self):
+        """x and y of every bob, as (members, links) arrays."""
+        x = self.origin[0] + np.cumsum(self.lengths * np.sin(self.angles), axis=1)
+        y = self.origin[1] + np.cumsum(self.lengths * np.cos(self.angles), axis=1)
+        return x, y
+
+    def draw(self, screen, colors):
+        """One pixel per bob, in the colour of its link (a list of RGB), written straight into the screen."""
+        x, y = self.positions()
+        x = x.astype(np.intp)
+        y = y.astype(np.intp)
+        inside = (x >= 0) & (x < screen.get_width()) & (y >= 0) & (y < screen.get_height())
+        links = np.broadcast_to(np.arange(len(self.lengths)), x.shape)[inside]
+        x, y = x[inside], y[inside]
+        if screen.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(screen)
+            pixels[x, y] = np.array([screen.map_rgb(color) for color in colors])[links]
+        else:
+            pixels = pygame.surfarray.pixels3d(screen)
+            pixels[x, y] = np.array(colors, dtype=np.uint8)[links]
+        del pixels
@@ -0,0 +1,250 @@
+import abc
+import math
+import numpy as np
+from .BandPool import BandPool
+from .FluidKernels import neighbour_sum
+
+# Solvers for the pressure Poisson equation  nsum(p) - 4p = rhs  on a cell grid
+# with zero-flux walls. Each solver works on p in place (so last frame's
+# pressure is a warm start) and records what the solve cost in
+# last_iterations / last_residual. Scratch space is allocated once per grid
+# shape, so repeated solves do not allocate. Sweeps run over the row bands of
+# a BandPool and give the same result for any number of workers.
+
+
+def residual(p, rhs, out, lo=0, hi=None, ws=None):
+    """rhs - laplacian(p) for rows lo..hi-1, written into ``out``."""
+    hi = p.shape[0] if hi is None else hi
+    neighbour_sum(p, out, lo, hi, ws)
+    band = out[lo:hi]
+    np.subtract(rhs[lo:hi], band, out=band)
+    # + 4p, without a temporary
+    for _ in range(4):
+        band += p[lo:hi]
+    return out
+
+
+def relative_residual(p, rhs, scratch, pool):
+    """Largest residual, relative to the largest right-hand side entry."""
+    def band(ws, lo, hi):
+        r = residual(p, rhs, scratch, lo, hi, ws)[lo:hi]
+        b = rhs[lo:hi]
+        return max(b.max(), -b.min()), max(r.max(), -r.min())
+
+    # Maxima are exact, so reducing them band by band changes nothing
+    bands = pool.run(band, p.shape[0])
+    scale = max(b[0] for b in bands)
+    if scale == 0:
+        return 0.0
+    return float(max(b[1] for b in bands) / scale)
+
+
+def checkerboard(shape):
+    """Masks of the red ((i + j) even) and black cells of a grid."""
+    i, j = np.indices(shape)
+    red = (i + j) % 2 == 0
+    return red, ~red
+
+
+class PoissonSolver(abc.ABC):
+    name = "poisson"
+
+    def __init__(self, max_iterations, tolerance=1e-3):
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.last_iterations = 0
+        self.last_residual = 0.0
+        self._shape = None
+
+    def prepare(self, shape, dtype):
+        """Allocate scratch space for a grid. Called again when its shape or type changes."""
+        self.scratch = np.empty(shape, dtype)
+
+    def solve(self, p, rhs, pool=None):
+        pool = pool or BandPool(dtype=p.dtype)
+        if (p.shape, p.dtype) != self._shape:
+            self._shape = (p.shape, p.dtype)
+            self.prepare(p.shape, p.dtype)
+        iterations = 0
+        res = relative_residual(p, rhs, self.scratch, pool)
+        while iterations < self.max_iterations and res > self.tolerance:
+            iterations += self.run(p, rhs, pool)
+            res = relative_residual(p, rhs, self.scratch, pool)
+        self.last_iterations = iterations
+        self.last_residual = res
+        return p
+
+    @abc.abstractmethod
+    def run(self, p, rhs, pool):
+        """Do a batch of work on p and return how many iterations it counts as."""
+
+
+class JacobiSolver(PoissonSolver):
+    """Plain Jacobi sweeps, kept as the reference the other solvers are checked against.
+
+    Errors die out over a number of sweeps that grows with the square of the
+    grid's width, thousands on the 80x60 grid, so the default cap leaves it
+    well short of the tolerance and FluidScene does not offer it.
+    """
+    name = "jacobi"
+    check_every = 10  # Sweeps between residual checks
+
+    def __init__(self, max_iterations=100, tolerance=1e-3):
+        super().__init__(max_iterations, tolerance)
+
+    def run(self, p, rhs, pool):
+        def sweep(ws, lo, hi, x, s):
+            neighbour_sum(x, s, lo, hi, ws)
+            s = s[lo:hi]
+            s -= rhs[lo:hi]
+            s *= 0.25
+
+        # Ping-pong, since a band must not overwrite rows its neighbours still read
+        x, s = p, self.scratch
+        for _ in range(self.check_every):
+            pool.run(sweep, p.shape[0], x, s)
+            x, s = s, x
+        if x is not p:
+            np.copyto(p, x)
+        return self.check_every
+
+
+class RedBlackSORSolver(PoissonSolver):
+    name = "sor"
+    check_every = 5
+
+    def __init__(self, max_iterations=60, tolerance=1e-3, omega=None):
+        super().__init__(max_iterations, tolerance)
+        self.omega = omega  # None picks the textbook optimum for the grid size
+
+    def prepare(self, shape, dtype):
+        super().prepare(shape, dtype)
+        self.relaxed = np.empty(shape, dtype)
+        self.masks = checkerboard(shape)
+        self.relaxation = self.omega or 2 / (1 + math.sin(math.pi / max(shape)))
+
+    def run(self, p, rhs, pool):
+        w = self.relaxation
+
+        def sweep(ws, lo, hi, mask):
+            neighbour_sum(p, self.scratch, lo, hi, ws)
+            s = self.scratch[lo:hi]
+            s -= rhs[lo:hi]
+            s *= 0.25 * w
+            relaxed = self.relaxed[lo:hi]
+            np.multiply(p[lo:hi], 1 - w, out=relaxed)
+            s += relaxed
+            np.copyto(p[lo:hi], s, where=mask[lo:hi])
+
+        for _ in range(self.check_every):
+            for mask in self.masks:
+                # Cells of one colour only read the other, so bands can update p in place
+                pool.run(sweep, p.shape[0], mask)
+        return self.check_every
+
+
+class MultigridSolver(PoissonSolver):
+    """Geometric multigrid V-cycles with red-black Gauss-Seidel smoothing.
+
+    Grids are halved while both sides stay even, restriction averages 2x2
+    blocks and prolongation copies each coarse cell back to its block. The
+    coarsest grid is solved exactly when it is small enough, otherwise with
+    plain sweeps. One V-cycle counts as one iteration.
+    """
+    name = "multigrid"
+
+    def __init__(self, max_iterations=8, tolerance=1e-3, smoothing=2, coarse_sweeps=40, min_size=4, direct_size=1024):
+        super().__init__(max_iterations, tolerance)
+        self.smoothing = smoothing
+        self.coarse_sweeps = coarse_sweeps
+        self.min_size = min_size
+        self.direct_size = direct_size
+
+    def prepare(self, shape, dtype):
+        super().prepare(shape, dtype)
+        self.levels = []
+        while True:
+            level = {
+                "e": np.zeros(shape, dtype),
+                "rhs": np.zeros(shape, dtype),
+                "r": np.empty(shape, dtype),
+                "masks": checkerboard(shape),
+            }
+            self.levels.append(level)
+            if shape[0] % 2 or shape[1] % 2 or min(shape) // 2 < self.min_size:
+                break
+            shape = (shape[0] // 2, shape[1] // 2)
+        self.coarse_inverse = None
+        if shape[0] * shape[1] <= self.direct_size:
+            # The walls make the operator singular, the pseudo-inverse picks the zero-mean pressure
+            size = shape[0] * shape[1]
+            laplacian = np.empty((size, size))
+            unit = np.zeros(size)
+            column = np.empty(shape)
+            for k in range(size):
+                unit[k] = 1
+                residual(unit.reshape(shape), np.zeros(shape), column)
+                laplacian[:, k] = -column.ravel()
+                unit[k] = 0
+            self.coarse_inverse = np.linalg.pinv(laplacian).astype(dtype)
+
+    def smooth(self, p, rhs, level, sweeps, pool):
+        s = level["r"]
+
+        def sweep(ws, lo, hi, mask):
+            neighbour_sum(p, s, lo, hi, ws)
+            band = s[lo:hi]
+            band -= rhs[lo:hi]
+            band *= 0.25
+            np.copyto(p[lo:hi], band, where=mask[lo:hi])
+
+        for _ in range(sweeps):
+            for mask in level["masks"]:
+                pool.run(sweep, p.shape[0], mask)
+
+    def v_cycle(self, depth, p, rhs, pool):
+        level = self.levels[depth]
+        if depth == len(self.levels) - 1:
+            if self.coarse_inverse is not None:
+                np.matmul(self.coarse_inverse, rhs.ravel(), out=p.ravel())
+            else:
+                self.smooth(p, rhs, level, self.coarse_sweeps, pool)
+            return
+        self.smooth(p, rhs, level, self.smoothing, pool)
+
+        coarse = self.levels[depth + 1]
+        nx, ny = coarse["rhs"].shape
+
+        # Bands run over coarse rows, each one covering two fine rows
+        def restrict(ws, lo, hi):
+            r = residual(p, rhs, level["r"], 2 * lo, 2 * hi, ws)[2 * lo:2 * hi]
+            # Average the 2x2 blocks; the coarse cells are twice as wide, hence the 4
+            np.sum(r.reshape(hi - lo, 2, ny, 2), axis=(1, 3), out=coarse["rhs"][lo:hi])
+            coarse["e"][lo:hi].fill(0)
+
+        def prolong(ws, lo, hi):
+            # Copy every coarse cell out to its block first; adding it broadcast would make NumPy buffer it
+            blocks = ws.get("blocks", (2 * (hi - lo), 2 * ny))
+            spread = blocks.reshape(hi - lo, 2, ny, 2)
+            for i in (0, 1):
+                for j in (0, 1):
+                    spread[:, i, :, j] = coarse["e"][lo:hi]
+            p[2 * lo:2 * hi] += blocks
+
+        pool.run(restrict, nx)
+        self.v_cycle(depth + 1, coarse["e"], coarse["rhs"], pool)
+        pool.run(prolong, nx)
+
+        self.smooth(p, rhs, level, self.smoothing, pool)
+
+    def run(self, p, rhs, pool):
+        self.v_cycle(0, p, rhs, pool)
+        return 1
+
+
+# Every solver by name; FluidScene only cycles through the ones fast enough for a frame
+POISSON_SOLVERS = {
+    "jacobi": JacobiSolver,
+    "sor": RedBlackSORSolver,
+    "multigrid": MultigridSolver,
+}
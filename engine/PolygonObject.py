@@ -1,5 +1,56 @@
 import random
 import pygame
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+
+
+class PolygonGeometry:
+    """Everything worked out from a polygon's vertices, for one position of the polygon.
+
+    Edge k runs from vertex k to vertex k + 1. ``directions`` are the edges
+    as unit vectors and ``normals`` are those turned a quarter turn, as
+    SoftBody.handle_collision pushes along them. With NumPy, ``crossing_edges``
+    holds the same edges as columns from vertex k - 1 to vertex k, the way
+    the point-in-polygon test walks them.
+    """
+
+    def __init__(self, vertices):
+        count = len(vertices)
+        self.points = [(int(v.x), int(v.y)) for v in vertices]  # Integer pixels for pygame.draw
+        self.edges = [(pygame.Vector2(vertices[k]), pygame.Vector2(vertices[(k + 1) % count])) for k in range(count)]
+        self.directions = []
+        for start, end in self.edges:
+            edge = end - start
+            # A zero-length edge has no direction; it can never be crossed either
+            self.directions.append(edge.normalize() if edge.length_squared() > 0 else edge)
+        self.normals = [pygame.Vector2(-d.y, d.x) for d in self.directions]
+
+        xs = [v.x for v in vertices]
+        ys = [v.y for v in vertices]
+        self.box = (min(xs), min(ys), max(xs), max(ys))  # (left, top, right, bottom)
+        # Shoelace formula for the area and centroid, whichever way the vertices wind
+        twice_area = 0.0
+        cx = cy = 0.0
+        for (x0, y0), (x1, y1) in zip(zip(xs, ys), zip(xs[1:] + xs[:1], ys[1:] + ys[:1])):
+            cross = x0 * y1 - x1 * y0
+            twice_area += cross
+            cx += (x0 + x1) * cross
+            cy += (y0 + y1) * cross
+        self.area = abs(twice_area) / 2
+        if twice_area:
+            self.centroid = pygame.Vector2(cx / (3 * twice_area), cy / (3 * twice_area))
+        else:
+            self.centroid = pygame.Vector2(sum(xs) / count, sum(ys) / count)
+
+        if HAS_NUMPY:
+            xi = np.array(xs)[:, None]
+            yi = np.array(ys)[:, None]
+            self.crossing_edges = (xi, yi, np.roll(xi, 1, axis=0), np.roll(yi, 1, axis=0))
+
 
 class PolygonObject:
     def __init__(self, vertices):
@@ -7,16 +58,34 @@ class PolygonObject:
         self.color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))  # Random color
         self.dragging = False 
         self.drag_offset = pygame.Vector2(10, 10) 
+        self.cache = None  # PolygonGeometry, until the polygon moves
 
 
     def draw(self, screen):
-        pygame.draw.polygon(screen, self.color, [(int(v.x), int(v.y)) for v in self.vertices])
-        pygame.draw.polygon(screen, (0, 0, 0), [(int(v.x), int(v.y)) for v in self.vertices], 1)  # Black border
+        points = self.geometry().points
+        pygame.draw.polygon(screen, self.color, points)
+        pygame.draw.polygon(screen, (0, 0, 0), points, 1)  # Black border
+
+
+    def geometry(self):
+        """The polygon's PolygonGeometry, worked out again only after a move.
 
+        Vertices must only be moved through move(), or the cache goes stale.
+        """
+        if self.cache is None:
+            self.cache = PolygonGeometry(self.vertices)
+        return self.cache
+
+    def bounding_box(self):
+        """(left, top, right, bottom) of the vertices."""
+        return self.geometry().box
 
     def is_point_inside(self, point):
         # Ray casting algorithm to check point inside polygon
         x, y = point
+        left, top, right, bottom = self.geometry().box
+        if not (left <= x <= right and top < y <= bottom):
+            return False
         odd_nodes = False
         j = len(self.vertices) - 1
         for i in range(len(self.vertices)):
@@ -28,6 +97,35 @@ class PolygonObject:
             j = i
         return odd_nodes
 
+    def contains_points(self, points):
+        """is_point_inside for a whole (n, 2) array of points at once, as a bool mask.
+
+        Points outside the bounding box are rejected first; the rest go
+        through the same crossing test against every edge in one broadcast.
+        Without NumPy this is a list of is_point_inside results.
+        """
+        if not HAS_NUMPY:
+            return [self.is_point_inside(point) for point in points]
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x, y = points[:, 0], points[:, 1]
+        geometry = self.geometry()
+        left, top, right, bottom = geometry.box
+        inside = np.zeros(len(points), bool)
+        # Only edges with top < y <= bottom straddle the point, and a point left or right of the box crosses none or all of them
+        candidates = np.flatnonzero((x >= left) & (x <= right) & (y > top) & (y <= bottom))
+        if len(candidates) == 0:
+            return inside
+        x = x[candidates]
+        y = y[candidates]
+        # Edges down the rows, points across
+        xi, yi, xj, yj = geometry.crossing_edges
+        straddles = (yi < y) != (yj < y)
+        # Horizontal edges never straddle, so their zero division is masked out
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossings = straddles & (xi + (y - yi) / (yj - yi) * (xj - xi) < x)
+        inside[candidates] = np.count_nonzero(crossings, axis=0) % 2 == 1
+        return inside
+
     def handle_interaction(self, events, mouse_position):
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -40,10 +138,10 @@ class PolygonObject:
         
         if self.dragging:
             delta_move = mouse_position - self.vertices[0] - self.offset  # Calculate the movement based on the initial offset
-            for vertex in self.vertices:
-                vertex += delta_move
+            self.move(delta_move.x, delta_move.y)
 
     def move(self, x_offset, y_offset):
         for vertex in self.vertices:
             vertex.x += x_offset
-            vertex.y += y_offset
\ No newline at end of file
+            vertex.y += y_offset
+        self.cache = None
\ No newline at end of file
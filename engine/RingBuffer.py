@@ -0,0 +1,44 @@
+from array import array
+
+
+class RingBuffer:
+    """The last ``capacity`` (x, y) points, kept in two fixed arrays that never grow or shift.
+
+    Appending past capacity overwrites the oldest point. Indexing and
+    iteration run from oldest to newest, so ``buffer[-1]`` is the latest.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.xs = array("d", bytes(8 * capacity))
+        self.ys = array("d", bytes(8 * capacity))
+        self.start = 0  # Slot of the oldest point
+        self.count = 0
+
+    def append(self, point):
+        end = (self.start + self.count) % self.capacity
+        self.xs[end], self.ys[end] = point
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("ring buffer index out of range")
+        slot = (self.start + index) % self.capacity
+        return self.xs[slot], self.ys[slot]
+
+    def __iter__(self):
+        for index in range(self.count):
+            slot = (self.start + index) % self.capacity
+            yield self.xs[slot], self.ys[slot]
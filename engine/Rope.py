@@ -0,0 +1,330 @@
+import math
+from array import array
+from .ParticleSystem import HAS_NUMPY, np
+
+# A rope of springs hanging from a fixed anchor, as one set of node arrays.
+# Node 0 is the anchor and link i joins node i to node i + 1, so a link's
+# anchor is the end of the link before it by construction.
+#
+# Every step is implicit in the springs (compliant constraints, Servin et al.
+# 2006, solved by fast projection, Goldenthal et al. 2007). The nodes first
+# move freely under gravity to predicted positions p. Each link i then pulls
+# its two nodes along its unit direction u_i with a tension lambda_i, and
+# the tensions are chosen so that, with a = 1 / (h^2 k_i),
+#
+#     C_i(p) + a lambda_i = 0,   C_i = |p_(i+1) - p_i| - rest_i
+#
+# i.e. Hooke's law holds at the end of the step. A tension moves only the
+# two nodes of its link, so linearising C about p couples each link to its
+# neighbours alone and every correction is one tridiagonal solve,
+#
+#     (J W J^T + a) d_lambda = -C(p) - a lambda
+#
+# with W the inverse node masses. Link i's row has w_i + w_(i+1) + a on the
+# diagonal and -w_(i+1) u_i . u_(i+1) beside it, where it shares node
+# i + 1 with the next link. The Thomas algorithm solves it in O(N); long
+# ropes use cyclic reduction instead, the same elimination done a half of
+# the rows at a time so NumPy can do each half at once. p moves by
+# W J^T d_lambda and the solve repeats until Hooke's law holds to a
+# tolerance, and the velocity is what the move took.
+#
+# The linearisation only sees motion along the links, so the solve cannot
+# follow a link turning most of the way round in one step, nor a rope so
+# taut that a sideways kink runs several links along it in one step; both
+# make it overshoot into kinks it never converges out of. A step is
+# therefore cut into substeps, enough that no node moves more than half
+# the shortest link in one and that a sideways wave, at the speed the last
+# substep's tensions give it, crosses at most WAVE_LINKS links. A substep
+# that still runs out of solves pulls every link back to the length its
+# last tension stretched it to, so a rope past its limits sags rather than
+# stretching without bound. A node held by a drag gets infinite mass and
+# moves to where it is held a piece per substep, so the links around it
+# take all the strain.
+#
+# Times are in frames and lengths in pixels, as they were for Spring.
+
+# Ropes with fewer links than this solve with thomas on lists, which beats the array overhead
+SHORT_ROPE = 500
+# Links a sideways wave may cross in one substep before the solve stops converging
+WAVE_LINKS = 2.0
+
+
+def thomas(lower, diagonal, upper, rhs):
+    """Solve a tridiagonal system given as lists, lower[i] and upper[i] beside diagonal[i + 1] and diagonal[i]."""
+    n = len(diagonal)
+    if n == 0:
+        return []
+    scaled = [0.0] * n  # upper[i] over the eliminated diagonal
+    solution = [0.0] * n
+    pivot = diagonal[0]
+    scaled[0] = upper[0] / pivot if n > 1 else 0.0
+    solution[0] = rhs[0] / pivot
+    for i in range(1, n):
+        below = lower[i - 1]
+        pivot = diagonal[i] - below * scaled[i - 1]
+        if i < n - 1:
+            scaled[i] = upper[i] / pivot
+        solution[i] = (rhs[i] - below * solution[i - 1]) / pivot
+    for i in range(n - 2, -1, -1):
+        solution[i] -= scaled[i] * solution[i + 1]
+    return solution
+
+
+def cyclic_reduction(lower, diagonal, upper, rhs):
+    """The same solve as ``thomas`` for NumPy arrays: cyclic reduction, a few array operations per halving."""
+    return reduce_rows(np.concatenate(([0.0], lower)), diagonal, np.concatenate((upper, [0.0])), rhs)
+
+
+def reduce_rows(a, b, c, d):
+    # Row i is a[i] x[i - 1] + b[i] x[i] + c[i] x[i + 1] = d[i]. Every odd row
+    # takes in its even neighbours, leaving a system half the size in the odd
+    # unknowns; the even ones then follow from their rows.
+    n = len(b)
+    if n == 1:
+        return d / b
+    if n % 2 == 0:
+        a, b, c, d = (np.append(v, fill) for v, fill in ((a, 0.0), (b, 1.0), (c, 0.0), (d, 0.0)))
+    alpha = -a[1::2] / b[0:-1:2]
+    gamma = -c[1::2] / b[2::2]
+    odd = reduce_rows(alpha * a[0:-1:2], b[1::2] + alpha * c[0:-1:2] + gamma * a[2::2],
+                      gamma * c[2::2], d[1::2] + alpha * d[0:-1:2] + gamma * d[2::2])
+    x = np.zeros(len(b) + 1)
+    x[1:-1:2] = odd
+    x[0:-1:2] = (d[0::2] - a[0::2] * np.concatenate(([0.0], odd)) - c[0::2] * x[1::2]) / b[0::2]
+    return x[:n]
+
+
+def shorten_arrays(px, py, lengths, fixed):
+    """Pull every link longer than ``lengths`` back to it along its own direction.
+
+    ``fixed`` are the nodes that may not move, in order and starting with the
+    anchor. Past the last one the rope just follows the shortened links;
+    between two of them whatever gap the shortening opens is shared evenly
+    over the links in between.
+    """
+    dx, dy = np.diff(px), np.diff(py)
+    length = np.hypot(dx, dy)
+    scale = np.minimum(1.0, np.divide(lengths, length, out=np.ones_like(length), where=length > 0))
+    last = fixed[-1]
+    for p, d in ((px, dx * scale), (py, dy * scale)):
+        for a, b in zip(fixed, fixed[1:]):
+            chain = np.concatenate(([0.0], np.cumsum(d[a:b]))) + p[a]
+            p[a:b + 1] = chain + (p[b] - chain[-1]) * np.linspace(0.0, 1.0, b - a + 1)
+        p[last + 1:] = np.cumsum(d[last:]) + p[last]
+
+
+def shorten_lists(px, py, lengths, fixed):
+    """``shorten_arrays`` for lists."""
+    n = len(lengths)
+    scale = [1.0] * n
+    for i in range(n):
+        length = math.hypot(px[i + 1] - px[i], py[i + 1] - py[i])
+        if length > lengths[i]:
+            scale[i] = lengths[i] / length
+    for p in (px, py):
+        d = [(p[i + 1] - p[i]) * scale[i] for i in range(n)]
+        for a, b in zip(fixed, fixed[1:]):
+            chain = [p[a]]
+            for i in range(a, b):
+                chain.append(chain[-1] + d[i])
+            gap = p[b] - chain[-1]
+            for j, value in enumerate(chain):
+                p[a + j] = value + gap * j / (b - a)
+        for i in range(fixed[-1], n):
+            p[i + 1] = p[i] + d[i]
+
+
+class Rope:
+    def __init__(self, anchor, bounds, gravity=0.0, damping=0.9, iterations=40, tolerance=1e-3, max_substeps=64):
+        self.bounds = bounds  # (width, height) the nodes stay inside
+        self.gravity = gravity  # Pixels per frame per frame
+        self.damping = damping  # Velocity kept after every step
+        self.iterations = iterations  # Most tridiagonal solves per substep before the links are clamped to length
+        self.tolerance = tolerance  # Strain, past Hooke's law, under which a substep stops solving early
+        self.max_substeps = max_substeps  # Most pieces a step is cut into; past it a rope leans on the clamp instead of costing more
+        self.vectorized = HAS_NUMPY
+        self.held = None  # (node, x, y) a drag pins for the next step
+        self.last_substeps = 0
+        self.last_iterations = 0  # Tridiagonal solves the last step took, over all its substeps
+        self.x = self.y = self.vx = self.vy = self.inverse_mass = None
+        self.rest = self.k = None
+        self.tensions = None  # Pull along each link at the end of the last substep, in mass pixels per frame^2
+        self.set_columns([anchor[0]], [anchor[1]], [0.0], [0.0], [0.0], [], [])
+
+    def set_columns(self, x, y, vx, vy, inverse_mass, rest, k):
+        columns = (x, y, vx, vy, inverse_mass, rest, k)
+        if self.vectorized:
+            columns = [np.array(column, dtype=float) for column in columns]
+        else:
+            columns = [array("d", column) for column in columns]
+        self.x, self.y, self.vx, self.vy, self.inverse_mass, self.rest, self.k = columns
+        self.tensions = np.zeros(len(self.rest)) if self.vectorized else array("d", [0.0]) * len(self.rest)
+
+    def __len__(self):
+        return len(self.rest)
+
+    def add_links(self, count, length, k, mass=1.0):
+        """Hang ``count`` links straight down from the last node and return the index of the first."""
+        first = len(self)
+        x, y = self.x[-1], self.y[-1]
+        below = [y + length * (i + 1) for i in range(count)]
+        self.set_columns(list(self.x) + [x] * count, list(self.y) + below,
+                         list(self.vx) + [0.0] * count, list(self.vy) + [0.0] * count,
+                         list(self.inverse_mass) + [1.0 / mass] * count,
+                         list(self.rest) + [length] * count, list(self.k) + [k] * count)
+        return first
+
+    def add_link(self, length, k, mass=1.0):
+        return self.add_links(1, length, k, mass)
+
+    def remove_link(self):
+        """Take the last link and its node off the rope."""
+        self.set_columns(self.x[:-1], self.y[:-1], self.vx[:-1], self.vy[:-1],
+                         self.inverse_mass[:-1], self.rest[:-1], self.k[:-1])
+
+    def hold(self, node, x, y):
+        """Pin ``node`` at (x, y) for the next step; None as the node lets go."""
+        self.held = None if node is None else (node, x, y)
+
+    def step(self, h=1.0):
+        """Move the rope on by ``h`` frames, in substeps short enough for every node and sideways wave to keep up."""
+        if not len(self):
+            return
+        weights = self.inverse_mass
+        if self.vectorized:
+            motion = float(np.max(np.hypot(self.vx, self.vy))) * h + abs(self.gravity) * h * h
+            shortest = float(np.min(self.rest))
+            sway = float(np.max(self.tensions * np.maximum(weights[:-1], weights[1:]) / self.rest))
+        else:
+            motion = max(math.hypot(vx, vy) for vx, vy in zip(self.vx, self.vy)) * h + abs(self.gravity) * h * h
+            shortest = min(self.rest)
+            sway = max(t * max(weights[i], weights[i + 1]) / rest
+                       for i, (t, rest) in enumerate(zip(self.tensions, self.rest)))
+        if self.held is not None:
+            node, x, y = self.held
+            start_x, start_y = self.x[node], self.y[node]
+            motion = max(motion, math.hypot(x - start_x, y - start_y))
+        # A sideways wave runs at sqrt(tension / mass per length), so crosses h sqrt(t w / rest) links a step
+        waves = h * math.sqrt(max(sway, 0.0)) / WAVE_LINKS
+        substeps = min(self.max_substeps, max(1, math.ceil(2 * motion / max(shortest, 1e-9)), math.ceil(waves)))
+        self.last_substeps = substeps
+        self.last_iterations = 0
+        damping = self.damping ** (1 / substeps)
+        held = None
+        for substep in range(1, substeps + 1):
+            if self.held is not None:
+                t = substep / substeps
+                held = (node, start_x + t * (x - start_x), start_y + t * (y - start_y))
+            if self.vectorized:
+                self.step_arrays(h / substeps, damping, held)
+            else:
+                self.step_lists(h / substeps, damping, held)
+
+    def step_arrays(self, h, damping, held):
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        weights = self.inverse_mass.copy()
+        if held is not None:
+            node, x[node], y[node] = held
+            vx[node] = vy[node] = 0.0
+            weights[node] = 0.0
+        px = x + h * vx
+        py = y + h * (vy + h * self.gravity * (weights > 0))
+
+        compliance = 1.0 / (h * h * self.k)
+        tensions = np.zeros(len(self))
+        for solve in range(self.iterations + 1):
+            ux = np.diff(px)
+            uy = np.diff(py)
+            length = np.hypot(ux, uy)
+            # A link with both ends on one spot has no direction; it pulls straight down
+            inverse = np.divide(1.0, length, out=np.zeros_like(length), where=length > 0)
+            ux *= inverse
+            uy = np.where(length > 0, uy * inverse, 1.0)
+            residual = length - self.rest + compliance * tensions
+            if np.max(np.abs(residual) / self.rest) < self.tolerance:
+                self.tensions = tensions / (-h * h)
+                break
+            if solve == self.iterations:
+                # Out of solves: take the links back to what the last tensions stretched them to
+                shorten_arrays(px, py, self.rest + np.maximum(self.tensions, 0.0) / self.k, np.flatnonzero(weights == 0))
+                self.tensions = (np.hypot(np.diff(px), np.diff(py)) - self.rest) * self.k
+                break
+            diagonal = weights[:-1] + weights[1:] + compliance
+            beside = -weights[1:-1] * (ux[:-1] * ux[1:] + uy[:-1] * uy[1:])
+            if len(self) < SHORT_ROPE:
+                change = np.array(thomas(beside.tolist(), diagonal.tolist(), beside.tolist(), (-residual).tolist()))
+            else:
+                change = cyclic_reduction(beside, diagonal, beside, -residual)
+            tensions += change
+            # Each tension pushes its link's far node along u and its near node back
+            for p, u in ((px, ux), (py, uy)):
+                move = change * u
+                p[1:] += weights[1:] * move
+                p[:-1] -= weights[:-1] * move
+            self.last_iterations += 1
+
+        vx[:] = (px - x) * (damping / h)
+        vy[:] = (py - y) * (damping / h)
+        x[:] = px
+        y[:] = py
+        width, height = self.bounds
+        for p, v, high in ((x, vx, width), (y, vy, height)):
+            v[(p < 0) | (p > high)] = 0
+            np.clip(p, 0, high, out=p)
+
+    def step_lists(self, h, damping, held):
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        n = len(self)
+        weights = list(self.inverse_mass)
+        if held is not None:
+            node, x[node], y[node] = held
+            vx[node] = vy[node] = 0.0
+            weights[node] = 0.0
+        px = [x[i] + h * vx[i] for i in range(n + 1)]
+        py = [y[i] + h * (vy[i] + (h * self.gravity if weights[i] > 0 else 0.0)) for i in range(n + 1)]
+
+        compliance = [1.0 / (h * h * k) for k in self.k]
+        tensions = [0.0] * n
+        for solve in range(self.iterations + 1):
+            ux, uy, residual = [0.0] * n, [1.0] * n, [0.0] * n
+            for i in range(n):
+                dx, dy = px[i + 1] - px[i], py[i + 1] - py[i]
+                length = (dx * dx + dy * dy) ** 0.5
+                if length > 0:
+                    ux[i], uy[i] = dx / length, dy / length
+                residual[i] = length - self.rest[i] + compliance[i] * tensions[i]
+            if max(abs(r) / rest for r, rest in zip(residual, self.rest)) < self.tolerance:
+                self.tensions = array("d", (t / (-h * h) for t in tensions))
+                break
+            if solve == self.iterations:
+                lengths = [rest + max(t, 0.0) / k for rest, t, k in zip(self.rest, self.tensions, self.k)]
+                shorten_lists(px, py, lengths, [i for i in range(n + 1) if weights[i] == 0])
+                self.tensions = array("d", ((math.hypot(px[i + 1] - px[i], py[i + 1] - py[i]) - self.rest[i]) * self.k[i]
+                                            for i in range(n)))
+                break
+            diagonal = [weights[i] + weights[i + 1] + compliance[i] for i in range(n)]
+            beside = [-weights[i + 1] * (ux[i] * ux[i + 1] + uy[i] * uy[i + 1]) for i in range(n - 1)]
+            change = thomas(beside, diagonal, beside, [-r for r in residual])
+            for i, c in enumerate(change):
+                tensions[i] += c
+                for p, u in ((px, ux), (py, uy)):
+                    p[i + 1] += weights[i + 1] * c * u[i]
+                    p[i] -= weights[i] * c * u[i]
+            self.last_iterations += 1
+
+        width, height = self.bounds
+        for i in range(n + 1):
+            vx[i] = (px[i] - x[i]) * damping / h
+            vy[i] = (py[i] - y[i]) * damping / h
+            x[i], y[i] = px[i], py[i]
+            for p, v, high in ((x, vx, width), (y, vy, height)):
+                if p[i] < 0 or p[i] > high:
+                    p[i] = min(max(p[i], 0.0), high)
+                    v[i] = 0.0
+
+    def stretch(self):
+        """Largest length over rest length among the links."""
+        if self.vectorized:
+            return float(np.max(np.hypot(np.diff(self.x), np.diff(self.y)) / self.rest)) if len(self) else 1.0
+        return max((((self.x[i + 1] - self.x[i]) ** 2 + (self.y[i + 1] - self.y[i]) ** 2) ** 0.5 / self.rest[i]
+                    for i in range(len(self))), default=1.0)
@@ -0,0 +1,225 @@
+import math
+import numpy as np
+
+# Smoothed-particle hydrodynamics in screen units (pixels, seconds), solved
+# as position-based fluids (Macklin and Mueller 2013). Density comes from the
+# poly6 kernel; pressure is a per-particle density constraint that a few Jacobi
+# iterations push back towards rest density along the spiky gradient;
+# viscosity is XSPH velocity smoothing. Unlike explicit pressure forces, this
+# stays stable at one step per frame.
+#
+# Particles are a struct of arrays with one array per component, since
+# gathering from flat arrays is far cheaper than from an (n, 2) block.
+# Neighbours come from a uniform spatial hash with cells one smoothing radius
+# wide. Every term is computed for all neighbour pairs at once and summed per
+# particle with bincount.
+
+
+class SPHFluid:
+    def __init__(self, bounds, smoothing_radius=10.0, mass=1.0, iterations=2, viscosity=0.3, gravity=(0.0, 600.0), relaxation=1.0):
+        self.bounds = bounds  # (width, height)
+        self.h = smoothing_radius
+        self.mass = mass
+        self.iterations = iterations  # Density solver sweeps per step
+        self.viscosity = viscosity  # XSPH share of the neighbours' relative velocity
+        self.gravity = gravity
+        self.relaxation = relaxation  # Softens the density constraint, relative to its stiffness at rest
+        self.rest_density = None  # Set from the first block of particles added
+        self.softening = 0.0
+
+        h = smoothing_radius
+        self.poly6 = 4 / (math.pi * h ** 8)
+        self.spiky_gradient = -30 / (math.pi * h ** 5)
+        self.hash_shape = (math.ceil(bounds[0] / h), math.ceil(bounds[1] / h))
+
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.density = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.pairs = (np.zeros(0, np.intp), np.zeros(0, np.intp))
+
+    @classmethod
+    def from_arrays(cls, x, y, bounds, vx=None, vy=None, **kwargs):
+        """Build a fluid straight from arrays of particle positions and, optionally, velocities."""
+        fluid = cls(bounds, **kwargs)
+        velocities = None if vx is None else np.column_stack([vx, vy])
+        fluid.add(np.column_stack([x, y]), velocities)
+        return fluid
+
+    @property
+    def count(self):
+        return len(self.x)
+
+    def add(self, positions, velocities=None):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        velocities = np.zeros_like(positions) if velocities is None else np.asarray(velocities, dtype=float).reshape(-1, 2)
+        self.x = np.concatenate([self.x, positions[:, 0]])
+        self.y = np.concatenate([self.y, positions[:, 1]])
+        self.vx = np.concatenate([self.vx, velocities[:, 0]])
+        self.vy = np.concatenate([self.vy, velocities[:, 1]])
+        if self.rest_density is None and len(positions):
+            # Rest is however dense the particles were packed to begin with
+            self.find_neighbours()
+            self.rest_density = 1.0
+            geometry = self.pair_geometry()
+            self.rest_density = float(np.median(self.compute_density(geometry)))
+            stiffness = self.constraint_stiffness(*self.pair_gradients(geometry))
+            self.softening = self.relaxation * float(np.median(stiffness))
+
+    def find_neighbours(self):
+        """Sort particles by hash cell and list every pair closer than the smoothing radius once.
+
+        Returns the permutation the store was sorted with.
+        """
+        h = self.h
+        gx, gy = self.hash_shape
+        cx = np.clip((self.x // h).astype(np.intp), 0, gx - 1)
+        cy = np.clip((self.y // h).astype(np.intp), 0, gy - 1)
+        key = cx * gy + cy
+        # Reorder the store by cell, so each cell's particles are one contiguous run
+        order = np.argsort(key, kind="stable")
+        self.x, self.y, self.vx, self.vy = self.x[order], self.y[order], self.vx[order], self.vy[order]
+        key, cx, cy = key[order], cx[order], cy[order]
+        counts = np.bincount(key, minlength=gx * gy)
+        starts = np.cumsum(counts) - counts
+
+        index = np.arange(self.count)
+        owners, partners = [], []
+        # The same cell, later particles only
+        later = starts[key] + counts[key] - 1 - index
+        owners.append(np.repeat(index, later))
+        partners.append(owners[-1] + 1 + ranks(later))
+        # Half of the surrounding cells, so every pair turns up once
+        for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):
+            nx = cx + dx
+            ny = cy + dy
+            valid = (nx < gx) & (ny >= 0) & (ny < gy)
+            other = np.where(valid, nx * gy + ny, 0)
+            found = np.where(valid, counts[other], 0)
+            owners.append(np.repeat(index, found))
+            partners.append(np.repeat(starts[other], found) + ranks(found))
+        i = np.concatenate(owners)
+        j = np.concatenate(partners)
+        dx = self.x[i] - self.x[j]
+        dy = self.y[i] - self.y[j]
+        close = dx * dx + dy * dy < h * h
+        self.pairs = (i[close], j[close])
+        return order
+
+    def pair_geometry(self):
+        """Offsets from j to i and their lengths for every pair."""
+        i, j = self.pairs
+        dx = self.x[i] - self.x[j]
+        dy = self.y[i] - self.y[j]
+        r = np.sqrt(dx * dx + dy * dy)
+        return dx, dy, r
+
+    def compute_density(self, geometry):
+        i, j = self.pairs
+        n = self.count
+        r = geometry[2]
+        w = np.maximum(self.h * self.h - r * r, 0) ** 3
+        self.weights = w  # Kept for viscosity, which runs after the last density sweep
+        total = np.bincount(i, w, n) + np.bincount(j, w, n)
+        total += self.h ** 6  # Every particle counts itself at distance 0
+        self.density = self.mass * self.poly6 * total
+        return self.density
+
+    def pair_gradients(self, geometry):
+        """Spiky kernel gradient of every pair, over rest density."""
+        dx, dy, r = geometry
+        gap = np.maximum(self.h - r, 0)
+        scale = self.mass * self.spiky_gradient * gap * gap / (self.rest_density * np.maximum(r, 1e-6))
+        return dx * scale, dy * scale
+
+    def constraint_stiffness(self, gx, gy):
+        """Each particle's sum of squared density constraint gradients."""
+        i, j = self.pairs
+        n = self.count
+        # A particle's own gradient is the sum over its pairs; each neighbour's is one pair term
+        own_x = np.bincount(i, gx, n) - np.bincount(j, gx, n)
+        own_y = np.bincount(i, gy, n) - np.bincount(j, gy, n)
+        squared = gx * gx + gy * gy
+        return own_x * own_x + own_y * own_y + np.bincount(i, squared, n) + np.bincount(j, squared, n)
+
+    def solve_density(self, stiffness=None):
+        """One Jacobi sweep of the density constraint: move particles so none is denser than rest.
+
+        Returns each particle's constraint stiffness, which barely changes over
+        a step and can be passed back in for the later sweeps.
+        """
+        i, j = self.pairs
+        n = self.count
+        geometry = self.pair_geometry()
+        density = self.compute_density(geometry)
+        gx, gy = self.pair_gradients(geometry)
+        if stiffness is None:
+            stiffness = self.constraint_stiffness(gx, gy)
+        # Only push apart; pulling spread-out particles together clumps them at the surface
+        error = np.maximum(density / self.rest_density - 1, 0)
+        scale = -error / (stiffness + self.softening)
+        both = scale[i] + scale[j]
+        self.x += np.bincount(i, both * gx, n) - np.bincount(j, both * gx, n)
+        self.y += np.bincount(i, both * gy, n) - np.bincount(j, both * gy, n)
+        return stiffness
+
+    def apply_viscosity(self):
+        """XSPH: nudge every particle's velocity towards its neighbours', weighted by the poly6 kernel."""
+        i, j = self.pairs
+        n = self.count
+        w = self.weights * (self.viscosity * self.mass * self.poly6 / self.rest_density)
+        for v in (self.vx, self.vy):
+            share = (v[j] - v[i]) * w
+            v += np.bincount(i, share, n) - np.bincount(j, share, n)
+
+    def push(self, point, radius, strength):
+        """Shove particles within ``radius`` of ``point`` outwards, harder the closer they are."""
+        dx = self.x - point[0]
+        dy = self.y - point[1]
+        distance = np.sqrt(dx * dx + dy * dy)
+        near = distance < radius
+        falloff = strength * (1 - distance[near] / radius) / np.maximum(distance[near], 1e-6)
+        self.vx[near] += dx[near] * falloff
+        self.vy[near] += dy[near] * falloff
+
+    def step(self, dt):
+        if self.count == 0:
+            return
+        self.vx += self.gravity[0] * dt
+        self.vy += self.gravity[1] * dt
+        x_before, y_before = self.x.copy(), self.y.copy()
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.collide_walls()
+        # Neighbours of the predicted positions, which is where the density is solved
+        order = self.find_neighbours()
+        x_before, y_before = x_before[order], y_before[order]
+        stiffness = None
+        for _ in range(self.iterations):
+            stiffness = self.solve_density(stiffness)
+            self.collide_walls()
+        # Velocities follow from where the particles ended up
+        np.subtract(self.x, x_before, out=self.vx)
+        np.subtract(self.y, y_before, out=self.vy)
+        self.vx /= dt
+        self.vy /= dt
+        self.apply_viscosity()
+
+    def collide_walls(self):
+        """Mirror particles that crossed a wall back inside.
+
+        Clamping would stack them on the same wall coordinate, and particles on
+        top of each other give the density constraint no direction to push in.
+        """
+        for p, high in ((self.x, self.bounds[0]), (self.y, self.bounds[1])):
+            np.abs(p, out=p)
+            np.minimum(p, 2 * high - p, out=p)
+            np.clip(p, 0, high, out=p)
+
+
+def ranks(counts):
+    """0, 1, ... counts[k] - 1 for every k, flattened; the arange half of repeat/arange pair expansion."""
+    total = counts.sum()
+    return np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
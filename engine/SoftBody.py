@@ -1,20 +1,66 @@
 import pygame
 import math
 from .Particle import Particle
+from .ParticleSystem import ParticleSystem, np, HAS_NUMPY
+from .Broadphase import SweepAndPrune
+from .Islands import Islands
 from .SoftSpring import SoftSpring
+from .config import config
+if HAS_NUMPY:
+    from .XPBDSolver import XPBDSolver
+    from .ImplicitSolver import ImplicitSolver
+
+# The dots SoftSpring.draw puts along a spring sit at these fractions of its
+# length: its Bezier control points lie on the straight line between the ends
+BEZIER_STEPS = [3 * (1 - t) ** 2 * t * 0.3 + 3 * (1 - t) * t ** 2 * 0.7 + t ** 3 for t in (k / 10 for k in range(10))]
 
 
 class SoftBody:
-    def __init__(self, x, y, width, height, particle_mass, spring_stiffness, num_particles, polygons, screen_width=800, screen_height=600):
+    def __init__(self, x, y, width, height, particle_mass, spring_stiffness, num_particles, polygons, screen_width=800, screen_height=600, mesh=None):
         self.SCREEN_WIDTH = screen_width
         self.SCREEN_HEIGHT = screen_height
         self.initial_relative_positions = []
-        self.particles = self.create_particles(x, y, width, height, particle_mass, num_particles)
-        self.springs = self.create_springs(5.0)  # Adjust this value as needed
+        self.system = ParticleSystem((screen_width, screen_height))
+        # An n x n lattice unless a Mesh is given, which is fitted into the same box
+        if mesh is None:
+            self.particles = self.create_particles(x, y, width, height, particle_mass, num_particles)
+            self.springs = self.create_springs(5.0)  # Adjust this value as needed
+        else:
+            self.particles, self.springs = self.create_mesh(mesh.fit(x, y, width, height), particle_mass, 5.0)
         self.polygons = polygons
+        self.broadphase = SweepAndPrune()
         self.dragging = False
         self.dragged_particle = None
         self.spring_stiffness = spring_stiffness
+        self.spring_passes = 5  # Rounds of spring forces per step
+        # "explicit" sums spring forces; "xpbd" solves the springs as constraints and "implicit" takes
+        # backward Euler steps, both of which need NumPy
+        self.solver = "explicit"
+        self.xpbd = None
+        self.implicit = None
+        if self.system.vectorized:
+            self.xpbd = XPBDSolver(self.system, stiffness_scale=0.1 * self.spring_passes)
+            self.implicit = ImplicitSolver(
+                self.system, stiffness_scale=0.1 * self.spring_passes, damping=0.1 * self.spring_passes,
+                iterations=config.softbody_cg_iterations, tolerance=config.softbody_cg_tolerance,
+            )
+        # Connected pieces of the spring graph that stop being simulated once they settle: the step,
+        # the shape pull and the collision tests only see the particles and springs of awake islands
+        self.allow_sleep = config.softbody_sleep
+        self.islands = Islands(self.system, config.softbody_sleep_energy, config.softbody_sleep_frames)
+        self.polygon_geometries = {}  # The geometry each polygon had last step, to spot the ones that moved
+        # Rest offsets from the centre of mass as columns, for the vectorized restoring force
+        self.rest_offset_x = self.column([offset.x for offset in self.initial_relative_positions])
+        self.rest_offset_y = self.column([offset.y for offset in self.initial_relative_positions])
+        # Shape matching state, worked out once per step and read by rendering and picking
+        self.center = self.compute_center_of_mass()
+        self.rotation = (1.0, 0.0)  # (cos, sin) of the turn from the rest shape
+        self.particle_sprite = pygame.Surface((11, 11))
+        self.particle_sprite.fill((255, 255, 255))
+        self.particle_sprite.set_colorkey((255, 255, 255))
+        pygame.draw.circle(self.particle_sprite, (0, 0, 255), (5, 5), 5)
+        self.sleeping_sprite = self.particle_sprite.copy()
+        pygame.draw.circle(self.sleeping_sprite, (150, 150, 150), (5, 5), 5)
 
         self.drag_force_multiplier = 20.0  # Adjust as needed
         self.restoring_force_multiplier = 1  # Adjust as needed
@@ -30,12 +76,13 @@ class SoftBody:
 
     def create_particles(self, x, y, width, height, particle_mass, num_particles):
         particles = []
+        self.lattice_size = num_particles
         dx = width / (num_particles - 1)
         dy = height / (num_particles - 1)
         initial_center_of_mass = pygame.Vector2(x + width/2, y + height/2)
         for i in range(num_particles):
             for j in range(num_particles):
-                particle = Particle(x + i * dx, y + j * dy, particle_mass, self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+                particle = Particle(x + i * dx, y + j * dy, particle_mass, self.SCREEN_WIDTH, self.SCREEN_HEIGHT, self.system)
                 particles.append(particle)
                 # Store the initial relative position of each particle
                 self.initial_relative_positions.append(particle.position - initial_center_of_mass)
@@ -43,7 +90,7 @@ class SoftBody:
 
     def create_springs(self, spring_stiffness):
         springs = []
-        num_particles = int(len(self.particles) ** 0.5)
+        num_particles = self.lattice_size
         for i in range(num_particles):
             for j in range(num_particles):
                 if i < num_particles - 1:
@@ -52,96 +99,189 @@ class SoftBody:
                     springs.append(SoftSpring(self.particles[i * num_particles + j], self.particles[i * num_particles + j + 1], spring_stiffness))
         return springs
 
+    def create_mesh(self, mesh, particle_mass, spring_stiffness):
+        """Particles at a mesh's vertices and springs along its edges and across its shared edges.
+
+        The rows go into the system in bulk, springs in the mesh's row order,
+        and the Particle and SoftSpring objects are views made onto them.
+        """
+        xs = [vertex[0] for vertex in mesh.vertices]
+        ys = [vertex[1] for vertex in mesh.vertices]
+        first = self.system.add_particles(xs, ys, particle_mass)
+        particles = [Particle.of(self.system, first + i) for i in range(len(xs))]
+        # Every particle weighs the same, so the centre of mass is the mean vertex
+        center = pygame.Vector2(sum(xs) / len(xs), sum(ys) / len(ys))
+        self.initial_relative_positions = [pygame.Vector2(vx, vy) - center for vx, vy in mesh.vertices]
+        a, b = mesh.springs()
+        first = self.system.add_springs(a, b, spring_stiffness)
+        springs = [SoftSpring.of(particles[i], particles[j], first + s) for s, (i, j) in enumerate(zip(a, b))]
+        return particles, springs
+
+    def solvers(self):
+        """The solver names this body can switch between."""
+        return ("explicit", "xpbd", "implicit") if self.system.vectorized else ("explicit",)
+
+    def column(self, values):
+        """A per-particle array in the same storage as the particle system's own columns."""
+        return np.array(values, dtype=float) if self.system.vectorized else list(values)
+
     def update(self, dt):
-        for particle in self.particles:
-            particle.check_wall_collision(self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
-        for _ in range(5):
-            for spring in self.springs:
-                spring.update()
+        system = self.system
+        moved = self.moved_polygons()
+        particles = springs = None  # Everything unless some islands sleep
+        if self.allow_sleep:
+            if self.dragging:
+                self.islands.wake()
+            if self.islands.all_asleep:
+                # Nothing to simulate unless a polygon moved up to the body
+                self.islands.settle(moved)
+                if self.islands.all_asleep:
+                    return
+            particles, springs = self.islands.awake() or (None, None)
+
+        if self.solver == "xpbd":
+            self.xpbd.step(dt, particles=particles, springs=springs)
+        elif self.solver == "implicit":
+            self.implicit.step(dt, particles=particles, springs=springs)
+        elif system.vectorized:
+            system.bounce_walls(particles=particles)
+            system.spring_forces(passes=self.spring_passes, springs=springs)
+            system.integrate(dt, particles=particles)
+        else:
+            awake = self.particles if particles is None else [self.particles[i] for i in particles]
+            for particle in awake:
+                particle.check_wall_collision(self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+            for _ in range(self.spring_passes):
+                for spring in self.springs if springs is None else [self.springs[s] for s in springs]:
+                    spring.update()
 
-        for particle in self.particles:
-            particle.apply_damping()
-            particle.apply_gravity()
-            particle.integrate(dt)
+            for particle in awake:
+                particle.apply_damping()
+                particle.apply_gravity()
+                particle.integrate(dt)
+
+        self.match_shape()
 
         if self.dragging:
             mouse_x, mouse_y = pygame.mouse.get_pos()
-            current_center_of_mass = self.compute_center_of_mass()
+            current_center_of_mass = self.center
             translation = pygame.Vector2(mouse_x, mouse_y) - current_center_of_mass
 
             # Constants
             SPRING_CONSTANT = 0.5  # Adjust this value to change the strength of the wobble
 
-            for particle in self.particles:
-                # Apply the translation to move the particle
-                particle.position += translation
-
-                # Figure out how far it is from center
-                displacement = particle.position - current_center_of_mass
+            # Move every particle along, then pull it back towards the centre it left for some wobble
+            system.translate(translation.x, translation.y)
+            system.pull(current_center_of_mass.x, current_center_of_mass.y, SPRING_CONSTANT)
+            self.center = current_center_of_mass + translation
 
-                # Calculate the springy pushback
-                spring_force = -SPRING_CONSTANT * displacement
+        # Only springs whose bounding box overlaps a polygon's get the exact edge tests
+        tested = None
+        for index, polygon in self.broadphase.pairs(system, self.polygons, springs):
+            spring = self.springs[index]
+            if spring is not tested:
+                tested = spring
+                p1 = spring.particle_a.position
+                p2 = spring.particle_b.position
 
-                # Add that force to the particle
-                particle.forces += spring_force
-
-        for spring in self.springs:
-            p1 = spring.particle_a.position 
-            p2 = spring.particle_b.position  
-
-            for polygon in self.polygons:
-                vertices = polygon.vertices  
-                for i in range(len(vertices)):
-                    v1 = vertices[i]
-                    v2 = vertices[(i + 1) % len(vertices)]  # next vertex, with wrap-around
-                    
-                    if self.segment_intersect(p1, p2, v1, v2):
-                        self.handle_collision(spring, v1, v2)
+            geometry = polygon.geometry()
+            for (v1, v2), tangent, normal in zip(geometry.edges, geometry.directions, geometry.normals):
+                if self.segment_intersect(p1, p2, v1, v2):
+                    self.handle_collision(spring, v1, v2, tangent, normal)
+                    # Positions are copies out of the particle store, so read the moved ends again
+                    p1 = spring.particle_a.position
+                    p2 = spring.particle_b.position
 
 
 
         # Constants
         RESTORATIVE_CONSTANT = 1  # Adjust this value to change the strength of the restoration
 
-        current_center_of_mass = self.compute_center_of_mass()
-        for i, particle in enumerate(self.particles):
-            # Calculate the desired position of the particle relative to the current center of mass
-            desired_position = current_center_of_mass + self.initial_relative_positions[i]
-            
-            # Calculate the displacement from the desired position
-            displacement = particle.position - desired_position
-
-            # Calculate the restorative force
-            restorative_force = -RESTORATIVE_CONSTANT * displacement
-
-            # Apply the restorative force to the particle
-            particle.forces += restorative_force
+        # Pull every particle towards its goal: where it sat in the rest shape, turned and moved to fit the body now
+        center = self.center
+        system.pull(center.x, center.y, RESTORATIVE_CONSTANT, self.rest_offset_x, self.rest_offset_y, self.rotation, particles)
+
+        if self.allow_sleep:
+            self.islands.settle(moved)
+
+    def moved_polygons(self):
+        """Bounding boxes of the polygons added or moved since the last step."""
+        boxes = []
+        geometries = {}
+        for polygon in self.polygons:
+            geometry = polygon.geometry()
+            if self.polygon_geometries.get(polygon) is not geometry:
+                boxes.append(geometry.box)
+            geometries[polygon] = geometry
+        self.polygon_geometries = geometries
+        return boxes
+
+    def match_shape(self):
+        """Find the center of mass and the rotation that best fits the rest shape to the particles."""
+        self.center = self.compute_center_of_mass()
+        self.rotation = self.system.best_rotation(self.center.x, self.center.y, self.rest_offset_x, self.rest_offset_y)
 
     def compute_center_of_mass(self):
-        center_of_mass = pygame.Vector2(0, 0)
-        for particle in self.particles:
-            center_of_mass += particle.position
-        center_of_mass /= len(self.particles)
-        return center_of_mass
+        return self.system.center_of_mass()
 
 
     def render(self, screen):
-        for spring in self.springs:
-            spring.draw(screen)
-        for particle in self.particles:
-            pygame.draw.circle(screen, (0, 0, 255), (int(particle.position.x), int(particle.position.y)), 5)
+        system = self.system
+        # Particles of sleeping islands are drawn grey
+        sleeping = self.islands.sleeping() if self.allow_sleep else None
+        if system.vectorized:
+            self.draw_springs(screen)
+            if sleeping is None:
+                screen.blits([(self.particle_sprite, (int(x) - 5, int(y) - 5)) for x, y in zip(system.x.tolist(), system.y.tolist())], False)
+            else:
+                sprites = (self.particle_sprite, self.sleeping_sprite)
+                screen.blits([(sprites[asleep], (int(x) - 5, int(y) - 5)) for x, y, asleep in zip(system.x.tolist(), system.y.tolist(), sleeping.tolist())], False)
+        else:
+            for spring in self.springs:
+                spring.draw(screen)
+            for i, particle in enumerate(self.particles):
+                color = (150, 150, 150) if sleeping is not None and sleeping[i] else (0, 0, 255)
+                pygame.draw.circle(screen, color, (int(particle.position.x), int(particle.position.y)), 5)
 
         # Draw the center of mass
-        com = self.compute_center_of_mass()
+        com = self.center
         pygame.draw.circle(screen, (255, 0, 0), (int(com.x), int(com.y)), 8)  # Draw a red circle for COM
-        pygame.draw.line(screen, (255, 0, 0), (int(com.x) - 10, int(com.y)), (int(com.x) + 10, int(com.y)), 2)  # Horizontal line
-        pygame.draw.line(screen, (255, 0, 0), (int(com.x), int(com.y) - 10), (int(com.x), int(com.y) + 10), 2)  # Vertical line
+        # Cross lines turned with the body, horizontal and vertical in the rest shape
+        cos, sin = self.rotation
+        across = pygame.Vector2(cos, sin) * 10
+        down = pygame.Vector2(-sin, cos) * 10
+        pygame.draw.line(screen, (255, 0, 0), com - across, com + across, 2)
+        pygame.draw.line(screen, (255, 0, 0), com - down, com + down, 2)
         # If dragging, visualize the drag offset and translation
 
 
 
+    def draw_springs(self, screen):
+        """SoftSpring.draw for every spring at once, with its dots written straight into the screen."""
+        system = self.system
+        steps = np.array(BEZIER_STEPS)
+        a, b = system.spring_a, system.spring_b
+        start_x = system.x[a][:, None]
+        start_y = system.y[a][:, None]
+        px = (start_x + (system.x[b][:, None] - start_x) * steps).astype(np.intp).ravel()
+        py = (start_y + (system.y[b][:, None] - start_y) * steps).astype(np.intp).ravel()
+        # One mapped int per pixel writes far faster than three colour channels, where the screen has them
+        if screen.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(screen)
+            black = screen.map_rgb((0, 0, 0))
+        else:
+            pixels = pygame.surfarray.pixels3d(screen)
+            black = 0
+        np.clip(px, 1, pixels.shape[0] - 1, out=px)
+        np.clip(py, 1, pixels.shape[1] - 1, out=py)
+        # A radius 1 circle covers its centre pixel and the ones above and to the left
+        for dx in (-1, 0):
+            for dy in (-1, 0):
+                pixels[px + dx, py + dy] = black
+        del pixels
+
     def handle_mouse_down(self, x, y):
-        center_of_mass = self.compute_center_of_mass()
+        center_of_mass = self.center
         distance_to_com = center_of_mass.distance_to(pygame.Vector2(x, y))
         
         if distance_to_com < 20:  # Adjust this threshold as needed
@@ -168,13 +308,15 @@ class SoftBody:
         else:
             return None
 
-    def handle_collision(self, spring, vertex1, vertex2):
+    def handle_collision(self, spring, vertex1, vertex2, tangent=None, normal=None):
+        """Push a spring's ends back out across an edge; the edge's unit direction and normal come from PolygonGeometry when known."""
         intersection = self.line_intersection(spring.particle_a.position, spring.particle_b.position, vertex1, vertex2)
         
         if intersection:
-            # Calculate the normal of the collided edge
-            edge_dir = vertex2 - vertex1
-            normal = pygame.Vector2(-edge_dir.y, edge_dir.x).normalize()
+            if tangent is None:
+                # Calculate the normal of the collided edge
+                tangent = (vertex2 - vertex1).normalize()
+                normal = pygame.Vector2(-tangent.y, tangent.x)
             
             for particle in [spring.particle_a, spring.particle_b]:
                 # Calculate vector from particle to intersection point
@@ -195,7 +337,6 @@ class SoftBody:
                     
                     # Optionally, apply some friction to the particle's velocity
                     friction = 0.1  # Adjust the value as needed
-                    tangent = edge_dir.normalize()
                     particle.velocity -= tangent * particle.velocity.dot(tangent) * friction
 
 
@@ -215,6 +356,5 @@ class SoftBody:
 
     def handle_mouse_move(self, mouse_x, mouse_y):
         if self.dragging and self.dragged_particle:
-            self.dragged_particle.position.x = mouse_x
-            self.dragged_particle.position.y = mouse_y
+            self.dragged_particle.position = (mouse_x, mouse_y)
 
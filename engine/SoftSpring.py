@@ -3,13 +3,42 @@ import pygame.gfxdraw
 import math
 
 class SoftSpring:
+    """One row of the spring table in its particles' ParticleSystem."""
+
     def __init__(self, particle_a, particle_b, k):
         self.particle_a = particle_a
         self.particle_b = particle_b
-        self.rest_length = self.particle_a.position.distance_to(self.particle_b.position)
-        self.k = k
+        self.system = particle_a.system
+        self.index = self.system.add_spring(particle_a.index, particle_b.index, k)
         self.base_rest_length = self.rest_length
 
+    @classmethod
+    def of(cls, particle_a, particle_b, index):
+        """A view of spring ``index`` already in the particles' system, such as one added with ``add_springs``."""
+        spring = cls.__new__(cls)
+        spring.particle_a = particle_a
+        spring.particle_b = particle_b
+        spring.system = particle_a.system
+        spring.index = index
+        spring.base_rest_length = spring.rest_length
+        return spring
+
+    @property
+    def rest_length(self):
+        return self.system.rest[self.index]
+
+    @rest_length.setter
+    def rest_length(self, value):
+        self.system.rest[self.index] = value
+
+    @property
+    def k(self):
+        return self.system.k[self.index]
+
+    @k.setter
+    def k(self, value):
+        self.system.k[self.index] = value
+
     def update(self):
         damping_factor = 0.1  # Tweak this to change bounciness
         stiffness_factor = 0.1  # How stretchy the spring is
@@ -22,7 +51,7 @@ class SoftSpring:
         force_magnitude = self.k * displacement * stiffness_factor
         
         force_direction = (self.particle_b.position - self.particle_a.position).normalize()
-        damping_force = -damping_factor * (self.particle_a.velocity - self.particle_b.velocity).dot(force_direction) * force_direction
+        damping_force = damping_factor * (self.particle_a.velocity - self.particle_b.velocity).dot(force_direction) * force_direction
         
         total_force = force_direction * force_magnitude + damping_force
         
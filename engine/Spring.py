@@ -1,25 +1,76 @@
 import math
 import pygame
 import pygame.gfxdraw
+from .Rope import Rope
 
 class Spring:
-    def __init__(self, anchor_x, anchor_y, length, k, screen_height, num_coils=12, screen_width=800):
-        self.anchor = [anchor_x, anchor_y]
+    """One link of a Rope. Its anchor and end are nodes of the rope, and its rest length and k live there too.
+
+    A spring with a ``parent`` hangs from the parent's end in the parent's
+    rope; one without gets a rope of its own anchored at (anchor_x, anchor_y).
+    """
+
+    def __init__(self, anchor_x, anchor_y, length, k, screen_height, num_coils=12, screen_width=800, parent=None):
+        self.rope = parent.rope if parent is not None else Rope((anchor_x, anchor_y), (screen_width, screen_height))
+        self.index = self.rope.add_link(length, k)
         self.screen_height = screen_height
         self.screen_width = screen_width
-        self.rest_length = length
-        self.k = k
-        self.end = [anchor_x, anchor_y + length]
-        self.velocity = [0, 0]
         self.num_coils = num_coils
         self.dragging = False
-        self.GRAVITY = 0
+
+    @classmethod
+    def of(cls, rope, index, num_coils=12):
+        """A view of link ``index`` already in ``rope``, such as one added with ``add_links``."""
+        spring = cls.__new__(cls)
+        spring.rope = rope
+        spring.index = index
+        spring.screen_width, spring.screen_height = rope.bounds
+        spring.num_coils = num_coils
+        spring.dragging = False
+        return spring
+
+    @property
+    def anchor(self):  # The rope's anchor or the end of the link before
+        return [self.rope.x[self.index], self.rope.y[self.index]]
+
+    @property
+    def end(self):
+        return [self.rope.x[self.index + 1], self.rope.y[self.index + 1]]
+
+    @end.setter
+    def end(self, value):
+        self.rope.x[self.index + 1], self.rope.y[self.index + 1] = value
+
+    @property
+    def velocity(self):
+        return [self.rope.vx[self.index + 1], self.rope.vy[self.index + 1]]
+
+    @property
+    def rest_length(self):
+        return self.rope.rest[self.index]
+
+    @property
+    def k(self):
+        return self.rope.k[self.index]
+
+    @k.setter
+    def k(self, value):
+        self.rope.k[self.index] = value
+
+    @property
+    def GRAVITY(self):
+        return self.rope.gravity
+
+    @GRAVITY.setter
+    def GRAVITY(self, value):
+        self.rope.gravity = value
 
     def draw(self, screen):
         dx = self.end[0] - self.anchor[0]
         dy = self.end[1] - self.anchor[1]
         
-        distance = math.dist(self.anchor, self.end)
+        # Springs piled on the floor can have both ends on one spot
+        distance = max(math.dist(self.anchor, self.end), 1e-9)
         stretch_ratio = (distance - self.rest_length) / distance
         
         # Figure out how much sag we need
@@ -53,41 +104,6 @@ class Spring:
         # Slap a ball on the end
         pygame.draw.circle(screen, (0, 0, 255), (int(self.end[0]), int(self.end[1])), 10)
 
-
-
-
     def update(self):
-        # Don't let it escape the screen
-        if self.end[0] < 0:
-            self.end[0] = 0
-            self.velocity[0] = 0
-        elif self.end[0] > self.screen_width:
-            self.end[0] = self.screen_width
-            self.velocity[0] = 0
-
-        if self.end[1] < 0:
-            self.end[1] = 0
-            self.velocity[1] = 0
-        elif self.end[1] > self.screen_height:
-            self.end[1] = self.screen_height
-            self.velocity[1] = 0
-        if self.dragging:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            self.end[0] = mouse_x
-            self.end[1] = mouse_y
-            self.velocity = [0, 0]
-        else:
-            displacement = self.rest_length - math.dist(self.anchor, self.end)
-            force = self.k * displacement
-            angle = math.atan2(self.end[1] - self.anchor[1], self.end[0] - self.anchor[0])
-            self.velocity[0] += force * math.cos(angle)
-            self.velocity[1] += force * math.sin(angle) + self.GRAVITY
-            self.velocity[0] *= 0.9
-            self.velocity[1] *= 0.9
-            self.end[0] += self.velocity[0]
-            self.end[1] += self.velocity[1]
-
-            # Stop the ball from going thru the anchor
-            min_distance = 10
-            if math.dist(self.anchor, self.end) < min_distance:
-                self.end = [self.anchor[0] + min_distance * math.cos(angle), self.anchor[1] + min_distance * math.sin(angle)]
+        # Nothing to do per spring: the links share nodes, so SpringChain.update steps the whole rope at once
+        pass
@@ -1,32 +1,40 @@
-import math
 import pygame
+from engine.Rope import Rope
 from engine.Spring import Spring
 
 
 
 class SpringChain:
+    """Springs hung end to end, as views onto one Rope that steps them all together."""
+
     def __init__(self, anchor_x, anchor_y, num_springs, length, k, screen_height, screen_width=800):
-        self.springs = [Spring(anchor_x, anchor_y + i * length, length, k, screen_height, screen_width=screen_width) for i in range(num_springs)]
+        self.rope = Rope((anchor_x, anchor_y), (screen_width, screen_height))
+        first = self.rope.add_links(num_springs, length, k)
+        self.springs = [Spring.of(self.rope, i) for i in range(first, first + num_springs)]
         self.dragging = False
         self.dragged_spring = None
-    def update(self):
-        for i, spring in enumerate(self.springs):
-            spring.update()
-            
-            # If it's not the first spring, hook it to the one above
-            if i > 0:
-                spring.anchor[0] = self.springs[i-1].end[0]
-                spring.anchor[1] = self.springs[i-1].end[1]
-            
-            # See if the spring is getting stretched too far
-            if math.dist(spring.anchor, spring.end) > 1.5 * spring.rest_length and i > 0:
-                # Pull the spring above a bit to help out
-                self.springs[i-1].end[0] += (spring.end[0] - spring.anchor[0]) * 0.1
-                self.springs[i-1].end[1] += (spring.end[1] - spring.anchor[1]) * 0.1
-
 
+    def add_spring(self, length, k):
+        """Hang a new spring from the end of the last one and return it."""
+        spring = Spring.of(self.rope, self.rope.add_link(length, k))
+        self.springs.append(spring)
+        return spring
 
+    def remove_spring(self):
+        """Take the last spring off, keeping at least one."""
+        if len(self.springs) > 1:
+            self.springs.pop()
+            self.rope.remove_link()
 
+    def update(self):
+        # A dragged spring's end follows the mouse and the rope's solve pulls the rest along
+        dragged = next((spring for spring in self.springs if spring.dragging), None)
+        if dragged is None:
+            self.rope.hold(None, 0, 0)
+        else:
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+            self.rope.hold(dragged.index + 1, mouse_x, mouse_y)
+        self.rope.step()
 
     def draw(self, screen):
         for spring in self.springs:
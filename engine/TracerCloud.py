@@ -0,0 +1,108 @@
+import numpy as np
+from .BandPool import Workspace
+from .FluidKernels import sample_bilinear
+
+
+class TracerCloud:
+    """Passive tracer particles carried along by a grid velocity field.
+
+    Tracers are stored as a struct of arrays in cell coordinates, the same
+    units as the grid, so every step is a handful of array operations over all
+    of them and costs time in proportion to the count. A tracer dies when it
+    leaves the grid or outlives ``lifetime``; dead tracers are brought back at
+    ``emission_rate`` per second, at ``emitter`` if one is set and anywhere on
+    the grid otherwise.
+    """
+
+    def __init__(self, count, lifetime=4.0, emission_rate=50000, seed=None):
+        self.lifetime = lifetime  # Seconds
+        self.emission_rate = emission_rate  # Tracers per second
+        self.emitter = None  # (x, y, radius) in cells
+        self.rng = np.random.default_rng(seed)
+        self.ws = Workspace(np.float32)
+        self.shape = None
+        self.set_count(count)
+
+    def set_count(self, count):
+        """Resize the cloud, keeping the tracers that fit. New tracers start dead and are emitted over time."""
+        kept = min(count, getattr(self, "count", 0))
+        for name, dtype in (("x", np.float32), ("y", np.float32), ("age", np.float32), ("alive", bool)):
+            array = np.zeros(count, dtype)
+            if kept:
+                array[:kept] = getattr(self, name)[:kept]
+            setattr(self, name, array)
+        self.count = count
+        self.budget = 0.0
+
+    def fill(self, shape):
+        """Spawn every tracer at once, spread over the grid and over their lifetimes."""
+        self.shape = shape
+        self.x[:] = self.rng.uniform(0, shape[0] - 1, self.count)
+        self.y[:] = self.rng.uniform(0, shape[1] - 1, self.count)
+        self.age[:] = self.rng.uniform(0, self.lifetime, self.count)
+        self.alive[:] = True
+
+    def rescale(self, shape):
+        """Keep tracers where they are in the domain when the grid resolution changes."""
+        if self.shape is not None:
+            for coords, old, new in ((self.x, self.shape[0], shape[0]), (self.y, self.shape[1], shape[1])):
+                coords += 0.5
+                coords *= new / old
+                coords -= 0.5
+        self.shape = shape
+
+    def step(self, velocity, dt):
+        nx, ny = self.shape = velocity.shape[:2]
+        ws = self.ws
+        n = self.count
+        # sample_bilinear clips its coordinates, so it gets a copy
+        x = ws.get("sample_x", (n,))
+        y = ws.get("sample_y", (n,))
+        np.copyto(x, self.x)
+        np.copyto(y, self.y)
+        uv = sample_bilinear(velocity, x, y, ws.get("uv", (n, 2)), ws)
+        uv[:, 0] *= dt * nx
+        uv[:, 1] *= dt * ny
+        self.x += uv[:, 0]
+        self.y += uv[:, 1]
+        self.age += dt
+
+        inside = ws.get("inside", (n,), bool)
+        alive = self.alive
+        np.less(self.age, self.lifetime, out=inside)
+        alive &= inside
+        for coords, high in ((self.x, nx - 1), (self.y, ny - 1)):
+            np.greater_equal(coords, 0, out=inside)
+            alive &= inside
+            np.less_equal(coords, high, out=inside)
+            alive &= inside
+        self.emit(dt)
+
+    def emit(self, dt):
+        self.budget += self.emission_rate * dt
+        dead = np.flatnonzero(~self.alive)
+        k = min(len(dead), int(self.budget))
+        # Whatever could not be spent carries over, but only a fraction of a tracer
+        self.budget = min(self.budget - k, 1.0)
+        if k == 0:
+            return
+        spawn = dead[:k]
+        nx, ny = self.shape
+        if self.emitter is None:
+            self.x[spawn] = self.rng.uniform(0, nx - 1, k)
+            self.y[spawn] = self.rng.uniform(0, ny - 1, k)
+        else:
+            ex, ey, radius = self.emitter
+            self.x[spawn] = np.clip(self.rng.normal(ex, radius, k), 0, nx - 1)
+            self.y[spawn] = np.clip(self.rng.normal(ey, radius, k), 0, ny - 1)
+        self.age[spawn] = 0
+        self.alive[spawn] = True
+
+    def splat(self, pixels, cell_size, color):
+        """Set the pixel under every live tracer in one fancy-indexed write."""
+        live = np.flatnonzero(self.alive)
+        px = ((self.x[live] + 0.5) * cell_size[0]).astype(np.intp)
+        py = ((self.y[live] + 0.5) * cell_size[1]).astype(np.intp)
+        np.clip(px, 0, pixels.shape[0] - 1, out=px)
+        np.clip(py, 0, pixels.shape[1] - 1, out=py)
+        pixels[px, py] = color
@@ -0,0 +1,44 @@
+import math
+import pygame
+
+
+class TrailLayer:
+    """Trails drawn once onto a persistent alpha surface that fades a little every frame.
+
+    Each frame only the newest segment of every trail is drawn, and one
+    fill takes the same amount of alpha off everything drawn before, so a
+    frame costs the same however long the trails are. ``length`` is how
+    many frames a segment takes to fade out. The fade subtracts alpha rather
+    than multiplying it: pygame rounds a multiply up, which leaves faint
+    trails that never fade out.
+    """
+
+    def __init__(self, size, length, width=2):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.width = width
+        self.frame = 0
+        self.dirty = None  # Rect around everything drawn so far, the only part worth fading and blitting
+        self.set_length(length)
+
+    def set_length(self, length):
+        # Alpha can only drop in whole steps: short trails lose several a frame, long ones one every few frames
+        self.step = max(1, math.ceil(255 / length))
+        self.interval = max(1, round(length / 255))
+
+    def line(self, color, start, end):
+        rect = pygame.draw.line(self.surface, color, start, end, self.width).clip(self.surface.get_rect())
+        if rect.width and rect.height:  # Empty when the segment is wholly off the surface
+            self.dirty = rect if self.dirty is None else self.dirty.union(rect)
+
+    def fade(self):
+        self.frame += 1
+        if self.dirty is not None and self.frame % self.interval == 0:
+            self.surface.fill((0, 0, 0, self.step), self.dirty, special_flags=pygame.BLEND_RGBA_SUB)
+
+    def draw(self, screen):
+        if self.dirty is not None:
+            screen.blit(self.surface, self.dirty, self.dirty)
+
+    def clear(self):
+        self.surface.fill((0, 0, 0, 0))
+        self.dirty = None
@@ -0,0 +1,106 @@
+import numpy as np
+
+# Extended position-based dynamics (Macklin, Mueller and Chentanez 2016) for
+# a ParticleSystem's springs. Each spring is a distance constraint with a
+# compliance, the inverse of its stiffness. Every frame is split into a few
+# substeps; each predicts positions from the velocities, projects the
+# constraints once, and takes the velocities back from how far the particles
+# moved. With one projection per substep the Lagrange multipliers start at
+# zero every time, so none are kept between substeps.
+#
+# Springs are split into color batches in which no two springs share a
+# particle. A whole batch is projected at once, with no scatter conflicts,
+# and the batches run one after another as Gauss-Seidel sweeps.
+
+
+def color_batches(a, b, count):
+    """Greedy edge coloring: index arrays of springs, no two in a batch touching the same particle."""
+    used = [0] * count  # Bit k set when a particle already has a spring of color k
+    colors = []
+    for i, j in zip(a.tolist(), b.tolist()):
+        taken = used[i] | used[j]
+        color = (~taken & (taken + 1)).bit_length() - 1  # Lowest clear bit
+        used[i] |= 1 << color
+        used[j] |= 1 << color
+        colors.append(color)
+    colors = np.array(colors, dtype=np.intp)
+    return [np.flatnonzero(colors == color) for color in range(colors.max() + 1)] if len(colors) else []
+
+
+class XPBDSolver:
+    def __init__(self, system, substeps=4, stiffness_scale=1.0):
+        self.system = system
+        self.substeps = substeps
+        # Spring k times this is the stiffness each constraint stands in for, in force per pixel
+        self.stiffness_scale = stiffness_scale
+        self.batches = []
+        self.spring_count = -1
+
+    def step(self, dt, gravity=9.8, drag=0.01, particles=None, springs=None):
+        """Advance one frame; ``particles`` and ``springs`` limit it to those indices, which no other spring may touch."""
+        system = self.system
+        if self.spring_count != system.spring_count:
+            self.batches = color_batches(system.spring_a, system.spring_b, system.count)
+            self.spring_count = system.spring_count
+        h = dt / self.substeps
+        columns = system.columns(particles)
+        x, y, vx, vy, fx, fy, mass = columns
+        batches = self.batches
+        number = None
+        if springs is not None:
+            # Only the stepped springs, with their ends numbered by row of the particles taken
+            stepped = np.zeros(system.spring_count, dtype=bool)
+            stepped[springs] = True
+            batches = [batch[stepped[batch]] for batch in batches]
+            number = np.empty(system.count, dtype=np.intp)
+            number[particles] = np.arange(len(x))
+        projected = []
+        for batch in batches:
+            a, b = system.spring_a[batch], system.spring_b[batch]
+            if number is not None:
+                a, b = number[a], number[b]
+            projected.append((a, b, system.rest[batch], 1 / (system.k[batch] * self.stiffness_scale * h * h)))
+        inverse_mass = 1 / mass
+        # Forces gathered since the last step, such as the shape pull, act for the whole frame
+        ax = fx * inverse_mass
+        ay = fy * inverse_mass + gravity
+        r = system.radius
+        width, height = system.bounds
+        for _ in range(self.substeps):
+            vx += ax * h
+            vy += ay * h
+            start_x, start_y = x.copy(), y.copy()
+            x += vx * h
+            y += vy * h
+            for batch in projected:
+                project(x, y, inverse_mass, *batch)
+            np.clip(x, r, width - r, out=x)
+            np.clip(y, r, height - r, out=y)
+            np.subtract(x, start_x, out=vx)
+            np.subtract(y, start_y, out=vy)
+            vx /= h
+            vy /= h
+        fx[:] = 0
+        fy[:] = 0
+        keep = (1 - drag) * system.damping
+        vx *= keep
+        vy *= keep
+        system.put_columns(particles, columns)
+
+
+def project(x, y, inverse_mass, a, b, rest, compliance):
+    """Move both ends of every spring in a batch, from a to b, towards its rest length."""
+    dx = x[a] - x[b]
+    dy = y[a] - y[b]
+    length = np.sqrt(dx * dx + dy * dy)
+    wa = inverse_mass[a]
+    wb = inverse_mass[b]
+    # Lambda change for C = length - rest with zero starting lambda, over the length so it scales the raw offset
+    scale = (rest - length) / ((wa + wb + compliance) * np.maximum(length, 1e-9))
+    dx *= scale
+    dy *= scale
+    # No particle appears twice in a batch, so plain fancy-index updates are safe
+    x[a] += wa * dx
+    y[a] += wa * dy
+    x[b] -= wb * dx
+    y[b] -= wb * dy
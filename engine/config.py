@@ -5,6 +5,28 @@ from dataclasses import dataclass
 class Config:
     width: int = 800
     height: int = 600
+    fluid_grid_size: tuple = (80, 60)
+    fluid_governor: bool = False  # Let FluidScene trade resolution for frame time
+    fluid_target_frame_time: float = 1 / 60  # Seconds of update + draw the governor aims for
+    fluid_velocity_decay: float = 1.0  # Velocity kept per frame; under 1 lets stirred-up regions settle so their tiles go quiet
+    fluid_workers: int = 1  # Threads FluidScene splits its grid over; python -m benchmarks.fluid_workers shows whether more pay off
+    fluid_tracers: int = 0  # Passive tracer particles drawn over the fluid; T cycles the count in the scene
+    sph_particles: int = 10_000  # Particles the SPH scene starts with
+    fluid_compact_grid_size: tuple = (32, 24)  # Grid of the pure-Python fluid used when NumPy is missing
+    softbody_lattice: int = 5  # Particles along each side of the soft body scene's square lattice
+    softbody_cg_iterations: int = 40  # Most conjugate gradient iterations per implicit soft-body step
+    softbody_cg_tolerance: float = 1e-4  # Residual, relative to the right-hand side, that ends the implicit solve early
+    softbody_sleep: bool = True  # Let still soft-body islands sleep, left out of the step, until something disturbs them
+    softbody_sleep_energy: float = 1.0  # Mean kinetic energy per particle under which an island counts as still
+    softbody_sleep_frames: int = 60  # Still frames in a row before an island sleeps
+    pendulum_link_length: float = 20.0  # Length of the links PendulumScene adds at runtime
+    pendulum_integrator: str = "rk45"  # "rk45" for adaptive Dormand-Prince steps or "rk4" for one fixed step per frame; I switches
+    pendulum_tolerance: float = 1e-6  # Relative error the adaptive pendulum integrator allows per step
+    pendulum_trail_length: int = 200  # Frames a pendulum trail lasts, and points each bob's trace keeps
+    pendulum_ensemble_members: int = 10_000  # Copies of the chain PendulumScene's ensemble mode runs
+    pendulum_ensemble_spread: float = 1e-3  # Standard deviation, in radians, of the ensemble's starting angle nudges
+    softbody_mesh: str = ""  # Vertex/triangle file (OBJ "v" and "f" lines) the soft body scene offers under M
+    softbody_mesh_spacing: float = 20.0  # Longest edge, in pixels, when the scene triangulates its star outline
 
 
 config = Config()
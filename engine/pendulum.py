@@ -1,42 +1,75 @@
 import math
 import pygame
-from collections import deque
+from .PendulumChain import PendulumChain
+from .RingBuffer import RingBuffer
 
 
 class Pendulum:
-    def __init__(self, length, mass, angle, origin, parent=None):
-        self.length = length  # How long the string is
-        self.angle = angle  # How far it's tilted
-        self.mass = mass
-        self.origin = origin
-        self.angular_velocity = 0.0
+    """One link of a PendulumChain. Length, mass, angle and angular velocity live in the chain.
+
+    A pendulum with a ``parent`` hangs from the parent's bob in the parent's
+    chain; one without gets a chain of its own pivoting at ``origin``. The
+    bob's recent positions are kept in ring buffers, and its trail is drawn
+    by a TrailLayer that ``trace`` feeds.
+    """
+
+    def __init__(self, length, mass, angle, origin, parent=None, trail_length=200):
+        self.chain = parent.chain if parent is not None else PendulumChain(origin)
+        self.index = self.chain.add_link(length, mass, angle)
         self.angular_acceleration = 0.0
-        self.gravity = 9.81  # Earth's pull
-        self.time_scale = 4.0 
         self.parent = parent  # Connected to another pendulum?
-        self.positions = []
-        self.trace_points = deque(maxlen=200)
+        self.positions = RingBuffer(50)
+        self.trace_points = RingBuffer(trail_length)
         self.color = (22, 77, 105)
         self.bob_radius = 10
 
-    def update(self, dt):
-        dt = dt * self.time_scale
-        # Math stuff for the swing
-        def f(t, y):
-            angle, angular_velocity = y
-            dydt = [angular_velocity, -self.gravity / self.length * math.sin(angle)]
-            return dydt
+    @property
+    def length(self):  # How long the string is
+        return self.chain.lengths[self.index]
+
+    @length.setter
+    def length(self, value):
+        self.chain.lengths[self.index] = value
+
+    @property
+    def mass(self):
+        return self.chain.masses[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.chain.masses[self.index] = value
+
+    @property
+    def angle(self):  # How far it's tilted
+        return self.chain.angles[self.index]
+
+    @angle.setter
+    def angle(self, value):
+        self.chain.angles[self.index] = value
 
-        # Fancy math to make it move right
-        y = [self.angle, self.angular_velocity]
-        k1 = [dt * yi for yi in f(0, y)]
-        k2 = [dt * yi for yi in f(0, [yj + 0.5 * k1j for yj, k1j in zip(y, k1)])]
-        k3 = [dt * yi for yi in f(0, [yj + 0.5 * k2j for yj, k2j in zip(y, k2)])]
-        k4 = [dt * yi for yi in f(0, [yj + k3j for yj, k3j in zip(y, k3)])]
+    @property
+    def angular_velocity(self):
+        return self.chain.velocities[self.index]
 
-        # Update how it's swinging
-        self.angle += (k1[0] + 2 * k2[0] + 2 * k3[0] + k4[0]) / 6
-        self.angular_velocity += (k1[1] + 2 * k2[1] + 2 * k3[1] + k4[1]) / 6
+    @angular_velocity.setter
+    def angular_velocity(self, value):
+        self.chain.velocities[self.index] = value
+
+    @property
+    def origin(self):  # The pivot or the parent's bob
+        return self.chain.pivot(self.index)
+
+    @property
+    def gravity(self):
+        return self.chain.gravity
+
+    @property
+    def time_scale(self):
+        return self.chain.time_scale
+
+    def update(self, dt):
+        # The links are coupled, so this moves every link in the chain, with adaptive steps
+        self.chain.advance(dt)
 
 
     def draw(self, screen, x, y):
@@ -47,10 +80,12 @@ class Pendulum:
         pygame.draw.aaline(screen, (0, 0, 0), (x, y), (end_x, end_y), 2)
         pygame.draw.circle(screen, (0, 0, 255), (int(end_x), int(end_y)), 10)
 
-        for i, (x, y) in enumerate(self.trace_points):
-            alpha = int((i / len(self.trace_points)) * 255)  # Make old points fade away
-            color = (*self.color, alpha)  # Mix in transparency
-            pygame.draw.circle(screen, color, (int(x), int(y)), 2)
+    def trace(self, point, trails=None):
+        """Record where the bob is now, and draw the trail's newest segment onto a TrailLayer if given one."""
+        if trails is not None and len(self.trace_points):
+            trails.line(self.color, self.trace_points[-1], point)
+        self.positions.append(point)
+        self.trace_points.append(point)
 
     def is_mouse_over(self, mouse_pos):
         if len(self.positions) == 0:
@@ -71,22 +106,9 @@ class Pendulum:
         return pygame.math.Vector2(x, y)
 
     def apply_force(self, force):
-        # Convert the linear force to a change in angular velocity or however it should affect your pendulum.
-        # The exact physics might be more complex, depending on the precision and realism you are aiming for.
-        # Assuming the force is a vector applied at the bob position, you can calculate the torque as follows:
-        
-        r = pygame.math.Vector2(self.get_position() - self.origin)  # radius vector from pivot to bob
-        torque = r.cross(force)  # cross product gives the torque
-        
-        # Assuming you have some way of managing angular velocity, perhaps as self.angular_velocity
-        # And assuming you have the moment of inertia I, for a point mass at the end of a rod, it’s m * L^2.
-        # Where m is the mass of the bob and L is the length of the rod.
-        
-        I = self.mass * (self.length ** 2)  # moment of inertia
-        angular_acceleration = torque / I  # α = τ/I
-        self.angular_velocity += angular_acceleration  # Update angular velocity based on angular acceleration
+        # Treat the force as an impulse on the bob; the chain shares it out over every link it moves
+        self.chain.push(self.index, (force[0], force[1]))
 
         # Calculate the new position after applying the force
-        new_x = self.origin[0] + self.length * math.sin(self.angle)
-        new_y = self.origin[1] + self.length * math.cos(self.angle)
-        self.positions.append((int(new_x), int(new_y)))
+        position = self.get_position()
+        self.positions.append((int(position.x), int(position.y)))
@@ -1,3 +1,5 @@
+import os
+import time
 import pygame
 try:
     import numpy as np
@@ -6,123 +8,395 @@ except Exception:
     np = None
     HAS_NUMPY = False
 from engine.config import config
+if HAS_NUMPY:
+    from engine.BandPool import BandPool
+    from engine.FluidKernels import advect, diffuse, divergence, resample, subtract_gradient
+    from engine.FluidFields import FluidFields
+    from engine.PoissonSolver import POISSON_SOLVERS
+    from engine.ActiveTiles import ActiveTiles
+    from engine.TracerCloud import TracerCloud
+else:
+    from engine.CompactFluid import CompactFluid
+from engine.FrameGovernor import FrameBudgetGovernor
 
 # Setup stuff
-GRID_SIZE = (80, 60) 
+GRID_SCALES = (0.5, 1, 1.5, 2, 3, 4)  # Resolutions on offer, relative to config.fluid_grid_size
 WHITE, BLACK = (255, 255, 255), (0, 0, 0)
+QUIET_COLOR = (0, 0, 255)  # What a still, empty cell looks like
+TRACER_COLOR = (255, 255, 160)
+TRACER_COUNTS = (0, 25_000, 100_000, 200_000)
+TRACER_LIFETIMES = (1.0, 4.0, 16.0)  # Seconds
+TRACER_RATES = (5_000, 50_000, 200_000)  # Tracers emitted per second
+PRESSURE_SOLVERS = ("sor", "multigrid")  # P cycles these; Jacobi is too slow to converge within a frame
+
+def next_option(options, current):
+    """The option after ``current``, wrapping around; the first one if ``current`` is not on offer."""
+    later = [o for o in options if o > current]
+    return later[0] if later else options[0]
+
 
 class FluidScene():
     def __init__(self):
         self.numpy_available = HAS_NUMPY
         self.mouse_down = False
         if not self.numpy_available:
-            self.unavailable_message = "Fluid scene unavailable: NumPy is missing in this build."
-            self.cell_size = (1, 1)
+            # Pure-Python fallback for the web build, at a resolution it can keep up with
+            self.compact = CompactFluid(config.fluid_compact_grid_size, velocity_decay=config.fluid_velocity_decay)
+            self.grid_size = self.compact.shape
+            self.cell_size = (config.width / self.grid_size[0], config.height / self.grid_size[1])
+            self.rgb = bytearray(self.grid_size[0] * self.grid_size[1] * 3)
+            self.screen_frame = pygame.Surface((config.width, config.height), 0, 32)
+            self.glyph_spacing = 40
             return
 
-        self.density = np.zeros(GRID_SIZE) 
-        self.new_density = np.zeros_like(self.density)
-        self.velocity = np.array(np.meshgrid(
-            np.linspace(-0.5, 0.5, GRID_SIZE[1]), 
-            np.linspace(-0.5, 0.5, GRID_SIZE[0])
-        )).transpose(1, 2, 0)
-        self.diffusion_rate = 0.1
+        self.diffusion_rate = 0.0003  # Domain widths squared per second
+        self.diffusion_iterations = 20
+        self.velocity_decay = config.fluid_velocity_decay
         self.dt = 0.016
-        self.cell_size = (config.width // GRID_SIZE[0], config.height // GRID_SIZE[1])
+        self.pressure_solver = POISSON_SOLVERS["multigrid"]()
+        self.pool = BandPool(config.fluid_workers)
+        self.stats_font = pygame.font.SysFont(None, 20)
+        self.screen_frame = pygame.Surface((config.width, config.height), 0, 32)
+        self.glyph_spacing = 40  # Pixels between velocity glyphs, whatever the resolution
+        self.max_glyph_samples = 64
+
+        base_x, base_y = config.fluid_grid_size
+        self.grid_sizes = [(int(base_x * f), int(base_y * f)) for f in GRID_SCALES]
+        self.grid_level = GRID_SCALES.index(1)
+        self.grid_size = None
+        self.tracers = TracerCloud(config.fluid_tracers)
+        self.set_grid_size(self.grid_sizes[self.grid_level])
+        self.tracers.fill(self.grid_size)
+        self.governor = None
+        if config.fluid_governor:
+            self.enable_governor()
+        self.update_time = 0.0
+
+    def set_grid_size(self, size):
+        """Change the grid resolution, resampling the current fields onto the new grid."""
+        size = tuple(size)
+        if size == self.grid_size:
+            return
+        fields = FluidFields(size)
+        if self.grid_size is None:
+            fields.velocity[:] = np.array(np.meshgrid(
+                np.linspace(-0.5, 0.5, size[1]),
+                np.linspace(-0.5, 0.5, size[0])
+            )).transpose(1, 2, 0)
+        else:
+            fields.density[:] = resample(self.density, size)
+            fields.velocity[:] = resample(self.velocity, size)
+        self.fields = fields
+        self.grid_size = size
+        self.tracers.rescale(size)
+        self.cell_size = (config.width / size[0], config.height / size[1])
+        self.full_window = (slice(0, size[0]), slice(0, size[1]))
+        self.tiles = ActiveTiles(size)
+        # The field is painted one pixel per cell, then scaled up to the screen in one go
+        self.frame = pygame.Surface(size, 0, 32)
+        self.rgb = np.zeros(size + (3,), dtype=np.uint8)
+
+    def set_grid_level(self, level):
+        self.grid_level = max(0, min(len(self.grid_sizes) - 1, level))
+        self.set_grid_size(self.grid_sizes[self.grid_level])
+        if self.governor:
+            self.governor.level = self.grid_level
+
+    def enable_governor(self, enabled=True):
+        """Let a frame-budget governor step the resolution to hold config.fluid_target_frame_time."""
+        if not enabled:
+            self.governor = None
+            return
+        costs = [nx * ny for nx, ny in self.grid_sizes]
+        self.governor = FrameBudgetGovernor(config.fluid_target_frame_time, costs, self.grid_level)
+
+    def set_workers(self, workers):
+        """Split the grid kernels over this many threads; the result is the same for any count."""
+        self.pool.shutdown()
+        self.pool = BandPool(workers)
+
+    @property
+    def density(self):
+        return self.fields.density
+
+    @property
+    def velocity(self):
+        return self.fields.velocity
+
+    @property
+    def pressure(self):
+        return self.fields.pressure
+
+    @property
+    def cells(self):
+        return self.fields.cells
+
+    def compute_speed(self, window=None):
+        """Speed of every grid cell, or of the cells in a window."""
+        velocity = self.velocity if window is None else self.velocity[window]
+        return np.hypot(velocity[..., 0], velocity[..., 1])
 
-    def compute_speed(self, i, j):
-        """Compute speed based on the velocity vector at a given grid cell."""
-        return np.linalg.norm(self.velocity[i, j])
     def map_speed_to_color(self, speed):
-        """Map speed to a color gradient: Blue for low speed, Red for high speed."""
+        """Map speeds to a color gradient: Blue for low speed, Red for high speed."""
         MAX_SPEED = 1.0  # Tweak this if colors look weird
-        f = min(1, speed / MAX_SPEED)
-        r = int(255 * f)
-        b = int(255 * (1 - f))
-        return (r, 0, b)
+        f = np.minimum(1, speed / MAX_SPEED)
+        return 255 * f, 255 * (1 - f)
     def update(self, dt):
         if not self.numpy_available:
+            if self.mouse_down:
+                mx, my = pygame.mouse.get_pos()
+                grid_x = min(int(mx / self.cell_size[0]), self.grid_size[0] - 1)
+                grid_y = min(int(my / self.cell_size[1]), self.grid_size[1] - 1)
+                self.compact.add_impulse(grid_x, grid_y, 10, 0.1)
+            self.compact.step(dt)
             return
 
+        start = time.perf_counter()
         self.dt = dt
-        self.advection()
-        self.diffusion()
+        # Only step the parts of the grid that have something going on
+        windows = self.tiles.update(self.density, self.velocity)
+        if windows:
+            self.advection(windows)
+            self.diffusion(windows)
         if self.mouse_down:
             mx, my = pygame.mouse.get_pos()
-            grid_x, grid_y = mx//self.cell_size[0], my//self.cell_size[1]
+            grid_x = min(int(mx / self.cell_size[0]), self.grid_size[0] - 1)
+            grid_y = min(int(my / self.cell_size[1]), self.grid_size[1] - 1)
             self.density[grid_x, grid_y] += 10
             self.velocity[grid_x, grid_y, 1] += 0.1  # Give it a lil push down
+        self.set_boundaries()
+        if windows:
+            self.project()
+            self.set_boundaries()
+            for window in windows:
+                self.scale(self.density, window, 0.99)
+                if self.velocity_decay != 1:
+                    self.scale(self.velocity, window, self.velocity_decay)
+        if self.tracers.count:
+            self.tracers.emitter = None
+            if self.mouse_down:
+                self.tracers.emitter = (grid_x, grid_y, 1.5)
+            self.tracers.step(self.velocity, dt)
+        self.update_time = time.perf_counter() - start
+
+    def set_boundaries(self):
         self.velocity[0, :, 0] = 0
         self.velocity[-1, :, 0] = 0
         self.velocity[:, 0, 1] = 0
         self.velocity[:, -1, 1] = 0
-        self.density *= 0.99
 
 
 
 
 
-    def advection(self):
+    def advection(self, windows=None):
         if not self.numpy_available:
             return
 
-        # Move the fluid around based on speed
-        for i in range(GRID_SIZE[0]):
-            for j in range(GRID_SIZE[1]):
-                x, y = i - self.velocity[i, j, 1] * self.dt * GRID_SIZE[0], j - self.velocity[i, j, 0] * self.dt * GRID_SIZE[1]
-                x, y = max(0, min(GRID_SIZE[0]-1, x)), max(0, min(GRID_SIZE[1]-1, y))
-                self.new_density[i, j] = self.density[int(x), int(y)]
-        self.density[:] = self.new_density[:]
+        # Backtrace every cell in a window at once; both fields move with the old velocity
+        f = self.fields
+        windows = windows or [self.full_window]
+        for window in windows:
+            cells = (f.cells[0][window], f.cells[1][window])
+            velocity = f.velocity[window]
+            advect(f.density, velocity, self.dt, cells, f.density_back[window], self.pool)
+            advect(f.velocity, velocity, self.dt, cells, f.velocity_back[window], self.pool)
+        self.flip(windows)
 
-    def diffusion(self):
+    def diffusion(self, windows=None):
         if not self.numpy_available:
             return
 
-        for i in range(GRID_SIZE[0]):
-            for j in range(GRID_SIZE[1]):
-                neighbors = [(i-1, j), (i+1, j), (i, j-1), (i, j+1)]
-                self.new_density[i, j] = (1 - self.diffusion_rate) * self.density[i, j] + \
-                                         (self.diffusion_rate/4) * sum(self.density[x, y] for x, y in neighbors if 0 <= x < GRID_SIZE[0] and 0 <= y < GRID_SIZE[1])
-        self.density[:] = self.new_density[:]
+        f = self.fields
+        windows = windows or [self.full_window]
+        a = self.diffusion_rate * self.dt * self.grid_size[0] * self.grid_size[1]
+        for window in windows:
+            grown, inner, fixed = self.grow(window)
+            if not any(fixed):
+                diffuse(f.density[window], a, self.diffusion_iterations, f.density_back[window], self.pool)
+                continue
+            # The cells around the window take part as fixed values, only the window itself is kept.
+            # Working on contiguous copies keeps NumPy from buffering the strided window, and sizing
+            # them for the whole grid lets windows of any shape share one allocation
+            shape = tuple(w.stop - w.start for w in grown)
+            shared = self.pool.shared
+            shared.reserve("window", self.grid_size)
+            shared.reserve("window_out", self.grid_size)
+            field = shared.get("window", shape)
+            np.copyto(field, f.density[grown])
+            out = shared.get("window_out", shape)
+            diffuse(field, a, self.diffusion_iterations, out, self.pool, fixed)
+            f.density_back[window] = out[inner]
+        self.flip(windows, velocity=False)
+
+    def grow(self, window):
+        """A window grown by one cell on the sides away from the walls.
+
+        Returns the grown window, the original window's place inside it, and
+        which edges of the grown window (first row, last row, first column,
+        last column) grew.
+        """
+        (i0, i1), (j0, j1) = ((w.start, w.stop) for w in window)
+        fixed = (i0 > 0, i1 < self.grid_size[0], j0 > 0, j1 < self.grid_size[1])
+        grown = (slice(i0 - fixed[0], i1 + fixed[1]), slice(j0 - fixed[2], j1 + fixed[3]))
+        inner = (slice(int(fixed[0]), i1 - i0 + fixed[0]), slice(int(fixed[2]), j1 - j0 + fixed[2]))
+        return grown, inner, fixed
+
+    def scale(self, field, window, factor):
+        """Multiply a window of a field in place, by way of contiguous scratch that NumPy need not buffer."""
+        if window == self.full_window:
+            field *= factor
+            return
+        self.pool.shared.reserve("scale", field.shape)
+        scratch = self.pool.shared.get("scale", field[window].shape)
+        np.copyto(scratch, field[window])
+        scratch *= factor
+        field[window] = scratch
+
+    def flip(self, windows, velocity=True):
+        """Make the back buffers current: a pointer swap for the whole grid, a copy for each window."""
+        f = self.fields
+        if windows == [self.full_window]:
+            f.swap_density()
+            if velocity:
+                f.swap_velocity()
+            return
+        for window in windows:
+            f.density[window] = f.density_back[window]
+            if velocity:
+                f.velocity[window] = f.velocity_back[window]
+
+    def project(self):
+        """Make the velocity field divergence free by solving for pressure and removing its gradient."""
+        if not self.numpy_available:
+            return
+
+        f = self.fields
+        divergence(f.velocity, f.divergence, self.pool)
+        # The walls make the pressure equation singular, only a zero-mean source is solvable
+        f.divergence -= f.divergence.mean()
+        self.pressure_solver.solve(f.pressure, f.divergence, self.pool)
+        subtract_gradient(f.velocity, f.pressure, self.pool)
+
+    def set_pressure_solver(self, name):
+        self.pressure_solver = POISSON_SOLVERS[name]()
 
     def handle_event(self, event, _=None):
         if not self.numpy_available:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                self.mouse_down = True
+            elif event.type == pygame.MOUSEBUTTONUP:
+                self.mouse_down = False
             return
 
-        if event.type == pygame.MOUSEBUTTONDOWN:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+            # Cycle through the pressure solvers
+            names = PRESSURE_SOLVERS
+            current = names.index(self.pressure_solver.name) if self.pressure_solver.name in names else -1
+            self.set_pressure_solver(names[(current + 1) % len(names)])
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self.set_grid_level(self.grid_level + 1)
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.set_grid_level(self.grid_level - 1)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_g:
+            self.enable_governor(self.governor is None)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_t:
+            self.tracers.set_count(next_option(TRACER_COUNTS, self.tracers.count))
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_l:
+            self.tracers.lifetime = next_option(TRACER_LIFETIMES, self.tracers.lifetime)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+            self.tracers.emission_rate = next_option(TRACER_RATES, self.tracers.emission_rate)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_w:
+            # Cycle 1, 2, 4, ... threads up to the core count, to compare update times
+            cores = os.cpu_count() or 1
+            self.set_workers(1 if self.pool.workers >= cores else min(cores, self.pool.workers * 2))
+        elif event.type == pygame.MOUSEBUTTONDOWN:
             self.mouse_down = True
         elif event.type == pygame.MOUSEBUTTONUP:
             self.mouse_down = False
 
-    def draw_velocity(self, screen):
-        for i in range(GRID_SIZE[0]):
-            for j in range(GRID_SIZE[1]):
-                start_pos = (i*self.cell_size[0] + self.cell_size[0]//2, j*self.cell_size[1] + self.cell_size[1]//2)
-                end_pos = (start_pos[0] + self.velocity[i, j, 0]*self.cell_size[0]*2, start_pos[1] + self.velocity[i, j, 1]*self.cell_size[1]*2)
-                pygame.draw.line(screen, BLACK, start_pos, end_pos, 1)
+    def draw_velocity(self, pixels, window=None):
+        """Splat velocity glyphs on a decimated lattice straight into a pixel array."""
+        cw, ch = self.cell_size
+        step = max(1, round(self.glyph_spacing / cw))
+        window = window or self.full_window
+        # Keep the lattice anchored to the grid, not to the window
+        lattice = tuple(slice(w.start + (step // 2 - w.start) % step, w.stop, step) for w in window)
+        vel = self.velocity[lattice]
+        if vel.size == 0:
+            return
+        cx = (self.cells[0][lattice] + 0.5) * cw
+        cy = (self.cells[1][lattice] + 0.5) * ch
+        dx = vel[..., 0] * self.glyph_spacing / 2
+        dy = vel[..., 1] * self.glyph_spacing / 2
+        # One sample per pixel of the longest glyph keeps the lines solid
+        longest = np.hypot(dx, dy).max()
+        t = np.linspace(0, 1, int(min(longest, self.max_glyph_samples)) + 2)[:, None, None]
+        xs = (cx + t * dx).astype(np.intp)
+        ys = (cy + t * dy).astype(np.intp)
+        np.clip(xs, 0, pixels.shape[0] - 1, out=xs)
+        np.clip(ys, 0, pixels.shape[1] - 1, out=ys)
+        pixels[xs, ys] = BLACK
 
     def draw(self, screen):
         if not self.numpy_available:
-            screen.fill(WHITE)
-            title_font = pygame.font.SysFont(None, 42)
-            body_font = pygame.font.SysFont(None, 28)
+            self.draw_compact(screen)
+            return
 
-            title = title_font.render("Fluid Scene Unavailable", True, BLACK)
-            line1 = body_font.render("NumPy is required for this simulation.", True, BLACK)
-            line2 = body_font.render("Use desktop app for full fluid simulation.", True, BLACK)
+        start = time.perf_counter()
+        # Make it look pretty: speed colors plus dye, all active cells at once
+        windows = self.tiles.windows
+        if not self.tiles.dense:
+            self.rgb[:] = QUIET_COLOR
+        for window in windows:
+            red, blue = self.map_speed_to_color(self.compute_speed(window))
+            dye = np.maximum(self.density[window], 0) * 255
+            np.minimum(red + dye, 255, out=red)
+            np.minimum(blue + dye, 255, out=blue)
+            self.rgb[window + (0,)] = red
+            self.rgb[window + (2,)] = blue
+        pygame.surfarray.blit_array(self.frame, self.rgb)
+        pygame.transform.smoothscale(self.frame, self.screen_frame.get_size(), self.screen_frame)
 
-            screen.blit(title, (config.width // 2 - title.get_width() // 2, config.height // 2 - 60))
-            screen.blit(line1, (config.width // 2 - line1.get_width() // 2, config.height // 2 - 10))
-            screen.blit(line2, (config.width // 2 - line2.get_width() // 2, config.height // 2 + 24))
-            return
+        if windows or self.tracers.count:
+            pixels = pygame.surfarray.pixels3d(self.screen_frame)
+            for window in windows:
+                self.draw_velocity(pixels, window)
+            self.tracers.splat(pixels, self.cell_size, TRACER_COLOR)
+            del pixels  # Unlock the surface before blitting it
+        screen.blit(self.screen_frame, (0, 0))
+        self.draw_stats(screen)
+
+        if self.governor:
+            level = self.governor.record(self.update_time + time.perf_counter() - start)
+            if level is not None:
+                self.set_grid_level(level)
+
+    def draw_compact(self, screen):
+        """Draw the pure-Python fluid: one pixel per cell, scaled up, with a few velocity glyphs."""
+        frame = pygame.image.frombuffer(self.compact.paint(self.rgb), self.grid_size, "RGB")
+        pygame.transform.smoothscale(frame, self.screen_frame.get_size(), self.screen_frame)
+        screen.blit(self.screen_frame, (0, 0))
+        nx, ny = self.grid_size
+        cw, ch = self.cell_size
+        step = max(1, round(self.glyph_spacing / cw))
+        u, v = self.compact.u, self.compact.v
+        for i in range(step // 2, nx, step):
+            for j in range(step // 2, ny, step):
+                k = i * ny + j
+                cx, cy = (i + 0.5) * cw, (j + 0.5) * ch
+                end = (cx + u[k] * self.glyph_spacing / 2, cy + v[k] * self.glyph_spacing / 2)
+                pygame.draw.line(screen, BLACK, (cx, cy), end)
 
-        screen.fill(WHITE)
-        # Make it look pretty
-        for i in range(GRID_SIZE[0]):
-            for j in range(GRID_SIZE[1]):
-                speed = self.compute_speed(i, j)
-                speed_color = self.map_speed_to_color(speed)
-                dye_intensity = int(self.density[i, j] * 255)
-                combined_color = (min(255, speed_color[0] + dye_intensity), 0, min(255, speed_color[2] + dye_intensity))
-                pygame.draw.rect(screen, combined_color, (i * self.cell_size[0], j * self.cell_size[1], self.cell_size[0], self.cell_size[1]))
-        self.draw_velocity(screen)
+    def draw_stats(self, screen):
+        solver = self.pressure_solver
+        text = f"{solver.name} (P to switch): {solver.last_iterations} it, residual {solver.last_residual:.1e}"
+        screen.blit(self.stats_font.render(text, True, WHITE), (10, 10))
+        governor = "on" if self.governor else "off"
+        text = f"grid {self.grid_size[0]}x{self.grid_size[1]} (+/- to change), governor {governor} (G)"
+        screen.blit(self.stats_font.render(text, True, WHITE), (10, 28))
+        text = f"update {self.update_time * 1000:.1f} ms on {self.pool.workers} thread(s) (W to change)"
+        screen.blit(self.stats_font.render(text, True, WHITE), (10, 46))
+        t = self.tracers
+        text = f"tracers {t.count} (T), lifetime {t.lifetime:g} s (L), emission {t.emission_rate}/s (E)"
+        screen.blit(self.stats_font.render(text, True, WHITE), (10, 64))
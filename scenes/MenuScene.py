@@ -5,6 +5,7 @@ from .FluidScene import FluidScene
 from .SoftBodyScene import SoftBodyScene
 from .SpringScene import SpringScene
 from .PendulumScene import PendulumScene
+from .SPHScene import SPHScene
 from engine.config import config
 
 # Colors
@@ -16,7 +17,7 @@ class MainMenuScene(Scene):
         super().__init__()
         self.scene_manager = scene_manager
         self.font = pygame.font.SysFont(None, 55)
-        self.options = ["SoftBody", "Spring", "Fluid", "Pendulum"]
+        self.options = ["SoftBody", "Spring", "Fluid", "Pendulum", "SPH"]
         self.buttons = [self.font.render(option, True, BLACK) for option in self.options]
 
     def draw(self, screen):
@@ -39,6 +40,8 @@ class MainMenuScene(Scene):
                         self.scene_manager.switch_to_scene(SpringScene())
                     elif self.options[index] == "Pendulum":  # Same deal here
                         self.scene_manager.switch_to_scene(PendulumScene())
+                    elif self.options[index] == "SPH":
+                        self.scene_manager.switch_to_scene(SPHScene())
                     # Add other scenes as needed
 
 
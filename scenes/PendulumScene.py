@@ -1,8 +1,18 @@
+import time
 import pygame
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
 from engine.pendulum import Pendulum
+from engine.TrailLayer import TrailLayer
 import math
 from .Scene import Scene
 from engine.config import config
+if HAS_NUMPY:
+    from engine.PendulumEnsemble import PendulumEnsemble
 
 class PendulumScene(Scene):
     def __init__(self):
@@ -10,29 +20,78 @@ class PendulumScene(Scene):
         self.pendulums = []  # List to store all pendulum objects
         self.dragging_pendulum = None 
         self.original_position = None
+        self.trails = TrailLayer((config.width, config.height), config.pendulum_trail_length)
         self.initialize_pendulums()
+        self.chain.rtol = config.pendulum_tolerance
+        self.integrator = config.pendulum_integrator
+        self.frame_counts = (0, 0, 0)  # Steps, rejected steps and derivative evaluations in the last frame
+        # E swaps the chain for a cloud of copies started a hair apart, and back
+        self.ensemble = None
+        self.ensemble_step_time = 0.0
 
     
     def initialize_pendulums(self):
         x, y = config.width // 2, 50
         pivot_point = (x, y)
-        pendulum1 = Pendulum(200, 20, math.pi / 4, origin = pivot_point)
+        pendulum1 = Pendulum(200, 20, math.pi / 4, origin = pivot_point, trail_length=config.pendulum_trail_length)
         self.pendulums.append(pendulum1)
         x += pendulum1.length * math.sin(pendulum1.angle)
         y += pendulum1.length * math.cos(pendulum1.angle)
         
         pivot_point = (x, y)
-        pendulum2 = Pendulum(160, 20, math.pi / 6, origin = pivot_point, parent=pendulum1)
+        pendulum2 = Pendulum(160, 20, math.pi / 6, origin = pivot_point, parent=pendulum1, trail_length=config.pendulum_trail_length)
         self.pendulums.append(pendulum2)
         x += pendulum2.length * math.sin(pendulum2.angle)
         y += pendulum2.length * math.cos(pendulum2.angle)
 
         pivot_point = (x, y)
-        pendulum3 = Pendulum(120, 20, math.pi / 8, origin = pivot_point, parent=pendulum2)
+        pendulum3 = Pendulum(120, 20, math.pi / 8, origin = pivot_point, parent=pendulum2, trail_length=config.pendulum_trail_length)
         self.pendulums.append(pendulum3)
+        self.chain = pendulum1.chain  # All three hang from one another, so they share a chain
+
+    def add_link(self, length=None, mass=20):
+        """Hang a new link off the last bob, lined up with the last link and turning with it."""
+        length = config.pendulum_link_length if length is None else length
+        if self.pendulums:
+            last = self.pendulums[-1]
+            pendulum = Pendulum(length, mass, last.angle, last.origin, parent=last, trail_length=config.pendulum_trail_length)
+            pendulum.angular_velocity = last.angular_velocity
+        else:
+            pendulum = Pendulum(length, mass, 0.0, self.chain.origin, trail_length=config.pendulum_trail_length)
+            self.chain = pendulum.chain
+        self.pendulums.append(pendulum)
+
+    def remove_link(self):
+        """Take the last link off the chain."""
+        if self.pendulums:
+            pendulum = self.pendulums.pop()
+            pendulum.chain.remove_link()
+            if pendulum is self.dragging_pendulum:
+                self.dragging_pendulum = None
     
+    def toggle_ensemble(self):
+        if self.ensemble is not None:
+            self.ensemble = None
+        elif HAS_NUMPY and self.pendulums:
+            self.ensemble = PendulumEnsemble(self.chain, config.pendulum_ensemble_members, config.pendulum_ensemble_spread)
+
     def handle_event(self, event, scene_manager):
-        if event.type == pygame.MOUSEBUTTONDOWN:
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+            self.toggle_ensemble()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_i:
+            self.integrator = "rk4" if self.integrator == "rk45" else "rk45"
+        elif self.ensemble is not None:
+            pass  # The chain is paused under the ensemble, so it takes no input
+        elif event.type == pygame.KEYDOWN:
+            # Up and down add and remove a link, page up and page down ten at a time
+            links = {pygame.K_UP: 1, pygame.K_DOWN: -1, pygame.K_PAGEUP: 10, pygame.K_PAGEDOWN: -10}.get(event.key, 0)
+            for _ in range(abs(links)):
+                if links > 0:
+                    self.add_link()
+                else:
+                    self.remove_link()
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
             for pendulum in self.pendulums:
                 if pendulum.is_mouse_over(event.pos):
                     self.dragging_pendulum = pendulum
@@ -56,31 +115,62 @@ class PendulumScene(Scene):
                     self.dragging_pendulum = None  # Reset after mouse release
 
     def update(self, dt):
-        if not self.dragging_pendulum:
-            for pendulum in self.pendulums:
-                pendulum.update(dt)
-            
-            # Update the origins and positions list for each pendulum
-            x, y = config.width // 2, 50
-            for pendulum in self.pendulums:
-                pendulum.origin = (x, y)  # Update the origin to be the pivot point of each pendulum
-                x += pendulum.length * math.sin(pendulum.angle)
-                y += pendulum.length * math.cos(pendulum.angle)
-                pendulum.positions.append((int(x), int(y)))
-                
-                # Optional: Limit the number of positions stored to prevent the list from becoming too long
-                if len(pendulum.positions) > 50:  # Adjust as needed
-                    pendulum.positions.pop(0)
-                pendulum.trace_points.append((x, y))
+        if self.ensemble is not None:
+            start = time.perf_counter()
+            self.ensemble.step(dt)
+            self.ensemble_step_time = time.perf_counter() - start
+        elif not self.dragging_pendulum:
+            # The links are coupled, so the whole chain moves on together
+            if self.integrator == "rk45":
+                self.advance_chain(dt)
+            else:
+                self.chain.step(dt)
+                self.frame_counts = (1, 0, 4)
+
+            # Fade the old trails a little, then add where every bob is now
+            self.trails.fade()
+            for pendulum, point in zip(self.pendulums, self.chain.positions()):
+                pendulum.trace(point, self.trails)
 
 
+    def advance_chain(self, dt):
+        """Adaptive steps up to the next frame, counting the work they took."""
+        before = self.chain.integrator
+        counts = (before.accepted, before.rejected, before.evaluations) if before else (0, 0, 0)
+        self.chain.advance(dt)
+        after = self.chain.integrator
+        if after is not before:
+            counts = (0, 0, 0)  # Started again this frame
+        self.frame_counts = tuple(n - m for n, m in zip((after.accepted, after.rejected, after.evaluations), counts))
+
     def draw(self, screen):
         screen.fill((255, 255, 255))
+        if self.ensemble is not None:
+            self.draw_ensemble(screen)
+            return
+        self.trails.draw(screen)
         x, y = screen.get_width() // 2, 50
         for pendulum in self.pendulums:
             pendulum.draw(screen, x, y)
             x += pendulum.length * math.sin(pendulum.angle)
             y += pendulum.length * math.cos(pendulum.angle)
-            
 
+        font = pygame.font.Font(None, 24)
+        links = f"{len(self.pendulums)} links (up and down to add and remove, page up and page down for ten)"
+        screen.blit(font.render(links, True, (0, 0, 0)), (10, screen.get_height() - 30))
+        steps, rejected, evaluations = self.frame_counts
+        work = f"{self.integrator.upper()}: {steps} steps, {rejected} rejected, {evaluations} evaluations this frame; energy drift {self.chain.energy_drift():.1e} (I to switch)"
+        screen.blit(font.render(work, True, (0, 0, 0)), (10, screen.get_height() - 50))
+        if HAS_NUMPY:
+            screen.blit(font.render("E to run an ensemble of copies", True, (0, 0, 0)), (10, screen.get_height() - 70))
+
+    def draw_ensemble(self, screen):
+        # Links shade from light to dark blue going down the chain
+        links = len(self.chain)
+        colors = [(int(150 * (1 - k / max(links - 1, 1))), int(180 * (1 - k / max(links - 1, 1))), 255) for k in range(links)]
+        self.ensemble.draw(screen, colors)
+        font = pygame.font.Font(None, 24)
+        members = len(self.ensemble)
+        stats = f"Ensemble: {members} members, {self.ensemble_step_time * 1e3:.1f} ms per step, {self.ensemble_step_time * 1e6 / members:.2f} us per member (E to leave)"
+        screen.blit(font.render(stats, True, (0, 0, 0)), (10, screen.get_height() - 30))
 
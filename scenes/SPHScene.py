@@ -0,0 +1,105 @@
+import time
+import pygame
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
+from engine.FluidParticle import FluidParticle
+from engine.config import config
+from .Scene import Scene
+if HAS_NUMPY:
+    from engine.SPHFluid import SPHFluid
+
+WHITE, BLACK = (255, 255, 255), (0, 0, 0)
+BACKGROUND = (12, 16, 32)
+PARTICLE_COUNTS = (2_500, 5_000, 10_000, 20_000)
+SPACING = 3.3  # Pixels between particles at rest, about a third of the smoothing radius
+
+
+class SPHScene(Scene):
+    """A dam break of SPH water that the mouse can shove around.
+
+    A step costs about 5 us a particle on one core (python -m
+    benchmarks.sph_scaling), some 50 ms at the default 10k particles, so
+    only the 2,500 setting keeps to 60 fps. The overlay shows the live
+    step time.
+    """
+    def __init__(self):
+        super().__init__()
+        self.mouse_down = False
+        self.numpy_available = HAS_NUMPY
+        if not self.numpy_available:
+            return
+        self.push_radius = 60
+        self.push_strength = 1500
+        self.stats_font = pygame.font.SysFont(None, 20)
+        self.step_time = 0.0
+        self.reset(config.sph_particles)
+
+    def reset(self, count):
+        """Start over with a block of ``count`` particles against the left wall."""
+        columns = min(count, int(config.width * 0.6 / SPACING))
+        row, column = np.divmod(np.arange(count), columns)
+        x = 2 + column * SPACING
+        y = config.height - 1 - row * SPACING
+        # A little random motion, so the block does not fall as a perfect lattice
+        vx, vy = np.random.uniform(-5, 5, (2, count))
+        # One FluidParticle stands for them all: its size sets the smoothing radius and its mass the particle mass
+        particle = FluidParticle(0, 0)
+        self.fluid = SPHFluid.from_arrays(
+            x, y, (config.width, config.height), vx, vy, smoothing_radius=2 * particle.radius, mass=particle.mass,
+        )
+
+    def handle_event(self, event, scene_manager):
+        if not self.numpy_available:
+            return
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.mouse_down = True
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.mouse_down = False
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            larger = [c for c in PARTICLE_COUNTS if c > self.fluid.count]
+            self.reset(larger[0] if larger else PARTICLE_COUNTS[-1])
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            smaller = [c for c in PARTICLE_COUNTS if c < self.fluid.count]
+            self.reset(smaller[-1] if smaller else PARTICLE_COUNTS[0])
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            self.reset(self.fluid.count)
+
+    def update(self, dt):
+        if not self.numpy_available:
+            return
+        start = time.perf_counter()
+        if self.mouse_down:
+            self.fluid.push(pygame.mouse.get_pos(), self.push_radius, self.push_strength)
+        # A long frame would let particles jump clean past each other
+        self.fluid.step(min(dt, 1 / 30))
+        self.step_time = time.perf_counter() - start
+
+    def draw(self, screen):
+        screen.fill(BACKGROUND)
+        if not self.numpy_available:
+            font = pygame.font.SysFont(None, 28)
+            line = font.render("The SPH scene needs NumPy, which is missing in this build.", True, WHITE)
+            screen.blit(line, (config.width // 2 - line.get_width() // 2, config.height // 2))
+            return
+        fluid = self.fluid
+        pixels = pygame.surfarray.pixels3d(screen)
+        px = np.clip(fluid.x.astype(np.intp), 0, pixels.shape[0] - 2)
+        py = np.clip(fluid.y.astype(np.intp), 0, pixels.shape[1] - 2)
+        # Slow water is deep blue, fast water goes white
+        speed = np.minimum(np.hypot(fluid.vx, fluid.vy) / 400, 1)
+        color = np.empty((fluid.count, 3), np.uint8)
+        color[:, 0] = 40 + 215 * speed
+        color[:, 1] = 110 + 145 * speed
+        color[:, 2] = 255
+        # Two by two pixels per particle, written in four passes over all of them
+        for dx in (0, 1):
+            for dy in (0, 1):
+                pixels[px + dx, py + dy] = color
+        del pixels  # Unlock the screen before drawing text on it
+
+        text = f"{fluid.count} particles (+/- to change, R to reset), step {self.step_time * 1000:.1f} ms"
+        screen.blit(self.stats_font.render(text, True, WHITE), (10, 10))
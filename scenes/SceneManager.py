@@ -8,12 +8,14 @@ class SceneManager:
         from .FluidScene import FluidScene
         from .SoftBodyScene import SoftBodyScene
         from .PendulumScene import PendulumScene
+        from .SPHScene import SPHScene
         self.scene_registry = {
             "menu": MainMenuScene,
             "spring": SpringScene,
             "fluid": FluidScene,
             "softbody": SoftBodyScene,
             "pendulum": PendulumScene,
+            "sph": SPHScene,
         }
         self.current_scene = MainMenuScene(self)
 
@@ -2,6 +2,7 @@ import pygame
 import math
 from .Scene import Scene
 from engine.SoftBody import SoftBody
+from engine.Mesh import Mesh
 from engine.PolygonObject import PolygonObject
 from engine.config import config
 
@@ -15,7 +16,9 @@ class SoftBodyScene(Scene):
         super().__init__()
         # Throw a soft body in the middle of the screen
         self.user_polygons = []  # Keeping track of shapes the user makes
-        self.soft_body = SoftBody(config.width // 2 - 100, config.height // 2 - 100, 200, 200, 1.0, 0.05, 5, self.user_polygons, config.width, config.height)
+        # Body shapes M cycles through: the square lattice, a triangulated star and the configured mesh file
+        self.shapes = ["lattice", "star"] + (["mesh file"] if config.softbody_mesh else [])
+        self.soft_body = self.make_soft_body("lattice")
         self.dragged_particle = None
         self.dragged_polygon = None  # For when user grabs a polygon
         self.right_arrow_rect = pygame.Rect(740, 540, 40, 20)
@@ -25,9 +28,24 @@ class SoftBodyScene(Scene):
                              'Add Triangle': pygame.Rect(120, 10, 100, 50)}
         self.slider_rect = pygame.Rect(10, 70, 200, 10)
         self.slider_thumb_rect = pygame.Rect(10, 65, 10, 20)
+        self.dragging_slider = False
         self.slider_value = 0.5  # Starts halfway
         self.mass_value = 1.0  # Default weight
 
+    def make_soft_body(self, shape):
+        self.shape = shape
+        mesh = None
+        if shape == "star":
+            outline = []
+            for k in range(10):
+                angle = math.pi * k / 5 - math.pi / 2
+                radius = 100 if k % 2 == 0 else 45
+                outline.append((radius * math.cos(angle), radius * math.sin(angle)))
+            mesh = Mesh.from_polygon(outline, config.softbody_mesh_spacing)
+        elif shape == "mesh file":
+            mesh = Mesh.load(config.softbody_mesh)
+        return SoftBody(config.width // 2 - 100, config.height // 2 - 100, 200, 200, 1.0, 0.05, config.softbody_lattice, self.user_polygons, config.width, config.height, mesh)
+
     def draw(self, screen):
         screen.fill((255, 255, 255))
         self.soft_body.render(screen)
@@ -59,20 +77,40 @@ class SoftBodyScene(Scene):
             text_y = rect.y + (rect.height - text_surf.get_height()) // 2
             screen.blit(text_surf, (text_x, text_y))
 
+        # How many spring-polygon pairs the broadphase let through to the exact edge tests
+        broadphase = self.soft_body.broadphase
+        stats = f"Collision candidates: {broadphase.candidate_pairs} of {broadphase.possible_pairs} spring-polygon pairs"
+        screen.blit(font.render(stats, True, BLACK), (10, config.height - 30))
+        solver = f"Solver: {self.soft_body.solver} (S to switch)"
+        if self.soft_body.solver == "implicit":
+            solver += f", {self.soft_body.implicit.last_iterations} CG iterations"
+        screen.blit(font.render(solver, True, BLACK), (10, config.height - 50))
+        system = self.soft_body.system
+        body = f"Body: {self.shape}, {system.count} particles, {system.spring_count} springs (M to switch)"
+        screen.blit(font.render(body, True, BLACK), (10, config.height - 70))
+        islands = self.soft_body.islands
+        if self.soft_body.allow_sleep:
+            sleep = f"Sleep: {islands.asleep_count()} of {len(islands.asleep)} islands asleep"
+            if islands.all_asleep:
+                sleep += ", solver skipped"
+        else:
+            sleep = "Sleep: off"
+        screen.blit(font.render(sleep, True, BLACK), (10, config.height - 90))
+
     def handle_event(self, event, scene_manager):
 
         if event.type == pygame.MOUSEBUTTONDOWN:
             mouse_x, mouse_y = pygame.mouse.get_pos()
             mouse_vec = pygame.Vector2(mouse_x, mouse_y)
             # See if user clicked the center bit
-            center_of_mass = self.soft_body.compute_center_of_mass()
+            center_of_mass = self.soft_body.center
             distance_to_com = center_of_mass.distance_to(pygame.Vector2(mouse_x, mouse_y))
             if self.right_arrow_rect.collidepoint(mouse_x, mouse_y):
                 scene_manager.switch_to("spring")
             elif self.left_arrow_rect.collidepoint(mouse_x, mouse_y):
                 scene_manager.switch_to("fluid")
             for poly in self.user_polygons:
-                if poly.is_point_inside(mouse_vec):
+                if poly.contains_points([mouse_vec])[0]:
                     self.dragged_polygon = poly
                     break
             # Check if a UI button was clicked
@@ -96,12 +134,20 @@ class SoftBodyScene(Scene):
                 self.soft_body.drag_offset = pygame.Vector2(mouse_x, mouse_y) - center_of_mass
             else:
                 # Check if mouse is near any particle
-                for particle in self.soft_body.particles:
-                    distance_to_particle = particle.position.distance_to(pygame.Vector2(mouse_x, mouse_y))
-                    if distance_to_particle < particle.radius:
-                        self.dragged_particle = particle
-                        break
+                system = self.soft_body.system
+                index = system.first_within(mouse_x, mouse_y, system.radius)
+                if index is not None:
+                    self.dragged_particle = self.soft_body.particles[index]
 
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+            solvers = self.soft_body.solvers()
+            self.soft_body.solver = solvers[(solvers.index(self.soft_body.solver) + 1) % len(solvers)]
+            self.soft_body.islands.wake()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_m:
+            solver = self.soft_body.solver
+            self.soft_body = self.make_soft_body(self.shapes[(self.shapes.index(self.shape) + 1) % len(self.shapes)])
+            self.soft_body.solver = solver
+            self.dragged_particle = None
         elif event.type == pygame.MOUSEBUTTONUP:
             self.soft_body.dragging = False
             self.dragged_particle = None
@@ -119,12 +165,12 @@ class SoftBodyScene(Scene):
                 self.mass_value = self.slider_value * 10  # Assume max mass is 10
                 for particle in self.soft_body.particles:
                     particle.mass = self.mass_value
+                self.soft_body.islands.wake()
 
             if self.dragged_polygon:
                 # Drag the entire polygon by translating all its vertices
                 translation_vector = pygame.Vector2(mouse_x, mouse_y) - self.dragged_polygon.vertices[0]
-                for vertex in self.dragged_polygon.vertices:
-                    vertex += translation_vector
+                self.dragged_polygon.move(translation_vector.x, translation_vector.y)
             if self.soft_body.dragging:
                 self.soft_body.handle_mouse_move(mouse_x, mouse_y)
             elif self.dragged_particle:
@@ -134,14 +180,15 @@ class SoftBodyScene(Scene):
         if self.dragged_particle:
             mouse_x, mouse_y = pygame.mouse.get_pos()
             self.dragged_particle.position = pygame.Vector2(mouse_x, mouse_y)
+            self.soft_body.islands.wake()
         elif self.soft_body.dragging:
             pass
         self.soft_body.update(dt)
+        system = self.soft_body.system
+        points = system.positions() if self.user_polygons else None
         for poly in self.user_polygons:
-            for particle in self.soft_body.particles:
-                if poly.is_point_inside(particle.position):
-                    # Apply a simple repulsion force by reversing the velocity
-                    particle.velocity *= -1 
+            # Apply a simple repulsion force by reversing the velocity of every particle inside
+            system.reverse(poly.contains_points(points))
     def add_square(self, x, y):
         # Add a square polygon centered at (x, y)
         square = PolygonObject([pygame.Vector2(x-20, y-20),
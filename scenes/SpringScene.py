@@ -122,7 +122,8 @@ class SpringScene(Scene):
                 self.velocity += acceleration * dt
 
                 # Update position based on velocity
-                last_spring.end[1] += self.velocity * dt
+                end_x, end_y = last_spring.end
+                last_spring.end = (end_x, end_y + self.velocity * dt)
 
             elif self.pulled and not self.released:
                 self.released = True  # The spring has been released, SHM starts
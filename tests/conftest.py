@@ -0,0 +1,8 @@
+import os
+import sys
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pygame
+
+# The scenes load fonts as they are built
+pygame.init()
@@ -0,0 +1,64 @@
+import tracemalloc
+import numpy as np
+import pytest
+from scenes.FluidScene import FluidScene
+
+WARMUP = 5
+STEPS = 10
+PEAK = 8192  # Bytes; one float32 field of the 80x60 grid is 19 KB
+
+
+def peak_allocation(scene):
+    """Most memory any one of STEPS updates had allocated at once, temporaries included."""
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(STEPS):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            scene.update(scene.dt)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        return peak
+    finally:
+        tracemalloc.stop()
+
+
+def warmed_up_scene(grid_level=None):
+    """A scene that has run a few dense steps, which sizes its scratch space for the whole grid."""
+    scene = FluidScene()
+    if grid_level is not None:
+        scene.set_grid_level(grid_level)
+    for _ in range(WARMUP):
+        scene.update(scene.dt)
+    assert scene.tiles.dense
+    return scene
+
+
+def test_fields_are_float32():
+    scene = FluidScene()
+    for field in (scene.fields.density, scene.fields.density_back, scene.fields.velocity, scene.fields.pressure):
+        assert field.dtype == np.float32
+
+
+@pytest.mark.parametrize("solver", ["multigrid", "sor", "jacobi"])
+def test_dense_update_does_not_allocate(solver):
+    scene = warmed_up_scene()
+    scene.set_pressure_solver(solver)
+    scene.update(scene.dt)
+    assert peak_allocation(scene) < PEAK
+    assert scene.tiles.dense
+
+
+def test_update_allocation_does_not_grow_with_the_grid():
+    scene = warmed_up_scene(grid_level=len(FluidScene().grid_sizes) - 1)
+    assert peak_allocation(scene) < PEAK
+
+
+def test_windowed_update_does_not_allocate():
+    scene = warmed_up_scene()
+    scene.velocity[:] = 0
+    scene.density[:] = 0
+    scene.density[35:38, 26:29] = 1.0
+    scene.update(scene.dt)
+    assert peak_allocation(scene) < PEAK
+    assert not scene.tiles.dense
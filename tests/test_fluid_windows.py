@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scenes.FluidScene import FluidScene
+
+STEPS = 10
+
+
+def blob_scene(dense, velocity_decay=1.0):
+    """A still fluid with a blob of dye in the middle of one tile."""
+    scene = FluidScene()
+    scene.velocity_decay = velocity_decay
+    scene.velocity[:] = 0
+    scene.density[35:38, 26:29] = 1.0
+    if dense:
+        scene.tiles.dense_fraction = -1  # Any active share counts as dense
+    return scene
+
+
+def test_blob_windows_cover_its_tile_and_halo():
+    scene = blob_scene(dense=False)
+    scene.update(scene.dt)
+    assert scene.tiles.windows == [(slice(24, 48), slice(16, 40))]
+
+
+@pytest.mark.parametrize("velocity_decay", [1.0, 0.995])
+def test_windowed_step_matches_dense_step(velocity_decay):
+    windowed, dense = blob_scene(False, velocity_decay), blob_scene(True, velocity_decay)
+    for _ in range(STEPS):
+        windowed.update(windowed.dt)
+        dense.update(dense.dt)
+        assert not windowed.tiles.dense and dense.tiles.dense
+        np.testing.assert_allclose(windowed.density, dense.density, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(windowed.velocity, dense.velocity, rtol=0, atol=1e-6)
+
+
+def test_window_diffusion_sees_its_neighbours():
+    # Dye right outside the window should seep in, as it would on the whole grid
+    windowed, dense = blob_scene(dense=False), blob_scene(dense=True)
+    for scene in (windowed, dense):
+        scene.density[:] = 0
+        scene.density[23, 16:40] = 1e-3  # Below the activity threshold, so its tiles stay quiet
+        scene.density[36, 27] = 1.0
+        scene.diffusion(scene.tiles.update(scene.density, scene.velocity))
+    # Held neighbours do not lose dye of their own, so the window gets slightly more of it
+    inside = (slice(24, 48), slice(16, 40))
+    assert windowed.density[24, 16:40].min() > 1e-5
+    np.testing.assert_allclose(windowed.density[inside], dense.density[inside], rtol=0, atol=2e-6)
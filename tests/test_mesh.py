@@ -0,0 +1,17 @@
+import math
+import pytest
+from engine.Mesh import Mesh
+
+SQUARE = [(0, 0), (40, 0), (40, 40), (0, 40)]
+
+
+def test_from_polygon_splits_edges_down_to_spacing():
+    mesh = Mesh.from_polygon(SQUARE, 10)
+    longest = max(math.dist(mesh.vertices[i], mesh.vertices[j]) for i, j in mesh.edge_pairs())
+    assert longest <= 10
+
+
+@pytest.mark.parametrize("spacing", [0, -5, float("nan")])
+def test_from_polygon_rejects_spacing_that_is_not_positive(spacing):
+    with pytest.raises(ValueError):
+        Mesh.from_polygon(SQUARE, spacing)
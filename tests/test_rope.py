@@ -0,0 +1,30 @@
+import math
+import pytest
+from engine.Rope import Rope
+
+LINKS = 200
+K = 1e5
+
+
+def hanging_rope(vectorized, iterations):
+    rope = Rope((400, 50), (1e9, 1e9), gravity=0.5, iterations=iterations)
+    rope.vectorized = vectorized
+    rope.set_columns(rope.x, rope.y, rope.vx, rope.vy, rope.inverse_mass, rope.rest, rope.k)
+    rope.add_links(LINKS, 1.0, K)
+    return rope
+
+
+# One solve a substep is never enough, so the second case only holds through the clamp
+@pytest.mark.parametrize("iterations", [40, 1])
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_dragged_and_swinging_rope_keeps_its_length(vectorized, iterations):
+    rope = hanging_rope(vectorized, iterations)
+    end_x, end_y = rope.x[-1], rope.y[-1] - 10
+    for frame in range(120):
+        if frame < 60:
+            angle = 2 * math.pi * frame / 60
+            rope.hold(LINKS, end_x + 10 * math.sin(angle), end_y + 10 * math.cos(angle))
+        else:
+            rope.hold(None, 0, 0)
+        rope.step()
+        assert rope.stretch() < 1.05
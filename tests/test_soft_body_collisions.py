@@ -0,0 +1,28 @@
+import pygame
+from engine.PolygonObject import PolygonObject
+from engine.SoftBody import SoftBody
+
+
+def test_edge_tests_use_spring_ends_moved_by_earlier_collisions():
+    # A square cutting through the lattice, so springs cross several of its edges
+    square = PolygonObject([pygame.Vector2(x, y) for x, y in ((330, 230), (370, 230), (370, 270), (330, 270))])
+    body = SoftBody(300, 200, 200, 200, 1.0, 0.05, 5, [square], 800, 600)
+    test_segment, handle_collision = body.segment_intersect, body.handle_collision
+    collisions = []
+    stale = []
+
+    def checked_test(p1, p2, v1, v2):
+        ends = {(tuple(s.particle_a.position), tuple(s.particle_b.position)) for s in body.springs}
+        if (tuple(p1), tuple(p2)) not in ends:
+            stale.append((p1, p2))
+        return test_segment(p1, p2, v1, v2)
+
+    def counted_collision(*args):
+        collisions.append(args[0])
+        return handle_collision(*args)
+
+    body.segment_intersect = checked_test
+    body.handle_collision = counted_collision
+    body.update(1 / 60)
+    assert collisions
+    assert not stale
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from engine.Mesh import Mesh
+from engine.SoftBody import SoftBody
+
+FRAME = 1 / 60
+# Three squares in a row with nothing joining them, so three islands
+THREE_SQUARES = Mesh(
+    [(x + dx, y) for x in (0, 160, 320) for dx, y in ((0, 0), (40, 0), (40, 40), (0, 40))],
+    [(i + a, i + b, i + c) for i in (0, 4, 8) for a, b, c in ((0, 1, 2), (0, 2, 3))],
+)
+STEPS = {
+    "explicit": lambda body: (body.system, "integrate"),
+    "xpbd": lambda body: (body.xpbd, "step"),
+    "implicit": lambda body: (body.implicit, "step"),
+}
+
+
+@pytest.mark.parametrize("solver", ["explicit", "xpbd", "implicit"])
+def test_body_on_the_floor_comes_to_rest(solver):
+    body = SoftBody(300, 360, 200, 200, 1.0, 0.05, 5, [], 800, 600)
+    body.solver = solver
+    for _ in range(600):
+        body.update(FRAME)
+        if body.islands.all_asleep:
+            break
+    assert body.islands.all_asleep
+
+
+# Putting the first island to sleep leaves one run of awake rows, the middle one two runs
+@pytest.mark.parametrize("sleeper", [0, 1])
+@pytest.mark.parametrize("solver", ["explicit", "xpbd", "implicit"])
+def test_sleeping_island_is_left_out_of_the_step(solver, sleeper):
+    body = SoftBody(100, 100, 600, 80, 1.0, 0.05, 5, [], 800, 600, THREE_SQUARES)
+    body.solver = solver
+    islands = body.islands
+    islands.refresh()
+    assert len(islands.asleep) == 3
+    islands.asleep[sleeper] = True
+    islands.boxes[sleeper] = islands.island_boxes()[sleeper]
+    islands.stop(sleeper)
+    system = body.system
+    resting = islands.labels == sleeper
+    x, y = system.x[resting].copy(), system.y[resting].copy()
+    falling = system.y[~resting].copy()
+
+    owner, name = STEPS[solver](body)
+    step = getattr(owner, name)
+    stepped = []
+
+    def spy(*args, particles=None, **kwargs):
+        stepped.append(particles)
+        return step(*args, particles=particles, **kwargs)
+
+    setattr(owner, name, spy)
+    for _ in range(10):
+        body.update(FRAME)
+    assert islands.asleep == [island == sleeper for island in range(3)]
+    assert np.array_equal(system.x[resting], x) and np.array_equal(system.y[resting], y)
+    assert not system.vx[resting].any() and not system.vy[resting].any()
+    assert (system.y[~resting] > falling).all()
+    assert stepped and all(np.array_equal(np.arange(system.count)[particles], np.flatnonzero(~resting)) for particles in stepped)
@@ -0,0 +1,43 @@
+import numpy as np
+from engine.SPHFluid import SPHFluid
+from scenes.SPHScene import SPACING, SPHScene
+
+BOUNDS = (200, 200)
+
+
+def block(count, columns=20):
+    row, column = np.divmod(np.arange(count), columns)
+    return 2 + column * SPACING, BOUNDS[1] - 1 - row * SPACING
+
+
+def test_from_arrays_keeps_positions_and_velocities():
+    x, y = block(100)
+    vx, vy = np.full(100, 3.0), np.full(100, -2.0)
+    fluid = SPHFluid.from_arrays(x, y, BOUNDS, vx, vy, smoothing_radius=8.0, mass=2.0)
+    assert fluid.count == 100
+    assert (fluid.h, fluid.mass) == (8.0, 2.0)
+    # Adding sorts the store by hash cell, so compare as sets of particles
+    assert sorted(zip(fluid.x, fluid.y)) == sorted(zip(x, y))
+    assert set(fluid.vx) == {3.0} and set(fluid.vy) == {-2.0}
+    assert fluid.rest_density > 0
+
+
+def test_from_arrays_starts_at_rest_without_velocities():
+    fluid = SPHFluid.from_arrays(*block(100), BOUNDS)
+    assert not fluid.vx.any() and not fluid.vy.any()
+
+
+def test_block_stays_inside_the_walls():
+    fluid = SPHFluid.from_arrays(*block(400), BOUNDS)
+    for _ in range(30):
+        fluid.step(1 / 60)
+    assert np.isfinite(fluid.x).all() and np.isfinite(fluid.y).all()
+    assert fluid.x.min() >= 0 and fluid.x.max() <= BOUNDS[0]
+    assert fluid.y.min() >= 0 and fluid.y.max() <= BOUNDS[1]
+
+
+def test_scene_takes_mass_and_smoothing_radius_from_fluid_particle():
+    scene = SPHScene()
+    scene.reset(1_000)
+    assert scene.fluid.count == 1_000
+    assert (scene.fluid.h, scene.fluid.mass) == (10.0, 1.0)
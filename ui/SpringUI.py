@@ -1,7 +1,6 @@
 import pygame
 import math
 from engine.FluidParticle import FluidParticle
-from engine.Spring import Spring
 
 
 class SpringUI:
@@ -62,14 +61,11 @@ class SpringUI:
 
             # Handle Add Spring button
             if pygame.Rect(self.x, self.y, 100, 40).collidepoint(mouse_x, mouse_y):
-                last_spring = spring_chain.springs[-1]
-                new_spring = Spring(last_spring.end[0], last_spring.end[1], 100, 0.05, last_spring.screen_height, screen_width=last_spring.screen_width)
-                spring_chain.springs.append(new_spring)
+                spring_chain.add_spring(100, 0.05)
 
             # Handle Remove Spring button
             if pygame.Rect(self.x, self.y + 50, 140, 40).collidepoint(mouse_x, mouse_y):
-                if len(spring_chain.springs) > 1:
-                    spring_chain.springs.pop()
+                spring_chain.remove_spring()
 
             if math.sqrt((mouse_x - self.slider_x)**2 + (mouse_y - (self.y + 100))**2) < 10:
                 self.dragging_slider = True